@@ -0,0 +1,122 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from datetime import date
+from decimal import Decimal
+from app.db.database import get_async_db
+from app.models.rollup import DailyRollup
+from app.models.category import Category
+from app.schemas.analytics import DashboardSummary, CategoryTotal, TimeSeriesResponse
+from app.services import rollups, exchange_rates
+from app.api.auth import get_current_user
+from app.core.money import CURRENCY_CODE
+
+router = APIRouter()
+
+def _filtered(query, user_id: int, date_from: Optional[date], date_to: Optional[date], currency: Optional[str]):
+    query = query.where(DailyRollup.user_id == user_id)
+    if date_from:
+        query = query.where(DailyRollup.day >= date_from)
+    if date_to:
+        query = query.where(DailyRollup.day <= date_to)
+    if currency:
+        query = query.where(DailyRollup.currency == currency)
+    return query
+
+def _target(current_user, currency: Optional[str], reporting_currency: Optional[str]) -> str:
+    # A currency filter leaves nothing to convert
+    return currency or reporting_currency or exchange_rates.reporting_currency(current_user)
+
+async def _missing(db: AsyncSession, user_id: int, target: str, currency: Optional[str], date_from, date_to):
+    if currency:
+        return []
+    return await db.run_sync(exchange_rates.missing_currencies, user_id, target, date_from, date_to)
+
+@router.get("/dashboard", response_model=DashboardSummary)
+async def get_dashboard_summary(
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    currency: Optional[str] = None,
+    reporting_currency: Optional[str] = Query(None, regex=CURRENCY_CODE),
+    top: int = Query(5, ge=1, le=50),
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_user)
+):
+    """
+    Income/expense totals and top expense categories, aggregated in SQL.
+
+    Served from the daily rollups. Amounts are converted into the reporting
+    currency (the query parameter, else the user's setting) as of each
+    day; currencies lacking a rate are left out and listed in
+    ``missing_rates``. With ``currency`` only that currency is summed.
+    """
+    target = _target(current_user, currency, reporting_currency)
+    conversion = exchange_rates.RollupConversion(target)
+    totals = (await db.execute(_filtered(
+        conversion.join(select(DailyRollup.type, conversion.converted_sum(), conversion.converted_count())),
+        current_user.id, date_from, date_to, currency
+    ).group_by(DailyRollup.type))).all()
+
+    by_type = {row[0]: (row[1] or Decimal(0), row[2]) for row in totals}
+    income = by_type.get("income", (Decimal(0), 0))[0]
+    expenses = by_type.get("expense", (Decimal(0), 0))[0]
+    count = sum(row[2] for row in totals)
+
+    spent = conversion.converted_sum().label("spent")
+    top_rows = (await db.execute(_filtered(
+        conversion.join(select(Category.id, Category.name, Category.color, spent).select_from(DailyRollup).join(
+            Category, Category.id == DailyRollup.category_id
+        )),
+        current_user.id, date_from, date_to, currency
+    ).where(DailyRollup.type == "expense").group_by(
+        Category.id, Category.name, Category.color
+    ).having(spent.is_not(None)).order_by(spent.desc()).limit(top))).all()
+
+    top_categories = [
+        CategoryTotal(
+            id=row.id,
+            name=row.name,
+            color=row.color or "#888",
+            amount=row.spent,
+            percentage=float(row.spent / expenses * 100) if expenses else 0.0,
+        )
+        for row in top_rows
+    ]
+
+    return DashboardSummary(
+        total_income=income,
+        total_expenses=expenses,
+        net_balance=income - expenses,
+        transaction_count=count,
+        top_categories=top_categories,
+        date_from=date_from,
+        date_to=date_to,
+        currency=currency,
+        reporting_currency=target,
+        missing_rates=await _missing(db, current_user.id, target, currency, date_from, date_to),
+    )
+
+@router.get("/timeseries", response_model=TimeSeriesResponse)
+async def get_timeseries(
+    granularity: str = Query("month", regex="^(day|week|month)$"),
+    group_by: str = Query("category", regex="^(category|type)$"),
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    currency: Optional[str] = None,
+    reporting_currency: Optional[str] = Query(None, regex=CURRENCY_CODE),
+    type: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_user)
+):
+    """
+    Totals per day, week or month, one series per category or type.
+
+    Served from the daily rollups; weeks start on Monday. Pass ``type=expense``
+    to chart spending only. Totals are converted into the reporting currency
+    as on the dashboard.
+    """
+    target = _target(current_user, currency, reporting_currency)
+    return await db.run_sync(
+        rollups.timeseries_report, current_user.id, granularity, group_by, date_from, date_to, currency, type, target
+    )
@@ -1,12 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
-from passlib.context import CryptContext
-from app.db.database import get_db
+from app.db.database import get_async_db
+from app.db.writer import run_write
 from app.models.user import User
-from app.schemas.user import UserCreate, User as UserSchema
+from app.schemas.user import UserCreate, UserUpdate, User as UserSchema
+from app.core.cache import TTLCache, invalidate_on_commit
+from app.services.passwords import pwd_context, password_hasher, PasswordHasherBusy, PASSWORD_HASH_RETRY_AFTER_SECONDS
 from typing import Optional
 
 # Security configurations
@@ -14,17 +19,45 @@ import os
 SECRET_KEY = os.getenv("SECRET_KEY", "a_very_secret_key_replace_in_production")  # use env variable in production
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "4096"))
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
 
 router = APIRouter()
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+@dataclass(frozen=True)
+class AuthenticatedUser:
+    """Detached snapshot of the fields request handlers need from a User"""
+    id: int
+    email: str
+    is_active: bool
+    reporting_currency: Optional[str] = None
+
+# Active users keyed by token subject, so most requests skip the user lookup
+user_cache = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL_SECONDS, name="auth_users")
+
+def _cache_keys(user: User) -> list:
+    # Tokens issued before subjects became ids still carry the email
+    return [str(user.id), user.email, *inspect(user).attrs.email.history.deleted]
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _on_user_changed(mapper, connection, target):
+    invalidate_on_commit(object_session(target), user_cache, *_cache_keys(target))
+
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+def _hasher_busy():
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many concurrent sign-ins, please retry shortly",
+        headers={"Retry-After": str(PASSWORD_HASH_RETRY_AFTER_SECONDS)},
+    )
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -35,39 +68,60 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def _add_user(db: Session, email: str, hashed_password: str) -> User:
+    db_user = User(email=email, hashed_password=hashed_password)
+    db.add(db_user)
+    return db_user
+
+def _store_hash(db: Session, user_id: int, hashed_password: str):
+    db.get(User, user_id).hashed_password = hashed_password
+
+def _update_user(db: Session, user_id: int, changes: UserUpdate) -> User:
+    user = db.get(User, user_id)
+    for key, value in changes.dict(exclude_unset=True).items():
+        setattr(user, key, value)
+    return user
+
 @router.post("/register", response_model=UserSchema)
-def register_user(user: UserCreate, db: Session = Depends(get_db)):
-    db_user = db.query(User).filter(User.email == user.email).first()
+async def register_user(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    db_user = (await db.execute(select(User).where(User.email == user.email))).scalar_one_or_none()
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
     
-    hashed_password = get_password_hash(user.password)
-    db_user = User(email=user.email, hashed_password=hashed_password)
-    
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    
-    return db_user
+    try:
+        hashed_password = await password_hasher.hash(user.password)
+    except PasswordHasherBusy:
+        raise _hasher_busy()
+    return await run_write(db, _add_user, user.email, hashed_password)
 
 @router.post("/token")
-def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
+    user = (await db.execute(select(User).where(User.email == form_data.username))).scalar_one_or_none()
+    verified, new_hash = False, None
+    if user:
+        try:
+            verified, new_hash = await password_hasher.verify_and_update(form_data.password, user.hashed_password)
+        except PasswordHasherBusy:
+            raise _hasher_busy()
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    if new_hash:
+        # Stored hash predates the current cost settings
+        await run_write(db, _store_hash, user.id, new_hash)
+    
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
+        data={"sub": str(user.id)}, expires_delta=access_token_expires
     )
     
     return {"access_token": access_token, "token_type": "bearer"}
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -76,14 +130,40 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email = payload.get("sub")
-        if email is None:
+        subject = payload.get("sub")
+        if subject is None:
             raise credentials_exception
     except JWTError:
         raise credentials_exception
-        
-    user = db.query(User).filter(User.email == email).first()
-    if user is None:
+
+    user = user_cache.get(subject)
+    if user is not None:
+        return user
+
+    if subject.isdigit():
+        db_user = await db.get(User, int(subject))
+    else:
+        db_user = (await db.execute(select(User).where(User.email == subject))).scalar_one_or_none()
+    if db_user is None:
         raise credentials_exception
-    
+    if not db_user.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+
+    user = AuthenticatedUser(
+        id=db_user.id, email=db_user.email, is_active=db_user.is_active, reporting_currency=db_user.reporting_currency
+    )
+    user_cache.set(subject, user)
     return user
+
+@router.get("/me", response_model=UserSchema)
+async def read_current_user(db: AsyncSession = Depends(get_async_db), current_user = Depends(get_current_user)):
+    return await db.get(User, current_user.id)
+
+@router.patch("/me", response_model=UserSchema)
+async def update_current_user(
+    changes: UserUpdate, db: AsyncSession = Depends(get_async_db), current_user = Depends(get_current_user)
+):
+    """
+    Update account settings; currently the reporting currency
+    """
+    return await run_write(db, _update_user, current_user.id, changes)
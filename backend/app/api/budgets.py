@@ -1,16 +1,52 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
-from app.db.database import get_db
+from typing import List, Optional
+from app.db.database import get_async_db
+from app.db.writer import run_write
 from app.models.budget import Budget
-from app.schemas.budget import Budget as BudgetSchema, BudgetCreate
+from app.schemas.budget import Budget as BudgetSchema, BudgetCreate, BudgetProgress
+from app.schemas.batch import BatchRequest, BatchResult
 from app.api.auth import get_current_user
+from app.api.pagination import decode_id_cursor, set_next_cursor
+from app.api.conditional import conditional_list
+from app.core.serialization import json_response
+from app.services.rollups import budget_missing_rates, budget_spend, budget_window
+from app.services.batch import apply_batch
+from app.services import exchange_rates
 from datetime import date
+from decimal import Decimal
 
 router = APIRouter()
 
-@router.post("/", response_model=BudgetSchema)
-def create_budget(budget: BudgetCreate, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
+def _with_progress(db: Session, budgets: List[Budget], currency: str) -> List[BudgetProgress]:
+    """
+    Progress with spending converted into ``currency``, the owner's
+    reporting currency; spend that cannot be converted is flagged in
+    ``missing_rates`` rather than counted
+    """
+    today = date.today()
+    spent_by_budget = budget_spend(db, budgets, today, currency)
+    missing_by_budget = budget_missing_rates(db, budgets, today, currency)
+    results = []
+    for budget in budgets:
+        spent = spent_by_budget.get(budget.id, Decimal(0))
+        amount = budget.amount or Decimal(0)
+        window_start, window_end = budget_window(budget, today)
+        results.append(BudgetProgress(
+            **BudgetSchema.from_orm(budget).dict(),
+            spent=spent,
+            remaining=amount - spent,
+            percentage=float(spent / amount * 100) if amount else 0.0,
+            currency=currency,
+            missing_rates=missing_by_budget.get(budget.id, []),
+            window_start=window_start,
+            window_end=window_end,
+        ))
+    return results
+
+def _add_budget(db: Session, budget: BudgetCreate, user_id: int) -> Budget:
     db_budget = Budget(
         amount=budget.amount,
         name=budget.name,
@@ -18,67 +54,102 @@ def create_budget(budget: BudgetCreate, db: Session = Depends(get_db), current_u
         start_date=budget.start_date or date.today(),
         end_date=budget.end_date,
         category_id=budget.category_id,
-        user_id=current_user.id
+        user_id=user_id
     )
     
     db.add(db_budget)
-    db.commit()
-    db.refresh(db_budget)
-    
     return db_budget
 
-@router.get("/", response_model=List[BudgetSchema])
-def get_budgets(skip: int = 0, limit: int = 100, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
-    budgets = db.query(Budget).filter(Budget.user_id == current_user.id).offset(skip).limit(limit).all()
-    return budgets
+def _update_budget(budget: Budget, budget_data: BudgetCreate):
+    for key, value in budget_data.dict().items():
+        setattr(budget, key, value)
 
-@router.get("/{budget_id}", response_model=BudgetSchema)
-def get_budget(budget_id: int, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
-    budget = db.query(Budget).filter(
+def _owned(db: Session, budget_id: int, user_id: int) -> Budget:
+    budget = db.execute(select(Budget).where(
         Budget.id == budget_id,
-        Budget.user_id == current_user.id
-    ).first()
+        Budget.user_id == user_id
+    )).scalar_one_or_none()
     
     if budget is None:
         raise HTTPException(status_code=404, detail="Budget not found")
     
     return budget
 
+async def _get_owned(db: AsyncSession, budget_id: int, user_id: int) -> Budget:
+    return await db.run_sync(_owned, budget_id, user_id)
+
+def _update_owned(db: Session, budget_id: int, user_id: int, budget_data: BudgetCreate) -> Budget:
+    budget = _owned(db, budget_id, user_id)
+    _update_budget(budget, budget_data)
+    return budget
+
+def _delete_owned(db: Session, budget_id: int, user_id: int):
+    db.delete(_owned(db, budget_id, user_id))
+
+@router.post("/", response_model=BudgetSchema)
+async def create_budget(budget: BudgetCreate, db: AsyncSession = Depends(get_async_db), current_user = Depends(get_current_user)):
+    return await run_write(db, _add_budget, budget, current_user.id)
+
+@router.post("/batch", response_model=BatchResult)
+async def batch_budgets(
+    batch: BatchRequest[BudgetCreate],
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_user)
+):
+    """
+    Apply many create/update/delete operations in one database transaction
+    """
+    return await run_write(
+        db, apply_batch, Budget, current_user.id, batch,
+        create=lambda session, data: _add_budget(session, data, current_user.id),
+        update=lambda session, budget, data: _update_budget(budget, data),
+        delete=lambda session, budget: session.delete(budget),
+    )
+
+@router.get("/", response_model=List[BudgetProgress])
+async def get_budgets(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_user)
+):
+    async def render():
+        query = select(Budget).where(Budget.user_id == current_user.id).order_by(Budget.id)
+        if cursor:
+            query = query.where(Budget.id > decode_id_cursor(cursor))
+        else:
+            query = query.offset(skip)
+        budgets = (await db.execute(query.limit(limit))).scalars().all()
+        progress = await db.run_sync(_with_progress, budgets, currency)
+        response = json_response([item.dict() for item in progress])
+        set_next_cursor(response, budgets, limit, lambda row: {"id": row.id})
+        return response
+
+    currency = exchange_rates.reporting_currency(current_user)
+    rates_version = await db.run_sync(lambda session: exchange_rates.rate_table(session).version)
+    # Progress windows roll over with the calendar, and spend moves with rates, not just with writes
+    return await conditional_list(request, db, current_user.id, render, date.today(), currency, rates_version)
+
+@router.get("/{budget_id}", response_model=BudgetProgress)
+async def get_budget(budget_id: int, db: AsyncSession = Depends(get_async_db), current_user = Depends(get_current_user)):
+    budget = await _get_owned(db, budget_id, current_user.id)
+    
+    currency = exchange_rates.reporting_currency(current_user)
+    return (await db.run_sync(_with_progress, [budget], currency))[0]
+
 @router.put("/{budget_id}", response_model=BudgetSchema)
-def update_budget(
+async def update_budget(
     budget_id: int, 
     budget_data: BudgetCreate,
-    db: Session = Depends(get_db), 
+    db: AsyncSession = Depends(get_async_db), 
     current_user = Depends(get_current_user)
 ):
-    budget = db.query(Budget).filter(
-        Budget.id == budget_id,
-        Budget.user_id == current_user.id
-    ).first()
-    
-    if budget is None:
-        raise HTTPException(status_code=404, detail="Budget not found")
-    
-    # Update budget attributes
-    for key, value in budget_data.dict().items():
-        setattr(budget, key, value)
-    
-    db.commit()
-    db.refresh(budget)
-    
-    return budget
+    return await run_write(db, _update_owned, budget_id, current_user.id, budget_data)
 
 @router.delete("/{budget_id}")
-def delete_budget(budget_id: int, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
-    budget = db.query(Budget).filter(
-        Budget.id == budget_id,
-        Budget.user_id == current_user.id
-    ).first()
-    
-    if budget is None:
-        raise HTTPException(status_code=404, detail="Budget not found")
-    
-    db.delete(budget)
-    db.commit()
+async def delete_budget(budget_id: int, db: AsyncSession = Depends(get_async_db), current_user = Depends(get_current_user)):
+    await run_write(db, _delete_owned, budget_id, current_user.id)
     
     return {"message": "Budget deleted successfully"}
@@ -1,79 +1,118 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
-from app.db.database import get_db
+from typing import List, Optional
+from app.db.database import get_async_db
+from app.db.writer import run_write
 from app.models.category import Category
 from app.schemas.category import Category as CategorySchema, CategoryCreate
+from app.schemas.batch import BatchRequest, BatchResult
 from app.api.auth import get_current_user
+from app.services.batch import apply_batch
+from app.api.pagination import decode_id_cursor, set_next_cursor
+from app.api.conditional import conditional_list
+from app.core.serialization import rows_response
 
 router = APIRouter()
 
-@router.post("/", response_model=CategorySchema)
-def create_category(category: CategoryCreate, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
+LIST_COLUMNS = tuple(CategorySchema.__fields__)
+
+def _add_category(db: Session, category: CategoryCreate, user_id: int) -> Category:
     db_category = Category(
         name=category.name,
         color=category.color,
-        user_id=current_user.id
+        user_id=user_id
     )
     
     db.add(db_category)
-    db.commit()
-    db.refresh(db_category)
-    
     return db_category
 
-@router.get("/", response_model=List[CategorySchema])
-def get_categories(skip: int = 0, limit: int = 100, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
-    categories = db.query(Category).filter(Category.user_id == current_user.id).offset(skip).limit(limit).all()
-    return categories
+def _update_category(category: Category, category_data: CategoryCreate):
+    for key, value in category_data.dict().items():
+        setattr(category, key, value)
 
-@router.get("/{category_id}", response_model=CategorySchema)
-def get_category(category_id: int, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
-    category = db.query(Category).filter(
+def _owned(db: Session, category_id: int, user_id: int) -> Category:
+    category = db.execute(select(Category).where(
         Category.id == category_id,
-        Category.user_id == current_user.id
-    ).first()
+        Category.user_id == user_id
+    )).scalar_one_or_none()
     
     if category is None:
         raise HTTPException(status_code=404, detail="Category not found")
     
     return category
 
+async def _get_owned(db: AsyncSession, category_id: int, user_id: int) -> Category:
+    return await db.run_sync(_owned, category_id, user_id)
+
+def _update_owned(db: Session, category_id: int, user_id: int, category_data: CategoryCreate) -> Category:
+    category = _owned(db, category_id, user_id)
+    _update_category(category, category_data)
+    return category
+
+def _delete_owned(db: Session, category_id: int, user_id: int):
+    db.delete(_owned(db, category_id, user_id))
+
+@router.post("/", response_model=CategorySchema)
+async def create_category(category: CategoryCreate, db: AsyncSession = Depends(get_async_db), current_user = Depends(get_current_user)):
+    return await run_write(db, _add_category, category, current_user.id)
+
+@router.post("/batch", response_model=BatchResult)
+async def batch_categories(
+    batch: BatchRequest[CategoryCreate],
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_user)
+):
+    """
+    Apply many create/update/delete operations in one database transaction
+    """
+    return await run_write(
+        db, apply_batch, Category, current_user.id, batch,
+        create=lambda session, data: _add_category(session, data, current_user.id),
+        update=lambda session, category, data: _update_category(category, data),
+        delete=lambda session, category: session.delete(category),
+    )
+
+@router.get("/", response_model=List[CategorySchema])
+async def get_categories(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_user)
+):
+    async def render():
+        query = select(*[getattr(Category, name) for name in LIST_COLUMNS]).where(
+            Category.user_id == current_user.id
+        ).order_by(Category.id)
+        if cursor:
+            query = query.where(Category.id > decode_id_cursor(cursor))
+        else:
+            query = query.offset(skip)
+        rows = (await db.execute(query.limit(limit))).all()
+        response = rows_response(LIST_COLUMNS, rows)
+        set_next_cursor(response, rows, limit, lambda row: {"id": row.id})
+        return response
+
+    return await conditional_list(request, db, current_user.id, render)
+
+@router.get("/{category_id}", response_model=CategorySchema)
+async def get_category(category_id: int, db: AsyncSession = Depends(get_async_db), current_user = Depends(get_current_user)):
+    return await _get_owned(db, category_id, current_user.id)
+
 @router.put("/{category_id}", response_model=CategorySchema)
-def update_category(
+async def update_category(
     category_id: int, 
     category_data: CategoryCreate,
-    db: Session = Depends(get_db), 
+    db: AsyncSession = Depends(get_async_db), 
     current_user = Depends(get_current_user)
 ):
-    category = db.query(Category).filter(
-        Category.id == category_id,
-        Category.user_id == current_user.id
-    ).first()
-    
-    if category is None:
-        raise HTTPException(status_code=404, detail="Category not found")
-    
-    # Update category attributes
-    for key, value in category_data.dict().items():
-        setattr(category, key, value)
-    
-    db.commit()
-    db.refresh(category)
-    
-    return category
+    return await run_write(db, _update_owned, category_id, current_user.id, category_data)
 
 @router.delete("/{category_id}")
-def delete_category(category_id: int, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
-    category = db.query(Category).filter(
-        Category.id == category_id,
-        Category.user_id == current_user.id
-    ).first()
-    
-    if category is None:
-        raise HTTPException(status_code=404, detail="Category not found")
-    
-    db.delete(category)
-    db.commit()
+async def delete_category(category_id: int, db: AsyncSession = Depends(get_async_db), current_user = Depends(get_current_user)):
+    await run_write(db, _delete_owned, category_id, current_user.id)
     
     return {"message": "Category deleted successfully"}
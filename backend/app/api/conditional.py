@@ -0,0 +1,77 @@
+"""
+Conditional GET and rendered-body caching for the list endpoints.
+
+The per-user change sequence (``users.change_seq``, see
+app.services.sync) moves on every write to a user's transactions,
+categories or budgets, so it doubles as a version for all of their lists.
+A list response is identified by (user, version, path, query params); its
+ETag is a digest of that key. ``If-None-Match`` hits return 304 after one
+scalar lookup, and rendered bodies are kept in an LRU so an unchanged
+screen is served without touching the ORM.
+"""
+import hashlib
+import os
+from typing import Awaitable, Callable, Hashable, Optional
+from fastapi import Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.cache import TTLCache
+from app.models.user import User
+from app.api.pagination import NEXT_CURSOR_HEADER
+
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "512"))
+
+# Keys embed the version, so entries never go stale; LRU bounds memory
+response_cache = TTLCache(maxsize=RESPONSE_CACHE_SIZE, ttl=None, name="list_responses")
+
+# Rendered headers worth replaying from the cache
+_CACHED_HEADERS = (NEXT_CURSOR_HEADER.lower(),)
+
+_users = User.__table__
+
+
+async def user_version(db: AsyncSession, user_id: int) -> int:
+    return (await db.execute(select(_users.c.change_seq).where(_users.c.id == user_id))).scalar() or 0
+
+
+def _matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison, as RFC 9110 requires for If-None-Match
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag in candidates
+
+
+async def conditional_list(
+    request: Request,
+    db: AsyncSession,
+    user_id: int,
+    render: Callable[[], Awaitable[Response]],
+    *vary: Hashable,
+) -> Response:
+    """
+    Serve ``render()``'s JSON body with an ETag, from cache when possible.
+
+    ``vary`` adds inputs beyond the query string that change the body,
+    e.g. today's date for budget progress.
+    """
+    version = await user_version(db, user_id)
+    key = (user_id, version, request.url.path, tuple(sorted(request.query_params.multi_items())), *vary)
+    etag = '"' + hashlib.blake2b(repr(key).encode(), digest_size=12).hexdigest() + '"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+    if _matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    cached = response_cache.get(key)
+    if cached is None:
+        response = await render()
+        cached = (
+            response.body,
+            {name: value for name, value in response.headers.items() if name in _CACHED_HEADERS},
+        )
+        response_cache.set(key, cached)
+    body, extra = cached
+    return Response(content=body, media_type="application/json", headers={**extra, **headers})
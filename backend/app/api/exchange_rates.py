@@ -0,0 +1,32 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from datetime import date
+from app.db.database import get_async_db
+from app.api.auth import get_current_user
+from app.core.money import CURRENCY_CODE
+from app.schemas.exchange_rate import ExchangeRateLookup
+from app.services import exchange_rates
+
+# Rates are shared by every user, so they are read-only here; operators
+# load them from EXCHANGE_RATES_FILE (on startup or via setup_database)
+router = APIRouter()
+
+@router.get("/rate", response_model=ExchangeRateLookup)
+async def get_exchange_rate(
+    base: str = Query(..., regex=CURRENCY_CODE),
+    quote: str = Query(..., regex=CURRENCY_CODE),
+    on: Optional[date] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_user)
+):
+    """
+    Units of ``quote`` per ``base`` as of ``on`` (default today), derived
+    through an inverse or cross rate when the pair was not loaded directly
+    """
+    on = on or date.today()
+    table = await db.run_sync(exchange_rates.rate_table)
+    rate = table.rate(base, quote, on)
+    if rate is None:
+        raise HTTPException(status_code=404, detail=f"No {base}/{quote} rate on or before {on}")
+    return ExchangeRateLookup(base=base, quote=quote, on=on, rate=rate)
@@ -1,10 +1,87 @@
-from fastapi import APIRouter
+import asyncio
+from fastapi import APIRouter, Response
+from sqlalchemy import text
+from app.api.auth import user_cache
+from app.services.categorizer import matcher_cache
+from app.api.conditional import response_cache
+from app.services.exchange_rates import rate_cache
+from app.services.passwords import password_hasher
+from app.services.recurring import recurring_scheduler
+from app.services.jobs import job_queue
+from app.db.database import engine, async_engine, pool_stats
+from app.db import writer
 
 router = APIRouter()
 
+READINESS_TIMEOUT_SECONDS = 2.0
+
 @router.get("/health")
 def health_check():
     """
     Health check endpoint for container orchestration systems
     """
     return {"status": "ok"}
+
+@router.get("/health/ready")
+async def readiness_check(response: Response):
+    """
+    Readiness probe: 503 unless the database answers a trivial query
+    """
+    async def ping():
+        async with async_engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+
+    try:
+        await asyncio.wait_for(ping(), READINESS_TIMEOUT_SECONDS)
+    except Exception as error:
+        response.status_code = 503
+        return {"status": "unavailable", "database": type(error).__name__}
+    return {"status": "ready", "database": "ok"}
+
+@router.get("/health/cache")
+def cache_stats():
+    """
+    Hit/miss counters for the in-process caches
+    """
+    return {"caches": [user_cache.stats(), matcher_cache.stats(), response_cache.stats(), rate_cache.stats()]}
+
+@router.get("/health/password-hasher")
+def password_hasher_stats():
+    """
+    Queue depth and throughput of the password hashing pool
+    """
+    return password_hasher.stats()
+
+@router.get("/health/pool")
+def connection_pool_stats():
+    """
+    Connection pool usage for the sync and async engines
+    """
+    return {
+        "backend": engine.url.get_backend_name(),
+        "sync": pool_stats(engine),
+        "async": pool_stats(async_engine.sync_engine),
+    }
+
+@router.get("/health/writer")
+def writer_stats():
+    """
+    Group-commit counters for the SQLite writer, when performance mode is on
+    """
+    if writer.write_queue is None:
+        return {"enabled": False}
+    return {"enabled": True, **writer.write_queue.stats()}
+
+@router.get("/health/recurring")
+def recurring_scheduler_stats():
+    """
+    Heap size, next due day and counters of the recurring-transaction scheduler
+    """
+    return recurring_scheduler.stats()
+
+@router.get("/health/jobs")
+def job_queue_stats():
+    """
+    Pool slots and counters of this worker's background job dispatcher
+    """
+    return job_queue.stats()
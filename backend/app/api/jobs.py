@@ -0,0 +1,140 @@
+import os
+import shutil
+import uuid
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from app.db.database import get_async_db
+from app.db.writer import run_write
+from app.models.job import Job
+from app.schemas.job import ImportJobParams, Job as JobSchema, JobCreate
+from app.api.auth import get_current_user
+from app.services import exporters, importers, jobs
+from app.services.jobs import job_queue
+
+router = APIRouter()
+
+# Imports need an upload, so they have their own endpoint
+SUBMITTABLE_KINDS = ("report", "export", "recategorize")
+LIST_LIMIT = 50
+
+def _to_schema(job: Job) -> JobSchema:
+    return JobSchema(
+        id=job.id,
+        kind=job.kind,
+        status=job.status,
+        progress=job.progress,
+        message=job.message,
+        error=job.error,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+        result_url=f"/api/jobs/{job.id}/result" if job.status == "succeeded" else None,
+    )
+
+def _owned(db: Session, job_id: int, user_id: int) -> Job:
+    job = db.execute(select(Job).where(
+        Job.id == job_id,
+        Job.user_id == user_id
+    )).scalar_one_or_none()
+    
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    return job
+
+def _add_job(db: Session, user_id: int, kind: str, params) -> Job:
+    try:
+        return jobs.add_job(db, user_id, kind, params)
+    except jobs.JobLimitReached:
+        raise HTTPException(
+            status_code=429,
+            detail=f"At most {jobs.JOB_MAX_PENDING_PER_USER} jobs may be queued or running at once",
+        )
+
+async def _queue(db: AsyncSession, user_id: int, kind: str, params) -> JobSchema:
+    job = _to_schema(await run_write(db, _add_job, user_id, kind, params))
+    job_queue.notify()
+    return job
+
+@router.post("/", response_model=JobSchema, status_code=202)
+async def create_job(job: JobCreate, db: AsyncSession = Depends(get_async_db), current_user = Depends(get_current_user)):
+    """
+    Queue a report, export or recategorization to run in the background.
+
+    ``params`` takes the options of the matching endpoint: the time series
+    for ``report``, the export for ``export`` and ``overwrite`` for
+    ``recategorize``. Poll ``GET /api/jobs/{id}`` for progress, then fetch
+    ``result_url``.
+    """
+    if job.kind not in SUBMITTABLE_KINDS:
+        raise HTTPException(status_code=400, detail=f"Unknown job kind '{job.kind}'. Use one of: {', '.join(SUBMITTABLE_KINDS)}")
+    try:
+        params = jobs.KINDS[job.kind].params(**job.params)
+    except ValidationError as error:
+        raise HTTPException(status_code=422, detail=error.errors())
+    if job.kind == "export" and params.format == "parquet" and not exporters.parquet_available():
+        raise HTTPException(status_code=400, detail="Parquet export requires the pyarrow package")
+    return await _queue(db, current_user.id, job.kind, params)
+
+def _store_upload(source, fmt: str) -> str:
+    """Copy an upload into the jobs' upload directory; blocking, so run off the event loop"""
+    os.makedirs(jobs.upload_directory(), exist_ok=True)
+    path = os.path.join(jobs.upload_directory(), f"{uuid.uuid4().hex}.{fmt}")
+    with open(path, "wb") as out:
+        shutil.copyfileobj(source, out)
+    return path
+
+@router.post("/import", response_model=JobSchema, status_code=202)
+async def create_import_job(
+    file: UploadFile = File(...),
+    format: Optional[str] = None,
+    dedupe: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_user)
+):
+    """
+    Queue a CSV, OFX or QIF import; the result is the import's row report
+    """
+    try:
+        fmt = importers.detect_format(file.filename, format)
+    except importers.ImportFormatError as error:
+        raise HTTPException(status_code=400, detail=str(error))
+
+    path = await run_in_threadpool(_store_upload, file.file, fmt)
+    try:
+        return await _queue(db, current_user.id, "import", ImportJobParams(format=fmt, upload=path, dedupe=dedupe))
+    except Exception:
+        await run_in_threadpool(os.remove, path)
+        raise
+
+@router.get("/", response_model=List[JobSchema])
+async def get_jobs(db: AsyncSession = Depends(get_async_db), current_user = Depends(get_current_user)):
+    """The user's most recent jobs, newest first"""
+    rows = (await db.execute(
+        select(Job)
+        .where(Job.user_id == current_user.id)
+        .order_by(Job.id.desc())
+        .limit(LIST_LIMIT)
+    )).scalars().all()
+    return [_to_schema(job) for job in rows]
+
+@router.get("/{job_id}", response_model=JobSchema)
+async def get_job(job_id: int, db: AsyncSession = Depends(get_async_db), current_user = Depends(get_current_user)):
+    return _to_schema(await db.run_sync(_owned, job_id, current_user.id))
+
+@router.get("/{job_id}/result")
+async def get_job_result(job_id: int, db: AsyncSession = Depends(get_async_db), current_user = Depends(get_current_user)):
+    job = await db.run_sync(_owned, job_id, current_user.id)
+    if job.status != "succeeded":
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}; no result yet")
+    if not job.result_path or not os.path.exists(job.result_path):
+        raise HTTPException(status_code=410, detail="Job result has been removed")
+    return FileResponse(
+        job.result_path, media_type=job.result_media_type, filename=os.path.basename(job.result_path)
+    )
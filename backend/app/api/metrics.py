@@ -0,0 +1,137 @@
+"""
+Request and database instrumentation, exposed at ``/metrics``.
+
+``MetricsMiddleware`` times every HTTP request by method and route
+template (never the raw path, to keep label cardinality bounded) and
+tracks requests in flight. ``instrument_engine`` hooks an engine's cursor
+events to count queries and database time; the time is also charged to
+the request that issued the query through a context variable, which
+follows the request into async sessions, threadpool handlers and the
+SQLite writer thread.
+"""
+import contextvars
+import time
+from typing import Dict, List, Optional
+from fastapi import APIRouter, Response
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.core.metrics import registry, CONTENT_TYPE
+
+router = APIRouter()
+
+# [queries, seconds] for the request being served, if any
+request_db_stats: contextvars.ContextVar[Optional[list]] = contextvars.ContextVar("request_db_stats", default=None)
+
+_engines: Dict[str, Engine] = {}
+
+
+def _pool_checked_out():
+    for name, bind in _engines.items():
+        checkedout = getattr(bind.pool, "checkedout", None)
+        if callable(checkedout):
+            yield (name,), checkedout()
+
+
+REQUESTS = registry.counter(
+    "http_requests_total", "HTTP requests by method, route template and status", ("method", "route", "status")
+)
+REQUEST_SECONDS = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency including the response body", ("method", "route")
+)
+IN_PROGRESS = registry.gauge("http_requests_in_progress", "HTTP requests currently being served", ("method",))
+REQUEST_DB_SECONDS = registry.histogram(
+    "http_request_db_seconds", "Database time spent per HTTP request", ("method", "route")
+)
+REQUEST_QUERIES = registry.counter(
+    "http_request_db_queries_total", "Queries issued while serving HTTP requests", ("method", "route")
+)
+DB_QUERIES = registry.counter("db_queries_total", "Queries executed", ("engine",))
+DB_QUERY_SECONDS = registry.histogram("db_query_duration_seconds", "Query execution time", ("engine",))
+DB_ERRORS = registry.counter("db_query_errors_total", "Queries that raised", ("engine",))
+DB_POOL_CHECKED_OUT = registry.gauge(
+    "db_pool_checked_out", "Connections currently checked out of the pool", ("engine",), collect=_pool_checked_out
+)
+
+
+def instrument_engine(bind: Engine, name: str):
+    """Count queries and database time on a sync engine (or an async engine's ``sync_engine``)"""
+    _engines[name] = bind
+
+    @event.listens_for(bind, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(bind, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        DB_QUERIES.inc(name)
+        DB_QUERY_SECONDS.observe(elapsed, name)
+        stats = request_db_stats.get()
+        if stats is not None:
+            stats[0] += 1
+            stats[1] += elapsed
+
+    @event.listens_for(bind, "handle_error")
+    def _error(exception_context):
+        connection = exception_context.connection
+        started = connection.info.get("query_started") if connection is not None else None
+        if started:
+            started.pop()
+        DB_ERRORS.inc(name)
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware, so streaming bodies are timed to the last chunk"""
+
+    def __init__(self, app):
+        self.app = app
+        self._templates: Optional[Dict] = None
+
+    def _route(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        if self._templates is None:
+            # Routes are fixed once the app serves traffic
+            self._templates = {
+                route.endpoint: route.path for route in scope["app"].routes if hasattr(route, "endpoint")
+            }
+        return self._templates.get(endpoint, "unmatched")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status: List[int] = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        stats = [0, 0.0]
+        token = request_db_stats.set(stats)
+        IN_PROGRESS.inc(method)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            IN_PROGRESS.dec(method)
+            request_db_stats.reset(token)
+            route = self._route(scope)
+            REQUESTS.inc(method, route, str(status[0]))
+            REQUEST_SECONDS.observe(elapsed, method, route)
+            REQUEST_DB_SECONDS.observe(stats[1], method, route)
+            if stats[0]:
+                REQUEST_QUERIES.inc(method, route, amount=stats[0])
+
+
+@router.get("/metrics", include_in_schema=False)
+def metrics():
+    """
+    Prometheus scrape endpoint
+    """
+    return Response(content=registry.render(), media_type=CONTENT_TYPE)
@@ -0,0 +1,47 @@
+"""
+Opaque keyset cursors for the list endpoints.
+
+Cursors are URL-safe base64 JSON of the last row's sort key. List
+endpoints accept ``cursor`` alongside the legacy ``skip``/``limit`` and
+report the cursor for the following page in the ``X-Next-Cursor``
+response header, so existing clients keep receiving a plain JSON array.
+"""
+import base64
+import json
+from typing import Any, Dict, Optional, Sequence
+from fastapi import HTTPException, Response
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(key: Dict[str, Any]) -> str:
+    raw = json.dumps(key, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(key, dict):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return key
+
+
+def decode_id_cursor(cursor: str) -> int:
+    """Decode a cursor for endpoints paged by primary key alone"""
+    try:
+        return int(decode_cursor(cursor)["id"])
+    except (KeyError, TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def set_next_cursor(response: Response, rows: Sequence[Any], limit: int, key_for) -> Optional[str]:
+    """Attach the cursor for the page after ``rows``, if the page was full"""
+    if not rows or len(rows) < limit:
+        return None
+    next_cursor = encode_cursor(key_for(rows[-1]))
+    response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return next_cursor
@@ -0,0 +1,104 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from typing import List
+from app.db.database import get_async_db
+from app.db.writer import run_write
+from app.models.category import Category
+from app.models.recurring import RecurringRule
+from app.schemas.recurring import RecurringRule as RecurringRuleSchema, RecurringRuleCreate
+from app.api.auth import get_current_user
+from app.services import recurring
+from app.services.recurring import recurring_scheduler
+
+router = APIRouter()
+
+def _check_category(db: Session, category_id: int, user_id: int):
+    if category_id is None:
+        return
+    owned = db.execute(select(Category.id).where(
+        Category.id == category_id,
+        Category.user_id == user_id
+    )).scalar_one_or_none()
+    
+    if owned is None:
+        raise HTTPException(status_code=400, detail="Category not found")
+
+def _owned(db: Session, rule_id: int, user_id: int) -> RecurringRule:
+    rule = db.execute(select(RecurringRule).where(
+        RecurringRule.id == rule_id,
+        RecurringRule.user_id == user_id
+    )).scalar_one_or_none()
+    
+    if rule is None:
+        raise HTTPException(status_code=404, detail="Recurring rule not found")
+    
+    return rule
+
+def _add_rule(db: Session, rule: RecurringRuleCreate, user_id: int) -> RecurringRule:
+    _check_category(db, rule.category_id, user_id)
+    db_rule = RecurringRule(**rule.dict(), user_id=user_id)
+    recurring.plan(db_rule)
+    db.add(db_rule)
+    db.flush()
+    return db_rule
+
+def _update_owned(db: Session, rule_id: int, user_id: int, rule_data: RecurringRuleCreate) -> RecurringRule:
+    rule = _owned(db, rule_id, user_id)
+    _check_category(db, rule_data.category_id, user_id)
+    for key, value in rule_data.dict().items():
+        setattr(rule, key, value)
+    recurring.plan(rule)
+    return rule
+
+def _delete_owned(db: Session, rule_id: int, user_id: int):
+    """Stops the schedule; transactions already posted are kept"""
+    db.delete(_owned(db, rule_id, user_id))
+
+@router.post("/", response_model=RecurringRuleSchema)
+async def create_recurring_rule(
+    rule: RecurringRuleCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_user)
+):
+    """
+    Create a rule; occurrences already due, back to ``start_date``, are posted
+    by the scheduler straight away
+    """
+    db_rule = await run_write(db, _add_rule, rule, current_user.id)
+    recurring_scheduler.schedule(db_rule.id, db_rule.next_date)
+    return db_rule
+
+@router.get("/", response_model=List[RecurringRuleSchema])
+async def get_recurring_rules(db: AsyncSession = Depends(get_async_db), current_user = Depends(get_current_user)):
+    return (await db.execute(
+        select(RecurringRule)
+        .where(RecurringRule.user_id == current_user.id)
+        .order_by(RecurringRule.id)
+    )).scalars().all()
+
+@router.get("/{rule_id}", response_model=RecurringRuleSchema)
+async def get_recurring_rule(rule_id: int, db: AsyncSession = Depends(get_async_db), current_user = Depends(get_current_user)):
+    return await db.run_sync(_owned, rule_id, current_user.id)
+
+@router.put("/{rule_id}", response_model=RecurringRuleSchema)
+async def update_recurring_rule(
+    rule_id: int,
+    rule_data: RecurringRuleCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_user)
+):
+    """
+    Replace a rule's terms; they apply from the next occurrence not yet posted
+    """
+    db_rule = await run_write(db, _update_owned, rule_id, current_user.id, rule_data)
+    recurring_scheduler.schedule(db_rule.id, db_rule.next_date)
+    return db_rule
+
+@router.delete("/{rule_id}")
+async def delete_recurring_rule(rule_id: int, db: AsyncSession = Depends(get_async_db), current_user = Depends(get_current_user)):
+    await run_write(db, _delete_owned, rule_id, current_user.id)
+    recurring_scheduler.schedule(rule_id, None)
+    
+    return {"message": "Recurring rule deleted successfully"}
@@ -0,0 +1,99 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from typing import List
+from app.db.database import get_async_db
+from app.db.writer import run_write
+from app.models.category import Category
+from app.models.rule import CategoryRule
+from app.schemas.rule import CategoryRule as CategoryRuleSchema, CategoryRuleCreate, RecategorizeResult
+from app.api.auth import get_current_user
+from app.services import categorizer
+
+router = APIRouter()
+
+def _check_category(db: Session, category_id: int, user_id: int):
+    owned = db.execute(select(Category.id).where(
+        Category.id == category_id,
+        Category.user_id == user_id
+    )).scalar_one_or_none()
+    
+    if owned is None:
+        raise HTTPException(status_code=400, detail="Category not found")
+
+def _owned(db: Session, rule_id: int, user_id: int) -> CategoryRule:
+    rule = db.execute(select(CategoryRule).where(
+        CategoryRule.id == rule_id,
+        CategoryRule.user_id == user_id
+    )).scalar_one_or_none()
+    
+    if rule is None:
+        raise HTTPException(status_code=404, detail="Rule not found")
+    
+    return rule
+
+def _add_rule(db: Session, rule: CategoryRuleCreate, user_id: int) -> CategoryRule:
+    _check_category(db, rule.category_id, user_id)
+    db_rule = CategoryRule(**rule.dict(), user_id=user_id)
+    db.add(db_rule)
+    return db_rule
+
+def _update_owned(db: Session, rule_id: int, user_id: int, rule_data: CategoryRuleCreate) -> CategoryRule:
+    rule = _owned(db, rule_id, user_id)
+    _check_category(db, rule_data.category_id, user_id)
+    for key, value in rule_data.dict().items():
+        setattr(rule, key, value)
+    return rule
+
+def _delete_owned(db: Session, rule_id: int, user_id: int):
+    db.delete(_owned(db, rule_id, user_id))
+
+def _recategorize(db: Session, user_id: int, overwrite: bool) -> RecategorizeResult:
+    scanned, updated = categorizer.recategorize(db, user_id, overwrite)
+    return RecategorizeResult(scanned=scanned, updated=updated)
+
+@router.post("/", response_model=CategoryRuleSchema)
+async def create_rule(rule: CategoryRuleCreate, db: AsyncSession = Depends(get_async_db), current_user = Depends(get_current_user)):
+    return await run_write(db, _add_rule, rule, current_user.id)
+
+@router.get("/", response_model=List[CategoryRuleSchema])
+async def get_rules(db: AsyncSession = Depends(get_async_db), current_user = Depends(get_current_user)):
+    return (await db.execute(
+        select(CategoryRule)
+        .where(CategoryRule.user_id == current_user.id)
+        .order_by(CategoryRule.priority, CategoryRule.id)
+    )).scalars().all()
+
+@router.post("/recategorize", response_model=RecategorizeResult)
+async def recategorize_transactions(
+    overwrite: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_user)
+):
+    """
+    Apply the rules to existing transactions.
+
+    Only uncategorized transactions are touched unless ``overwrite`` is set;
+    rows are processed in chunks and rollups are recomputed once at the end.
+    """
+    return await run_write(db, _recategorize, current_user.id, overwrite)
+
+@router.get("/{rule_id}", response_model=CategoryRuleSchema)
+async def get_rule(rule_id: int, db: AsyncSession = Depends(get_async_db), current_user = Depends(get_current_user)):
+    return await db.run_sync(_owned, rule_id, current_user.id)
+
+@router.put("/{rule_id}", response_model=CategoryRuleSchema)
+async def update_rule(
+    rule_id: int,
+    rule_data: CategoryRuleCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_user)
+):
+    return await run_write(db, _update_owned, rule_id, current_user.id, rule_data)
+
+@router.delete("/{rule_id}")
+async def delete_rule(rule_id: int, db: AsyncSession = Depends(get_async_db), current_user = Depends(get_current_user)):
+    await run_write(db, _delete_owned, rule_id, current_user.id)
+    
+    return {"message": "Rule deleted successfully"}
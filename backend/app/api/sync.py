@@ -0,0 +1,40 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from app.db.database import get_async_db
+from app.schemas.sync import SyncResponse
+from app.api.auth import get_current_user
+from app.api.pagination import encode_cursor, decode_cursor
+from app.services import sync
+
+router = APIRouter()
+
+def _decode_token(token: str) -> int:
+    try:
+        seq = int(decode_cursor(token)["seq"])
+    except (HTTPException, KeyError, TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid sync token")
+    if seq < 0:
+        raise HTTPException(status_code=400, detail="Invalid sync token")
+    return seq
+
+@router.get("/sync", response_model=SyncResponse)
+async def sync_changes(
+    since: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_user)
+):
+    """
+    Transactions, categories and budgets changed since ``since``, and ids deleted.
+
+    Omit ``since`` for a full snapshot, then pass the returned ``token`` on
+    the next call to receive only what changed in between.
+    """
+    changes = await db.run_sync(sync.changes_since, current_user.id, _decode_token(since) if since else 0)
+    return SyncResponse(
+        token=encode_cursor({"seq": changes["seq"]}),
+        transactions=changes["transactions"],
+        categories=changes["categories"],
+        budgets=changes["budgets"],
+        deleted=changes["deleted"],
+    )
@@ -1,105 +1,318 @@
-from fastapi import APIRouter, Depends, HTTPException
+import io
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, UploadFile, File
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import date
-from app.db.database import get_db
+from app.db.database import get_db, get_async_db, SessionLocal
+from app.db.writer import run_write, run_write_sync
 from app.models.transaction import Transaction
-from app.schemas.transaction import Transaction as TransactionSchema, TransactionCreate
+from app.schemas.transaction import Transaction as TransactionSchema, TransactionCreate, DuplicateReport
+from app.schemas.importer import ImportResult
+from app.schemas.batch import BatchRequest, BatchResult
 from app.api.auth import get_current_user
+from app.services import rollups, importers, exporters, search, categorizer, duplicates
+from app.services.batch import apply_batch
+from app.api.pagination import decode_cursor, set_next_cursor
+from app.core.serialization import rows_response
+from app.api.conditional import conditional_list
 
 router = APIRouter()
 
-@router.post("/", response_model=TransactionSchema)
-def create_transaction(transaction: TransactionCreate, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
+# Listing rows are selected as tuples in the response schema's field order
+LIST_COLUMNS = tuple(TransactionSchema.__fields__)
+
+# Write helpers take a sync Session; async handlers reach them via run_write
+def _add_transaction(db: Session, transaction: TransactionCreate, user_id: int, dedupe: bool = False) -> Transaction:
+    day = transaction.date or date.today()
+    if dedupe:
+        duplicate_of = duplicates.find_duplicate(db, user_id, duplicates.fingerprint(
+            user_id, day, transaction.amount, transaction.type, transaction.description, transaction.currency
+        ))
+        if duplicate_of is not None:
+            raise HTTPException(
+                status_code=409, detail={"message": "Duplicate transaction", "duplicate_of": duplicate_of}
+            )
+    category_id = transaction.category_id
+    if category_id is None:
+        category_id = categorizer.matcher_for(db, user_id).match(
+            transaction.description, transaction.amount, transaction.type
+        )
     db_transaction = Transaction(
         amount=transaction.amount,
         description=transaction.description,
-        date=transaction.date or date.today(),
+        date=day,
         type=transaction.type,
-        category_id=transaction.category_id,
+        category_id=category_id,
         currency=transaction.currency or "INR",
-        user_id=current_user.id
+        user_id=user_id
     )
     
     db.add(db_transaction)
-    db.commit()
-    db.refresh(db_transaction)
-    
+    rollups.add_transaction(db, db_transaction)
     return db_transaction
 
-@router.get("/", response_model=List[TransactionSchema])
-def get_transactions(
-    skip: int = 0, 
-    limit: int = 100, 
+def _update_transaction(db: Session, transaction: Transaction, transaction_data: TransactionCreate):
+    # Move the amount out of the old rollup bucket and into the new one
+    rollups.remove_transaction(db, transaction)
+    for key, value in transaction_data.dict().items():
+        setattr(transaction, key, value)
+    # Keep every row on the (date, id) keyset, as create does
+    transaction.date = transaction.date or date.today()
+    rollups.add_transaction(db, transaction)
+
+def _delete_transaction(db: Session, transaction: Transaction):
+    rollups.remove_transaction(db, transaction)
+    db.delete(transaction)
+
+def _owned(db: Session, transaction_id: int, user_id: int) -> Transaction:
+    transaction = db.execute(select(Transaction).where(
+        Transaction.id == transaction_id,
+        Transaction.user_id == user_id
+    )).scalar_one_or_none()
+    
+    if transaction is None:
+        raise HTTPException(status_code=404, detail="Transaction not found")
+    
+    return transaction
+
+async def _get_owned(db: AsyncSession, transaction_id: int, user_id: int) -> Transaction:
+    return await db.run_sync(_owned, transaction_id, user_id)
+
+def _update_owned(db: Session, transaction_id: int, user_id: int, transaction_data: TransactionCreate) -> Transaction:
+    transaction = _owned(db, transaction_id, user_id)
+    _update_transaction(db, transaction, transaction_data)
+    return transaction
+
+def _delete_owned(db: Session, transaction_id: int, user_id: int):
+    _delete_transaction(db, _owned(db, transaction_id, user_id))
+
+@router.post("/", response_model=TransactionSchema)
+async def create_transaction(
+    transaction: TransactionCreate,
+    dedupe: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_user)
+):
+    """
+    With ``dedupe``, an exact duplicate of an existing transaction (same
+    date, amount, type and normalized description) is refused with 409
+    and the existing transaction's id.
+    """
+    return await run_write(db, _add_transaction, transaction, current_user.id, dedupe)
+
+@router.post("/batch", response_model=BatchResult)
+async def batch_transactions(
+    batch: BatchRequest[TransactionCreate],
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_user)
+):
+    """
+    Apply many create/update/delete operations in one database transaction
+    """
+    return await run_write(
+        db, apply_batch, Transaction, current_user.id, batch,
+        create=lambda session, data: _add_transaction(session, data, current_user.id),
+        update=_update_transaction,
+        delete=_delete_transaction,
+    )
+
+@router.post("/import", response_model=ImportResult)
+def import_transactions(
+    file: UploadFile = File(...),
+    format: Optional[str] = None,
+    dedupe: bool = False,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    """
+    Bulk import a CSV, OFX or QIF statement.
+
+    The upload is parsed as a stream and inserted in batches inside a single
+    database transaction; rows that fail validation are reported by number.
+    With ``dedupe``, exact duplicates of existing transactions or earlier
+    rows are skipped and counted. Parsing is CPU-bound, so this stays a
+    sync handler on the threadpool.
+    """
+    try:
+        fmt = importers.detect_format(file.filename, format)
+    except importers.ImportFormatError as error:
+        raise HTTPException(status_code=400, detail=str(error))
+
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", errors="replace", newline="")
+    try:
+        return run_write_sync(
+            db, importers.import_records, current_user.id, importers.PARSERS[fmt](stream), dedupe=dedupe
+        )
+    finally:
+        stream.detach()
+
+def build_listing_query(
+    user_id: int,
     category_id: Optional[int] = None,
     date_from: Optional[date] = None,
     date_to: Optional[date] = None,
     type: Optional[str] = None,
-    db: Session = Depends(get_db), 
-    current_user = Depends(get_current_user)
+    q: Optional[str] = None,
+    sort: str = "date",
 ):
-    query = db.query(Transaction).filter(Transaction.user_id == current_user.id)
+    """
+    Filtered, newest-first transaction select shared by the listing endpoints.
+
+    Shaped to be served by ix_transactions_user_date_id, or by
+    ix_transactions_user_category_date when filtering on a category.
+    ``q`` adds a full-text match on the description; ``sort="relevance"``
+    then puts the best matches first.
+    """
+    query = select(Transaction).where(Transaction.user_id == user_id)
     
     # Apply filters
     if category_id:
-        query = query.filter(Transaction.category_id == category_id)
+        query = query.where(Transaction.category_id == category_id)
     if date_from:
-        query = query.filter(Transaction.date >= date_from)
+        query = query.where(Transaction.date >= date_from)
     if date_to:
-        query = query.filter(Transaction.date <= date_to)
+        query = query.where(Transaction.date <= date_to)
     if type:
-        query = query.filter(Transaction.type == type)
+        query = query.where(Transaction.type == type)
     
-    transactions = query.order_by(Transaction.date.desc()).offset(skip).limit(limit).all()
-    return transactions
+    ordering = [Transaction.date.desc(), Transaction.id.desc()]
+    if q:
+        query, rank = search.apply_search(query, q, relevance=sort == "relevance")
+        if rank is not None:
+            ordering.insert(0, rank)
+    return query.order_by(*ordering)
+
+def _after_cursor(query, cursor: str):
+    key = decode_cursor(cursor)
+    try:
+        last_date = date.fromisoformat(key["date"])
+        last_id = int(key["id"])
+    except (KeyError, TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return query.where(or_(
+        Transaction.date < last_date,
+        and_(Transaction.date == last_date, Transaction.id < last_id),
+    ))
+
+def _cursor_key(transaction):
+    return {"date": transaction.date.isoformat(), "id": transaction.id}
+
+@router.get("/", response_model=List[TransactionSchema])
+async def get_transactions(
+    request: Request,
+    skip: int = 0, 
+    limit: int = 100, 
+    cursor: Optional[str] = None,
+    category_id: Optional[int] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    type: Optional[str] = None,
+    q: Optional[str] = Query(None, max_length=200),
+    sort: str = Query("date", regex="^(date|relevance)$"),
+    db: AsyncSession = Depends(get_async_db), 
+    current_user = Depends(get_current_user)
+):
+    """
+    List transactions newest first.
+
+    Pass the ``X-Next-Cursor`` header of a page back as ``cursor`` to fetch
+    the next one by keyset; ``skip`` is ignored in that mode. ``q`` searches
+    descriptions by word prefix; with ``sort=relevance`` pages by ``skip``
+    only. Rows are rendered straight from column tuples, bypassing
+    ``response_model``, and served with an ETag.
+    """
+    relevance = bool(q) and sort == "relevance"
+    if cursor and relevance:
+        raise HTTPException(status_code=400, detail="Cursor pagination is not available when sorting by relevance")
+
+    async def render():
+        query = build_listing_query(current_user.id, category_id, date_from, date_to, type, q, sort).with_only_columns(
+            *[getattr(Transaction, name) for name in LIST_COLUMNS]
+        )
+        if cursor:
+            query = _after_cursor(query, cursor)
+        else:
+            query = query.offset(skip)
+        rows = (await db.execute(query.limit(limit))).all()
+        response = rows_response(LIST_COLUMNS, rows)
+        if not relevance:
+            set_next_cursor(response, rows, limit, _cursor_key)
+        return response
+
+    return await conditional_list(request, db, current_user.id, render)
+
+@router.get("/export")
+def export_transactions(
+    format: str = Query("csv", regex="^(csv|ndjson|parquet)$"),
+    category_id: Optional[int] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    type: Optional[str] = None,
+    q: Optional[str] = Query(None, max_length=200),
+    current_user = Depends(get_current_user)
+):
+    """
+    Stream every matching transaction as CSV, NDJSON or Parquet.
+
+    Takes the same filters as the listing. Rows come from a server-side
+    cursor and are encoded chunk by chunk.
+    """
+    if format == "parquet" and not exporters.parquet_available():
+        raise HTTPException(status_code=400, detail="Parquet export requires the pyarrow package")
+
+    query = build_listing_query(current_user.id, category_id, date_from, date_to, type, q).with_only_columns(
+        *[getattr(Transaction, name) for name in exporters.EXPORT_COLUMNS]
+    )
+
+    def rows():
+        # The request's session is gone once streaming starts; use our own
+        db = SessionLocal()
+        try:
+            result = db.execute(query.execution_options(yield_per=exporters.CHUNK_SIZE))
+            for row in result:
+                yield tuple(row)
+        finally:
+            db.close()
+
+    return StreamingResponse(
+        exporters.EXPORTERS[format](rows()),
+        media_type=exporters.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="transactions.{format}"'},
+    )
+
+@router.get("/duplicates", response_model=DuplicateReport)
+async def get_duplicates(
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_user)
+):
+    """
+    Likely duplicate transactions: groups of exact duplicates, and pairs of
+    the same amount and type at most a day apart. Each list holds up to
+    ``limit`` entries.
+    """
+    return await db.run_sync(duplicates.duplicate_report, current_user.id, date_from, date_to, limit)
 
 @router.get("/{transaction_id}", response_model=TransactionSchema)
-def get_transaction(transaction_id: int, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
-    transaction = db.query(Transaction).filter(
-        Transaction.id == transaction_id,
-        Transaction.user_id == current_user.id
-    ).first()
-    
-    if transaction is None:
-        raise HTTPException(status_code=404, detail="Transaction not found")
-    
-    return transaction
+async def get_transaction(transaction_id: int, db: AsyncSession = Depends(get_async_db), current_user = Depends(get_current_user)):
+    return await _get_owned(db, transaction_id, current_user.id)
 
 @router.put("/{transaction_id}", response_model=TransactionSchema)
-def update_transaction(
+async def update_transaction(
     transaction_id: int, 
     transaction_data: TransactionCreate,
-    db: Session = Depends(get_db), 
+    db: AsyncSession = Depends(get_async_db), 
     current_user = Depends(get_current_user)
 ):
-    transaction = db.query(Transaction).filter(
-        Transaction.id == transaction_id,
-        Transaction.user_id == current_user.id
-    ).first()
-    
-    if transaction is None:
-        raise HTTPException(status_code=404, detail="Transaction not found")
-    
-    # Update transaction attributes
-    for key, value in transaction_data.dict().items():
-        setattr(transaction, key, value)
-    
-    db.commit()
-    db.refresh(transaction)
-    
-    return transaction
+    return await run_write(db, _update_owned, transaction_id, current_user.id, transaction_data)
 
 @router.delete("/{transaction_id}")
-def delete_transaction(transaction_id: int, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
-    transaction = db.query(Transaction).filter(
-        Transaction.id == transaction_id,
-        Transaction.user_id == current_user.id
-    ).first()
-    
-    if transaction is None:
-        raise HTTPException(status_code=404, detail="Transaction not found")
-    
-    db.delete(transaction)
-    db.commit()
+async def delete_transaction(transaction_id: int, db: AsyncSession = Depends(get_async_db), current_user = Depends(get_current_user)):
+    await run_write(db, _delete_owned, transaction_id, current_user.id)
     
     return {"message": "Transaction deleted successfully"}
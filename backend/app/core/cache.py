@@ -0,0 +1,113 @@
+"""
+Small in-process caches shared by the API.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+# session.info key for cache entries to drop once the transaction ends
+_PENDING_INVALIDATIONS = "pending_cache_invalidations"
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries also expire after ``ttl`` seconds.
+
+    Hit, miss, eviction and invalidation counts are kept for observability.
+    A ``ttl`` of ``None`` disables expiry.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None, name: str = "cache"):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any):
+        if self.maxsize <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            if self._data.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def invalidate_where(self, predicate):
+        """Drop every entry whose key matches ``predicate``"""
+        with self._lock:
+            stale = [key for key in self._data if predicate(key)]
+            for key in stale:
+                del self._data[key]
+            self.invalidations += len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "name": self.name,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+def invalidate_on_commit(session: Optional[Session], cache: TTLCache, *keys: Hashable):
+    """
+    Drop ``keys`` from ``cache`` now and again when ``session``'s
+    transaction commits or rolls back.
+
+    Meant for flush-time mapper hooks: a read between the flush and the
+    commit (or after a rollback) would otherwise re-cache the old or
+    never-committed state for a full TTL.
+    """
+    for key in keys:
+        cache.invalidate(key)
+    if session is not None:
+        session.info.setdefault(_PENDING_INVALIDATIONS, set()).update((cache, key) for key in keys)
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _invalidate_pending(session: Session):
+    for cache, key in session.info.pop(_PENDING_INVALIDATIONS, ()):
+        cache.invalidate(key)
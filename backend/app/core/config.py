@@ -0,0 +1,25 @@
+"""
+Settings read from the environment at import time.
+"""
+import os
+
+# Get database URL from environment variable or use default
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./finance_tracker.db")
+
+# Connection pool settings; ignored for in-memory SQLite, which needs a single connection
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # seconds, -1 to disable
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+DB_CONNECT_TIMEOUT = int(os.getenv("DB_CONNECT_TIMEOUT", "10"))
+DB_APPLICATION_NAME = os.getenv("DB_APPLICATION_NAME", "finance-tracker")
+
+# Opt-in SQLite tuning: WAL, relaxed fsync, a read-only request pool and a
+# single group-committing writer. Ignored for other backends and in-memory SQLite.
+SQLITE_PERFORMANCE_MODE = os.getenv("SQLITE_PERFORMANCE_MODE", "false").lower() in ("1", "true", "yes")
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", "-65536"))  # negative means KiB
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_GROUP_COMMIT_MAX = int(os.getenv("SQLITE_GROUP_COMMIT_MAX", "128"))
+SQLITE_GROUP_COMMIT_WINDOW_MS = float(os.getenv("SQLITE_GROUP_COMMIT_WINDOW_MS", "0"))
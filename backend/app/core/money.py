@@ -0,0 +1,93 @@
+"""
+Exact money amounts.
+
+Amounts are stored as 64-bit integers of minor units (hundredths of the
+currency unit), so ``SUM`` runs as native integer arithmetic in the
+database and totals never drift the way summed floats do. In Python they
+are ``Decimal`` values with two places; the API still accepts and emits
+plain JSON numbers (or decimal strings on input).
+"""
+from decimal import Decimal, InvalidOperation, ROUND_HALF_EVEN
+from typing import Any, Optional, Union
+from sqlalchemy import BigInteger
+from sqlalchemy.types import TypeDecorator
+
+SCALE = 2
+MINOR_PER_UNIT = 10 ** SCALE
+_QUANTUM = Decimal(1).scaleb(-SCALE)
+
+# Largest amount whose minor units fit a signed 64-bit integer
+MAX_AMOUNT = Decimal(2 ** 63 - 1).scaleb(-SCALE)
+
+# ISO 4217 style code, as accepted for currencies and reporting currencies
+CURRENCY_CODE = "^[A-Z]{3}$"
+
+
+def to_decimal(value: Union[Decimal, float, int, str]) -> Decimal:
+    """Exact decimal for ``value``; floats go through their shortest repr, so 0.1 stays 0.1"""
+    if isinstance(value, Decimal):
+        return value
+    if isinstance(value, float):
+        value = repr(value)
+    return Decimal(value)
+
+
+def to_minor(value: Union[Decimal, float, int, str]) -> int:
+    """Minor units for an amount, rounding half to even past the second place"""
+    return int(to_decimal(value).scaleb(SCALE).to_integral_value(ROUND_HALF_EVEN))
+
+
+def from_minor(minor: Union[int, Decimal]) -> Decimal:
+    """Amount for a count of minor units (``SUM`` may hand back a Decimal)"""
+    return Decimal(minor).scaleb(-SCALE)
+
+
+class Money(TypeDecorator):
+    """Column type: ``Decimal`` amounts in Python, BIGINT minor units in SQL"""
+
+    impl = BigInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect) -> Optional[int]:
+        return None if value is None else to_minor(value)
+
+    def process_result_value(self, value, dialect) -> Optional[Decimal]:
+        return None if value is None else from_minor(value)
+
+    @staticmethod
+    def legacy_sql(column: str) -> str:
+        """SQL converting a legacy floating-point amount column to minor units"""
+        return f"CAST(ROUND({column} * {MINOR_PER_UNIT}) AS BIGINT)"
+
+
+class Amount(Decimal):
+    """
+    Pydantic field type for money.
+
+    Accepts numbers or decimal strings with at most two decimal places and
+    validates to a ``Decimal``, which FastAPI encodes as a JSON number.
+    """
+
+    @classmethod
+    def __get_validators__(cls):
+        yield cls.validate
+
+    @classmethod
+    def __modify_schema__(cls, field_schema):
+        field_schema.update(type="number", multipleOf=float(_QUANTUM))
+
+    @classmethod
+    def validate(cls, value: Any) -> Decimal:
+        if isinstance(value, bool) or not isinstance(value, (Decimal, float, int, str)):
+            raise TypeError("amount must be a number or a decimal string")
+        try:
+            amount = to_decimal(value.strip() if isinstance(value, str) else value)
+        except InvalidOperation:
+            raise ValueError("amount must be a number or a decimal string")
+        if not amount.is_finite():
+            raise ValueError("amount must be finite")
+        if abs(amount) > MAX_AMOUNT:
+            raise ValueError("amount is out of range")
+        if amount != amount.quantize(_QUANTUM, ROUND_HALF_EVEN):
+            raise ValueError(f"amount must have at most {SCALE} decimal places")
+        return amount.quantize(_QUANTUM)
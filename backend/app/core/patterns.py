@@ -0,0 +1,59 @@
+"""
+Vetting user-supplied regular expressions.
+
+Python's ``re`` backtracks, so a pattern like ``^(a+)+$`` takes time
+exponential in the input's length, and ``.*.*.*x`` polynomial of high
+degree. Patterns are checked on their parsed form and refused when a
+variable-length repeat sits inside another repeat, an alternation is
+repeated, a backreference is used, or there are more than
+``MAX_VARIABLE_REPEATS`` variable-length repeats. Together with a cap on
+the text matched (``MAX_MATCH_LENGTH``) this bounds matching time.
+"""
+try:
+    from re import _parser as sre_parse  # Python 3.11+
+except ImportError:  # pragma: no cover
+    import sre_parse
+
+MAX_VARIABLE_REPEATS = 2
+MAX_MATCH_LENGTH = 256
+
+_REPEATS = {"MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT"}
+_BACKREFERENCES = {"GROUPREF", "GROUPREF_EXISTS", "GROUPREF_IGNORE", "GROUPREF_LOC_IGNORE", "GROUPREF_UNI_IGNORE"}
+
+
+class UnsafePattern(ValueError):
+    pass
+
+
+def _check(items, repeated: bool) -> int:
+    """Variable-length repeats in ``items``; raises UnsafePattern"""
+    variable = 0
+    for op, value in items:
+        name = str(op)
+        if name in _REPEATS:
+            low, high, body = value
+            if low != high:
+                if repeated:
+                    raise UnsafePattern("nested quantifiers are not allowed")
+                variable += 1
+            variable += _check(body, repeated or high > 1)
+        elif name == "BRANCH":
+            if repeated:
+                raise UnsafePattern("repeated alternations are not allowed")
+            for branch in value[1]:
+                variable += _check(branch, repeated)
+        elif name == "SUBPATTERN":
+            variable += _check(value[-1], repeated)
+        elif name in ("ASSERT", "ASSERT_NOT"):
+            variable += _check(value[1], repeated)
+        elif name == "ATOMIC_GROUP":
+            variable += _check(value, repeated)
+        elif name in _BACKREFERENCES:
+            raise UnsafePattern("backreferences are not allowed")
+    return variable
+
+
+def check_pattern(pattern: str):
+    """Raise ``UnsafePattern`` (a ValueError) unless ``pattern`` matches in bounded time"""
+    if _check(sre_parse.parse(pattern), False) > MAX_VARIABLE_REPEATS:
+        raise UnsafePattern(f"at most {MAX_VARIABLE_REPEATS} variable-length repeats are allowed")
@@ -0,0 +1,48 @@
+"""
+Fast JSON rendering for large list responses.
+
+Returning pre-rendered bytes lets FastAPI skip ``response_model``
+validation, which otherwise builds a Pydantic model per ORM row and then
+re-encodes it with the stdlib ``json`` module. Rows are plain column
+tuples, so the caller decides the JSON keys and their order. ``orjson``
+is used when installed; the stdlib fallback produces the same output.
+"""
+import datetime
+import decimal
+import json
+from typing import Any, Iterable, Sequence
+from fastapi import Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised only without orjson
+    orjson = None
+
+
+def _default(value: Any):
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        # Money: exact two-place decimals, whose float repr is the same text
+        return float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(value: Any) -> bytes:
+    """Compact UTF-8 JSON, matching FastAPI's own JSONResponse output"""
+    if orjson is not None:
+        return orjson.dumps(value, default=_default)
+    return json.dumps(value, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def dumps_rows(columns: Sequence[str], rows: Iterable[Sequence]) -> bytes:
+    """Encode column tuples as a JSON array of objects keyed by ``columns``"""
+    return dumps([dict(zip(columns, row)) for row in rows])
+
+
+def json_response(value: Any) -> Response:
+    return Response(content=dumps(value), media_type="application/json")
+
+
+def rows_response(columns: Sequence[str], rows: Iterable[Sequence]) -> Response:
+    return Response(content=dumps_rows(columns, rows), media_type="application/json")
@@ -1,15 +1,121 @@
-from sqlalchemy import create_engine
+from typing import List
+from sqlalchemy import create_engine, event, inspect
+from sqlalchemy.engine import make_url, URL
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-import os
-# Get database URL from environment variable or use default
-SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./finance_tracker.db")
+from sqlalchemy.pool import AsyncAdaptedQueuePool, StaticPool
+from sqlalchemy.schema import CreateIndex
+from app.core import config
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+SQLALCHEMY_DATABASE_URL = config.DATABASE_URL
+
+# The URL's backend picks a driver pair: sync for scripts, startup and
+# streaming exports, async for the request handlers. Either flavour of
+# URL may be configured, e.g. sqlite:// or sqlite+aiosqlite://.
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+# Values per IN list for lookups over many keys: SQLite's default limit on
+# bound parameters is 999 before 3.32, and the rest of the query needs some
+PARAMETER_CHUNK = 500
+
+def _backend(url: URL) -> str:
+    backend = url.get_backend_name()
+    return "postgresql" if backend == "postgres" else backend
+
+def sync_url(url: str) -> URL:
+    parsed = make_url(url)
+    backend = _backend(parsed)
+    if parsed.drivername in (ASYNC_DRIVERS.get(backend), "postgres"):
+        # Fall back to the backend's default sync driver
+        return parsed.set(drivername=backend)
+    return parsed
+
+def async_url(url: str) -> URL:
+    parsed = make_url(url)
+    backend = _backend(parsed)
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for database backend '{backend}'")
+    return parsed.set(drivername=ASYNC_DRIVERS[backend])
+
+def _is_memory_sqlite(url: URL) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+def _engine_options(url: URL) -> dict:
+    """Backend-aware connect args and pool settings"""
+    if url.get_backend_name() == "sqlite":
+        connect_args = {"timeout": config.DB_CONNECT_TIMEOUT}
+        if url.get_driver_name() != "aiosqlite":
+            # Sessions are handed between threadpool workers
+            connect_args["check_same_thread"] = False
+        if _is_memory_sqlite(url):
+            # Every connection would otherwise get its own empty database
+            return {"connect_args": connect_args, "poolclass": StaticPool}
+    elif url.get_driver_name() == "asyncpg":
+        connect_args = {
+            "timeout": config.DB_CONNECT_TIMEOUT,
+            "server_settings": {"application_name": config.DB_APPLICATION_NAME},
+        }
+    else:
+        connect_args = {
+            "connect_timeout": config.DB_CONNECT_TIMEOUT,
+            "application_name": config.DB_APPLICATION_NAME,
+        }
+
+    options = {
+        "connect_args": connect_args,
+        "pool_size": config.DB_POOL_SIZE,
+        "max_overflow": config.DB_MAX_OVERFLOW,
+        "pool_timeout": config.DB_POOL_TIMEOUT,
+        "pool_recycle": config.DB_POOL_RECYCLE,
+        "pool_pre_ping": config.DB_POOL_PRE_PING,
+    }
+    if url.get_driver_name() == "aiosqlite":
+        # The dialect defaults to NullPool, reconnecting on every checkout
+        options["poolclass"] = AsyncAdaptedQueuePool
+    return options
+
+def sqlite_performance_mode(url: str = SQLALCHEMY_DATABASE_URL) -> bool:
+    parsed = make_url(url)
+    return config.SQLITE_PERFORMANCE_MODE and parsed.get_backend_name() == "sqlite" and not _is_memory_sqlite(parsed)
+
+def apply_sqlite_pragmas(bind, query_only: bool = False):
+    """Tune every new connection of a (sync) SQLite engine"""
+    @event.listens_for(bind, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        # WAL lets readers proceed while the writer commits
+        cursor.execute("PRAGMA journal_mode=WAL")
+        # Durable at checkpoints rather than on every commit; safe with WAL
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA mmap_size={int(config.SQLITE_MMAP_SIZE)}")
+        cursor.execute(f"PRAGMA cache_size={int(config.SQLITE_CACHE_SIZE)}")
+        cursor.execute(f"PRAGMA busy_timeout={int(config.SQLITE_BUSY_TIMEOUT_MS)}")
+        if query_only:
+            cursor.execute("PRAGMA query_only=ON")
+        cursor.close()
+
+def create_db_engine(url: str = SQLALCHEMY_DATABASE_URL, **overrides):
+    """Sync engine for ``url``, configured from app.core.config"""
+    url = sync_url(url)
+    return create_engine(url, **{**_engine_options(url), **overrides})
+
+def create_async_db_engine(url: str = SQLALCHEMY_DATABASE_URL, **overrides):
+    """Async engine for ``url``, configured from app.core.config"""
+    url = async_url(url)
+    return create_async_engine(url, **{**_engine_options(url), **overrides})
+
+engine = create_db_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = create_async_db_engine()
+if sqlite_performance_mode():
+    apply_sqlite_pragmas(engine)
+    # Request sessions only read; writes go through app.db.writer
+    apply_sqlite_pragmas(async_engine.sync_engine, query_only=True)
+# Objects stay readable after commit; response models read them outside the session
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 def get_db():
@@ -19,5 +125,89 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def pool_stats(bind) -> dict:
+    """Connection pool counters for the health router"""
+    pool = bind.pool
+    stats = {"pool": type(pool).__name__, "status": pool.status()}
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        counter = getattr(pool, name, None)
+        if callable(counter):
+            stats[name] = counter()
+    return stats
+
+def ensure_indexes(bind=engine):
+    """
+    Create indexes declared on models that an existing database is missing.
+
+    Indexes with ``info={"deferred": True}`` need their data fixed up first
+    and are left to the service that owns the table.
+    """
+    # IF NOT EXISTS rather than checkfirst: reflection skips expression indexes
+    with bind.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                if not index.info.get("deferred"):
+                    connection.execute(CreateIndex(index, if_not_exists=True))
+
+def ensure_columns(bind=engine):
+    """Add nullable columns declared on models that an existing database is missing"""
+    inspector = inspect(bind)
+    existing = set(inspector.get_table_names())
+    quote = bind.dialect.identifier_preparer.quote
+    with bind.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing:
+                continue
+            present = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                # NOT NULL columns need a real migration with a backfill
+                if column.name in present or not column.nullable:
+                    continue
+                connection.exec_driver_sql(
+                    f"ALTER TABLE {quote(table.name)} ADD COLUMN {quote(column.name)} "
+                    f"{column.type.compile(dialect=bind.dialect)}"
+                )
+
+def migrate_replaced_columns(bind=engine) -> List[str]:
+    """
+    Move data out of legacy columns that a model column replaces.
+
+    A column declared with ``info={"replaces": "old_name"}`` is added if
+    missing, backfilled from the old column through its type's
+    ``legacy_sql``, and the old column is dropped. Returns "table.column"
+    for each column migrated; a no-op once nothing legacy is left.
+    """
+    inspector = inspect(bind)
+    existing = set(inspector.get_table_names())
+    quote = bind.dialect.identifier_preparer.quote
+    migrated = []
+    with bind.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing:
+                continue
+            present = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                legacy = column.info.get("replaces")
+                if legacy is None or legacy not in present:
+                    continue
+                name, new = quote(table.name), quote(column.name)
+                if column.name not in present:
+                    connection.exec_driver_sql(
+                        f"ALTER TABLE {name} ADD COLUMN {new} {column.type.compile(dialect=bind.dialect)}"
+                    )
+                connection.exec_driver_sql(
+                    f"UPDATE {name} SET {new} = {column.type.legacy_sql(quote(legacy))} WHERE {new} IS NULL"
+                )
+                connection.exec_driver_sql(f"ALTER TABLE {name} DROP COLUMN {quote(legacy)}")
+                migrated.append(f"{table.name}.{column.name}")
+    return migrated
+
 def create_db_and_tables():
     Base.metadata.create_all(bind=engine)
+    migrate_replaced_columns()
+    ensure_columns()
+    ensure_indexes()
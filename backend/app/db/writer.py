@@ -0,0 +1,181 @@
+"""
+Serialized, group-committing writer for SQLite performance mode.
+
+SQLite allows one writer at a time; concurrent request sessions racing
+for the lock end in "database is locked". In performance mode every
+write is instead queued to one thread that owns the only read-write
+connection. The thread drains whatever is queued, runs each unit of work
+in its own SAVEPOINT (so one failure does not undo its neighbours) and
+commits the whole group with a single fsync.
+
+Handlers call ``run_write``/``run_write_sync`` with a function taking a
+sync Session. Outside performance mode those run on the request's own
+session and commit immediately, so handler code is the same either way.
+"""
+import asyncio
+import contextvars
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, sessionmaker
+from app.core import config
+from app.db.database import SQLALCHEMY_DATABASE_URL, create_db_engine, apply_sqlite_pragmas, sqlite_performance_mode
+
+_Job = Tuple[Future, contextvars.Context, Callable, tuple, dict]
+_STOP = object()
+
+
+class WriteQueue:
+    def __init__(self, bind, max_batch: int = 128, window_seconds: float = 0.0):
+        self.bind = bind
+        self._session_factory = sessionmaker(bind=bind, autoflush=False, expire_on_commit=False)
+        self.max_batch = max_batch
+        self.window_seconds = window_seconds
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.jobs = 0
+        self.commits = 0
+        self.failed_jobs = 0
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="sqlite-writer", daemon=True)
+                self._thread.start()
+
+    def submit(self, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        """Queue ``fn(session, *args, **kwargs)``; the future resolves after commit"""
+        self._ensure_started()
+        future: Future = Future()
+        # Run in the caller's context so per-request instrumentation sees the job
+        self._queue.put((future, contextvars.copy_context(), fn, args, kwargs))
+        return future
+
+    def _collect(self, first: _Job) -> Tuple[List[_Job], bool]:
+        batch = [first]
+        deadline = time.monotonic() + self.window_seconds
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.monotonic()
+            try:
+                job = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is _STOP:
+                return batch, True
+            batch.append(job)
+        return batch, False
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is _STOP:
+                break
+            batch, stopping = self._collect(first)
+            self._commit_group(batch)
+
+    def _commit_group(self, batch: List[_Job]):
+        outcomes = []
+        session: Session = self._session_factory()
+        try:
+            for future, context, fn, args, kwargs in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                savepoint = session.begin_nested()
+                try:
+                    result = context.run(self._run_job, savepoint, session, fn, args, kwargs)
+                    outcomes.append((future, result, None))
+                except BaseException as error:
+                    savepoint.rollback()
+                    outcomes.append((future, None, error))
+            session.commit()
+        except BaseException as error:
+            session.rollback()
+            outcomes = [(future, None, outcome_error or error) for future, _, outcome_error in outcomes]
+        finally:
+            session.close()
+
+        self.commits += 1
+        for future, result, error in outcomes:
+            self.jobs += 1
+            if error is not None:
+                self.failed_jobs += 1
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    @staticmethod
+    def _run_job(savepoint, session: Session, fn: Callable, args: tuple, kwargs: dict) -> Any:
+        result = fn(session, *args, **kwargs)
+        # Flushes the job's writes, so they count towards its request too
+        savepoint.commit()
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "jobs": self.jobs,
+            "commits": self.commits,
+            "jobs_per_commit": (self.jobs / self.commits) if self.commits else 0.0,
+            "failed_jobs": self.failed_jobs,
+        }
+
+    def shutdown(self):
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None and thread.is_alive():
+            self._queue.put(_STOP)
+            thread.join()
+
+
+def create_writer_engine(url: str = SQLALCHEMY_DATABASE_URL):
+    """Single-connection engine whose transactions take the write lock up front"""
+    writer_engine = create_db_engine(url, pool_size=1, max_overflow=0)
+    apply_sqlite_pragmas(writer_engine)
+
+    # pysqlite's implicit BEGIN breaks SAVEPOINT; issue our own
+    @event.listens_for(writer_engine, "connect")
+    def _disable_implicit_begin(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(writer_engine, "begin")
+    def _begin_immediate(connection):
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+    return writer_engine
+
+
+write_queue: Optional[WriteQueue] = None
+if sqlite_performance_mode():
+    write_queue = WriteQueue(
+        create_writer_engine(),
+        max_batch=config.SQLITE_GROUP_COMMIT_MAX,
+        window_seconds=config.SQLITE_GROUP_COMMIT_WINDOW_MS / 1000,
+    )
+
+
+async def run_write(db: AsyncSession, fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run ``fn(session, ...)`` as one committed unit of work"""
+    if write_queue is not None:
+        return await asyncio.wrap_future(write_queue.submit(fn, *args, **kwargs))
+    result = await db.run_sync(fn, *args, **kwargs)
+    await db.commit()
+    return result
+
+
+def run_write_sync(db: Session, fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Blocking ``run_write`` for sync handlers on the threadpool"""
+    if write_queue is not None:
+        return write_queue.submit(fn, *args, **kwargs).result()
+    try:
+        result = fn(db, *args, **kwargs)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return result
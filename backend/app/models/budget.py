@@ -1,19 +1,25 @@
-from sqlalchemy import Column, Integer, Float, String, Date, ForeignKey
+from sqlalchemy import Column, Index, Integer, String, Date, ForeignKey
 from sqlalchemy.orm import relationship
 from app.db.database import Base
+from app.core.money import Money
 from datetime import date
 
 class Budget(Base):
     __tablename__ = "budgets"
 
     id = Column(Integer, primary_key=True, index=True)
-    amount = Column(Float)
+    amount = Column("amount_minor", Money, info={"replaces": "amount"})
     name = Column(String)
     period = Column(String)  # monthly, weekly, yearly
     start_date = Column(Date, default=date.today)
     end_date = Column(Date)
-    user_id = Column(Integer, ForeignKey("users.id"))
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
     category_id = Column(Integer, ForeignKey("categories.id"))
+    change_seq = Column(Integer)  # owner's change sequence at last write, for delta sync
 
     user = relationship("User")
     category = relationship("Category")
+
+    __table_args__ = (
+        Index("ix_budgets_user_change_seq", "user_id", "change_seq"),
+    )
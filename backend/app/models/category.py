@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Index, Integer, String, ForeignKey
 from sqlalchemy.orm import relationship
 from app.db.database import Base
 
@@ -8,6 +8,11 @@ class Category(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True)
     color = Column(String, default="#6c5ce7")
-    user_id = Column(Integer, ForeignKey("users.id"))
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    change_seq = Column(Integer)  # owner's change sequence at last write, for delta sync
 
     user = relationship("User")
+
+    __table_args__ = (
+        Index("ix_categories_user_change_seq", "user_id", "change_seq"),
+    )
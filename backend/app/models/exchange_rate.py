@@ -0,0 +1,35 @@
+from sqlalchemy import Column, Integer, Float, String, Date, UniqueConstraint
+from app.db.database import Base
+
+class ExchangeRate(Base):
+    """Units of ``quote`` per one ``base``, effective from ``day`` until the pair's next rate"""
+    __tablename__ = "exchange_rates"
+
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, nullable=False)
+    base = Column(String, nullable=False)
+    quote = Column(String, nullable=False)
+    rate = Column(Float, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("base", "quote", "day", name="uq_exchange_rates_pair_day"),
+    )
+
+class ReportingRate(Base):
+    """
+    Every convertible pair, including inverse and cross rates, at each date
+    its rate changes. Derived from ``exchange_rates`` on import; report
+    queries look rates up here as of each rollup day.
+    """
+    __tablename__ = "reporting_rates"
+
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, nullable=False)
+    base = Column(String, nullable=False)
+    quote = Column(String, nullable=False)
+    rate = Column(Float, nullable=False)
+
+    __table_args__ = (
+        # As-of lookup: WHERE base = ? AND quote = ? AND day <= ? ORDER BY day DESC LIMIT 1
+        UniqueConstraint("base", "quote", "day", name="uq_reporting_rates_pair_day"),
+    )
@@ -0,0 +1,30 @@
+from sqlalchemy import Column, DateTime, Float, Index, Integer, String, Text, ForeignKey
+from app.db.database import Base
+from datetime import datetime
+
+class Job(Base):
+    """A background job; this table is the queue (see app.services.jobs)"""
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    kind = Column(String, nullable=False)  # report, export, recategorize, import
+    params = Column(Text)  # JSON
+    status = Column(String, nullable=False, default="queued")  # queued, running, succeeded, failed
+    progress = Column(Float, nullable=False, default=0.0)  # 0 to 1
+    message = Column(String)
+    error = Column(Text)
+    result_path = Column(String)
+    result_media_type = Column(String)
+    attempts = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+    heartbeat_at = Column(DateTime)  # refreshed by the app worker running the job
+
+    __table_args__ = (
+        # Claiming: WHERE status = 'queued' ORDER BY id
+        Index("ix_jobs_status_id", "status", "id"),
+        # Per-user listing and limits
+        Index("ix_jobs_user_status", "user_id", "status"),
+    )
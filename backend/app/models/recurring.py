@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Index, Integer, String, Date, ForeignKey
+from sqlalchemy.orm import relationship
+from app.db.database import Base
+from app.core.money import Money
+
+class RecurringRule(Base):
+    """A transaction template posted on an RRULE-style schedule (see app.services.recurring)"""
+    __tablename__ = "recurring_rules"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=False)
+    category_id = Column(Integer, ForeignKey("categories.id"))
+    amount = Column("amount_minor", Money, nullable=False)
+    description = Column(String)
+    type = Column(String, nullable=False)  # income, expense
+    currency = Column(String, default="INR")
+    frequency = Column(String, nullable=False)  # daily, weekly, monthly, yearly
+    interval = Column(Integer, nullable=False, default=1)
+    start_date = Column(Date, nullable=False)
+    until = Column(Date)  # no occurrence after this day
+    count = Column(Integer)  # total occurrences
+    occurrences = Column(Integer, nullable=False, default=0)  # occurrences handled so far
+    last_date = Column(Date)  # latest occurrence handled
+    next_date = Column(Date)  # next occurrence to post; NULL once the rule has ended
+
+    category = relationship("Category")
+
+    __table_args__ = (
+        # Scheduler (re)loads and due-rule scans
+        Index("ix_recurring_rules_next_date", "next_date"),
+    )
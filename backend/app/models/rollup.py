@@ -0,0 +1,38 @@
+from sqlalchemy import Column, Integer, String, Date, ForeignKey, Index, UniqueConstraint, func, literal_column
+from app.db.database import Base
+from app.core.money import Money
+
+class DailyRollup(Base):
+    """Per-user daily transaction totals, maintained by the transaction write paths"""
+    __tablename__ = "daily_rollups"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    category_id = Column(Integer, ForeignKey("categories.id"))
+    day = Column(Date, nullable=False)
+    type = Column(String, nullable=False)  # income, expense
+    currency = Column(String)
+    total = Column("total_minor", Money, nullable=False, default=0, info={"replaces": "total"})
+    count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        # Doubles as the lookup index for (user_id, category_id, day) range scans
+        UniqueConstraint("user_id", "category_id", "day", "type", "currency", name="uq_daily_rollups_key"),
+        # Date-range scans across all categories (time-series charts)
+        Index("ix_daily_rollups_user_day", "user_id", "day"),
+    )
+
+_columns = DailyRollup.__table__.c
+# The constraint above treats NULLs as distinct, so two uncategorized (or
+# currency-less) buckets for one day slip past it; this key folds them
+# together and is the conflict target for bucket upserts
+BUCKET_KEY = (
+    _columns.user_id,
+    func.coalesce(_columns.category_id, literal_column("0")),
+    _columns.day,
+    _columns.type,
+    func.coalesce(_columns.currency, literal_column("''")),
+)
+# Deferred: older databases may hold duplicate buckets, so ensure_rollups
+# rebuilds them before creating the index
+bucket_index = Index("uq_daily_rollups_bucket", *BUCKET_KEY, unique=True, info={"deferred": True})
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, String, ForeignKey
+from app.db.database import Base
+from app.core.money import Money
+
+class CategoryRule(Base):
+    """Assigns a category to transactions whose description and amount match"""
+    __tablename__ = "category_rules"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=False)
+    category_id = Column(Integer, ForeignKey("categories.id"), nullable=False)
+    keyword = Column(String)  # case-insensitive substring
+    pattern = Column(String)  # case-insensitive regular expression
+    min_amount = Column("min_amount_minor", Money, info={"replaces": "min_amount"})
+    max_amount = Column("max_amount_minor", Money, info={"replaces": "max_amount"})
+    type = Column(String)  # income, expense, or any when empty
+    priority = Column(Integer, nullable=False, default=100)  # lower wins
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, Index
+from app.db.database import Base
+
+class SyncTombstone(Base):
+    """Records a hard delete so delta-sync clients can drop their copy"""
+    __tablename__ = "sync_tombstones"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    entity = Column(String, nullable=False)  # transactions, categories, budgets
+    entity_id = Column(Integer, nullable=False)
+    change_seq = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index("ix_sync_tombstones_user_change_seq", "user_id", "change_seq"),
+    )
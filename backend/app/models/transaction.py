@@ -1,19 +1,36 @@
-from sqlalchemy import Column, Integer, Float, String, Date, ForeignKey
+from sqlalchemy import Column, Integer, String, Date, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.db.database import Base
+from app.core.money import Money
 from datetime import date
 
 class Transaction(Base):
     __tablename__ = "transactions"
 
     id = Column(Integer, primary_key=True, index=True)
-    amount = Column(Float)
+    amount = Column("amount_minor", Money, info={"replaces": "amount"})  # minor units; see app.core.money
     description = Column(String)
     date = Column(Date, default=date.today)
     type = Column(String)  # income, expense
     user_id = Column(Integer, ForeignKey("users.id"))
     category_id = Column(Integer, ForeignKey("categories.id"))
     currency = Column(String, default="INR")
+    change_seq = Column(Integer)  # owner's change sequence at last write, for delta sync
+    idempotency_key = Column(String)  # set by automated writers so a retry cannot post twice
+    fingerprint = Column(String)  # hash of the normalized row; see app.services.duplicates
 
     user = relationship("User")
     category = relationship("Category")
+
+    __table_args__ = (
+        # Listing: WHERE user_id = ? [AND date range] ORDER BY date DESC, id DESC.
+        # Scanned backwards, so no separate DESC index is needed.
+        Index("ix_transactions_user_date_id", "user_id", "date", "id"),
+        # Listing filtered by category, and per-category aggregates
+        Index("ix_transactions_user_category_date", "user_id", "category_id", "date"),
+        Index("ix_transactions_user_change_seq", "user_id", "change_seq"),
+        Index("ix_transactions_idempotency_key", "idempotency_key", unique=True),
+        # Duplicate detection: exact matches by fingerprint, near matches bucketed by amount and currency
+        Index("ix_transactions_user_fingerprint", "user_id", "fingerprint"),
+        Index("ix_transactions_user_amount_currency_date", "user_id", "amount_minor", "currency", "date"),
+    )
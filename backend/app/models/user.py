@@ -8,3 +8,5 @@ class User(Base):
     email = Column(String, unique=True, index=True)
     hashed_password = Column(String)
     is_active = Column(Boolean, default=True)
+    change_seq = Column(Integer)  # last sequence number handed out to this user's writes
+    reporting_currency = Column(String)  # dashboards convert into this; unset means the default
@@ -0,0 +1,45 @@
+from pydantic import BaseModel
+from typing import List, Optional, Union
+from datetime import date
+from app.core.money import Amount
+
+class CategoryTotal(BaseModel):
+    id: int
+    name: str
+    color: str
+    amount: Amount
+    percentage: float
+
+class DashboardSummary(BaseModel):
+    total_income: Amount
+    total_expenses: Amount
+    net_balance: Amount
+    transaction_count: int
+    top_categories: List[CategoryTotal]
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+    currency: Optional[str] = None
+    reporting_currency: str
+    missing_rates: List[str] = []  # currencies left out for want of an exchange rate
+
+class TimeSeriesPoint(BaseModel):
+    period_start: date
+    total: Amount
+    count: int
+
+class TimeSeries(BaseModel):
+    key: Optional[Union[int, str]] = None  # category id, or transaction type
+    label: str
+    currency: Optional[str] = None
+    points: List[TimeSeriesPoint]
+
+class TimeSeriesResponse(BaseModel):
+    granularity: str
+    group_by: str
+    series: List[TimeSeries]
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+    currency: Optional[str] = None
+    type: Optional[str] = None
+    reporting_currency: str
+    missing_rates: List[str] = []
@@ -0,0 +1,46 @@
+from pydantic import BaseModel, root_validator, validator
+from pydantic.generics import GenericModel
+from typing import Generic, List, Literal, Optional, TypeVar
+
+DataT = TypeVar("DataT")
+
+# Upper bound on operations per request; a batch is one transaction
+MAX_BATCH_OPERATIONS = 1000
+
+class BatchOperation(GenericModel, Generic[DataT]):
+    op: Literal["create", "update", "delete"]
+    id: Optional[int] = None
+    data: Optional[DataT] = None
+
+    @root_validator(skip_on_failure=True)
+    def check_fields(cls, values):
+        op = values.get("op")
+        if op in ("update", "delete") and values.get("id") is None:
+            raise ValueError(f"'{op}' operations require an id")
+        if op in ("create", "update") and values.get("data") is None:
+            raise ValueError(f"'{op}' operations require data")
+        return values
+
+class BatchRequest(GenericModel, Generic[DataT]):
+    operations: List[BatchOperation[DataT]]
+    atomic: bool = False  # roll everything back if any operation fails
+
+    # A validator rather than conlist/max_items, which pydantic drops on a
+    # parametrized generic model; pre, so items past the cap are never parsed
+    @validator("operations", pre=True)
+    def check_size(cls, operations):
+        if isinstance(operations, list) and len(operations) > MAX_BATCH_OPERATIONS:
+            raise ValueError(f"at most {MAX_BATCH_OPERATIONS} operations per batch")
+        return operations
+
+class BatchItemResult(BaseModel):
+    index: int
+    op: str
+    id: Optional[int] = None
+    status: str  # ok, error, rolled_back
+    error: Optional[str] = None
+
+class BatchResult(BaseModel):
+    applied: int
+    failed: int
+    results: List[BatchItemResult]
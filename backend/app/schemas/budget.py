@@ -1,14 +1,15 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from datetime import date
+from app.core.money import Amount
 
 class BudgetBase(BaseModel):
-    amount: float
+    amount: Amount
     name: str
     period: str  # monthly, weekly, yearly
     start_date: Optional[date] = None
     end_date: Optional[date] = None
-    category_id: int
+    category_id: Optional[int] = None  # None: an overall budget across every category
 
 class BudgetCreate(BudgetBase):
     pass
@@ -19,3 +20,12 @@ class Budget(BudgetBase):
 
     class Config:
         orm_mode = True
+
+class BudgetProgress(Budget):
+    spent: Amount
+    remaining: Amount
+    percentage: float
+    currency: str  # of spent and remaining: the owner's reporting currency
+    missing_rates: List[str] = []  # currencies left out of spent for want of an exchange rate
+    window_start: date
+    window_end: date
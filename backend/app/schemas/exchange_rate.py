@@ -0,0 +1,8 @@
+from pydantic import BaseModel
+from datetime import date
+
+class ExchangeRateLookup(BaseModel):
+    base: str
+    quote: str
+    on: date
+    rate: float
@@ -0,0 +1,12 @@
+from pydantic import BaseModel
+from typing import List
+
+class ImportRowError(BaseModel):
+    row: int
+    error: str
+
+class ImportResult(BaseModel):
+    imported: int
+    failed: int
+    duplicates: int = 0  # skipped as exact duplicates, with dedupe on
+    errors: List[ImportRowError]
@@ -0,0 +1,47 @@
+from pydantic import BaseModel, Field
+from typing import Any, Dict, Optional
+from datetime import date, datetime
+from app.core.money import CURRENCY_CODE
+
+class ReportJobParams(BaseModel):
+    """Same options as GET /api/analytics/timeseries"""
+    granularity: str = Field("month", regex="^(day|week|month)$")
+    group_by: str = Field("category", regex="^(category|type)$")
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+    currency: Optional[str] = None
+    reporting_currency: Optional[str] = Field(None, regex=CURRENCY_CODE)
+    type: Optional[str] = None
+
+class ExportJobParams(BaseModel):
+    """Same options as GET /api/transactions/export"""
+    format: str = Field("csv", regex="^(csv|ndjson|parquet)$")
+    category_id: Optional[int] = None
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+    type: Optional[str] = None
+    q: Optional[str] = Field(None, max_length=200)
+
+class RecategorizeJobParams(BaseModel):
+    overwrite: bool = False
+
+class ImportJobParams(BaseModel):
+    format: str
+    upload: str  # path of the stored upload, removed once imported
+    dedupe: bool = False
+
+class JobCreate(BaseModel):
+    kind: str  # report, export or recategorize; imports go through POST /api/jobs/import
+    params: Dict[str, Any] = {}
+
+class Job(BaseModel):
+    id: int
+    kind: str
+    status: str
+    progress: float
+    message: Optional[str] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    result_url: Optional[str] = None  # set once the job has succeeded
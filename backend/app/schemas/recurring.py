@@ -0,0 +1,49 @@
+from pydantic import BaseModel, Field, root_validator, validator
+from typing import Optional
+from datetime import date
+from app.core.money import Amount
+from app.services.recurring import FREQUENCIES
+
+class RecurringRuleBase(BaseModel):
+    amount: Amount
+    description: Optional[str] = None
+    type: str  # income or expense
+    category_id: Optional[int] = None
+    currency: Optional[str] = "INR"
+    frequency: str  # daily, weekly, monthly, yearly
+    interval: int = Field(1, ge=1, le=1000)
+    start_date: date
+    until: Optional[date] = None
+    count: Optional[int] = Field(None, ge=1)
+
+    @validator("type")
+    def known_type(cls, value):
+        if value not in ("income", "expense"):
+            raise ValueError("must be 'income' or 'expense'")
+        return value
+
+    @validator("frequency")
+    def known_frequency(cls, value):
+        if value not in FREQUENCIES:
+            raise ValueError(f"must be one of: {', '.join(FREQUENCIES)}")
+        return value
+
+    @root_validator(skip_on_failure=True)
+    def ends_after_start(cls, values):
+        until = values.get("until")
+        if until is not None and until < values["start_date"]:
+            raise ValueError("until must not be before start_date")
+        return values
+
+class RecurringRuleCreate(RecurringRuleBase):
+    pass
+
+class RecurringRule(RecurringRuleBase):
+    id: int
+    user_id: int
+    occurrences: int
+    last_date: Optional[date] = None
+    next_date: Optional[date] = None
+
+    class Config:
+        orm_mode = True
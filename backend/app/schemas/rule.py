@@ -0,0 +1,55 @@
+from pydantic import BaseModel, Field, root_validator, validator
+from typing import Optional
+import re
+from app.core.money import Amount
+from app.core.patterns import check_pattern
+
+class CategoryRuleBase(BaseModel):
+    category_id: int
+    keyword: Optional[str] = Field(None, min_length=1, max_length=200)
+    pattern: Optional[str] = Field(None, min_length=1, max_length=200)
+    min_amount: Optional[Amount] = None
+    max_amount: Optional[Amount] = None
+    type: Optional[str] = None
+    priority: int = 100
+
+    @validator("pattern")
+    def pattern_compiles(cls, value):
+        if value is None:
+            return value
+        try:
+            re.compile(value)
+        except re.error as error:
+            raise ValueError(f"invalid regular expression: {error}")
+        # Patterns run on every write; refuse ones that can backtrack catastrophically
+        check_pattern(value)
+        return value
+
+    @validator("type")
+    def known_type(cls, value):
+        if value not in (None, "income", "expense"):
+            raise ValueError("must be 'income' or 'expense'")
+        return value
+
+    @root_validator(skip_on_failure=True)
+    def one_text_condition(cls, values):
+        if values.get("keyword") and values.get("pattern"):
+            raise ValueError("set either keyword or pattern, not both")
+        low, high = values.get("min_amount"), values.get("max_amount")
+        if low is not None and high is not None and low > high:
+            raise ValueError("min_amount must not exceed max_amount")
+        return values
+
+class CategoryRuleCreate(CategoryRuleBase):
+    pass
+
+class CategoryRule(CategoryRuleBase):
+    id: int
+    user_id: int
+
+    class Config:
+        orm_mode = True
+
+class RecategorizeResult(BaseModel):
+    scanned: int
+    updated: int
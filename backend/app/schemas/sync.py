@@ -0,0 +1,17 @@
+from pydantic import BaseModel
+from typing import List
+from app.schemas.transaction import Transaction
+from app.schemas.category import Category
+from app.schemas.budget import Budget
+
+class SyncDeleted(BaseModel):
+    transactions: List[int] = []
+    categories: List[int] = []
+    budgets: List[int] = []
+
+class SyncResponse(BaseModel):
+    token: str  # pass back as ``since`` on the next sync
+    transactions: List[Transaction]
+    categories: List[Category]
+    budgets: List[Budget]
+    deleted: SyncDeleted
@@ -1,9 +1,10 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 import datetime
+from app.core.money import Amount
 
 class TransactionBase(BaseModel):
-    amount: float
+    amount: Amount
     description: Optional[str] = None
     date: Optional[datetime.date] = None
     type: str  # income or expense
@@ -19,3 +20,16 @@ class Transaction(TransactionBase):
 
     class Config:
         orm_mode = True
+
+
+class DuplicateGroup(BaseModel):
+    fingerprint: str
+    transactions: List[Transaction]
+
+class NearDuplicate(BaseModel):
+    days_apart: int
+    transactions: List[Transaction]
+
+class DuplicateReport(BaseModel):
+    exact: List[DuplicateGroup]  # same day, amount, currency, type and normalized description
+    near: List[NearDuplicate]  # same amount, currency and type, a day apart or different descriptions
@@ -1,5 +1,6 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 from typing import Optional
+from app.core.money import CURRENCY_CODE
 
 class UserBase(BaseModel):
     email: EmailStr
@@ -7,9 +8,14 @@ class UserBase(BaseModel):
 class UserCreate(UserBase):
     password: str
 
+class UserUpdate(BaseModel):
+    # Dashboards, reports and budgets convert into this; null restores the default
+    reporting_currency: Optional[str] = Field(None, regex=CURRENCY_CODE)
+
 class User(UserBase):
     id: int
     is_active: bool
+    reporting_currency: Optional[str] = None
 
     class Config:
         orm_mode = True
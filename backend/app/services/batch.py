@@ -0,0 +1,78 @@
+"""
+Shared engine for the ``/batch`` write endpoints.
+
+A batch is applied in one database transaction. Every update and delete
+target is resolved up front with ``id IN (...) AND user_id = ?`` queries
+of ``PARAMETER_CHUNK`` ids each, so ownership is checked once per batch
+instead of once per item.
+"""
+from typing import Callable, Dict, List
+from sqlalchemy.orm import Session
+from app.db.database import PARAMETER_CHUNK
+from app.schemas.batch import BatchRequest, BatchItemResult, BatchResult
+
+
+def apply_batch(
+    db: Session,
+    model,
+    user_id: int,
+    request: BatchRequest,
+    create: Callable,
+    update: Callable,
+    delete: Callable,
+) -> BatchResult:
+    """
+    Apply create/update/delete operations as one unit of work.
+
+    ``create(db, data)`` adds a new instance to the session and returns it;
+    ``update(db, obj, data)`` and ``delete(db, obj)`` mutate the session.
+    Takes a sync Session, so async handlers call it through ``run_write``,
+    which commits. Missing or foreign ids are reported per item as "not
+    found"; they are found before anything is touched, so an atomic batch
+    with a failure leaves the session clean rather than rolling it back.
+    """
+    target_ids = sorted({operation.id for operation in request.operations if operation.op != "create"})
+    owned: Dict[int, object] = {}
+    for offset in range(0, len(target_ids), PARAMETER_CHUNK):
+        owned.update(
+            (row.id, row)
+            for row in db.query(model).filter(
+                model.id.in_(target_ids[offset:offset + PARAMETER_CHUNK]), model.user_id == user_id
+            )
+        )
+
+    results: List[BatchItemResult] = []
+    deleted = set()
+    for index, operation in enumerate(request.operations):
+        result = BatchItemResult(index=index, op=operation.op, id=operation.id, status="ok")
+        results.append(result)
+        # Later operations in the same batch must not see a deleted row
+        if operation.op != "create" and (operation.id not in owned or operation.id in deleted):
+            result.status = "error"
+            result.error = f"{model.__name__} not found"
+        elif operation.op == "delete":
+            deleted.add(operation.id)
+
+    failed = sum(1 for result in results if result.status == "error")
+    if request.atomic and failed:
+        for result in results:
+            if result.status == "ok":
+                result.status = "rolled_back"
+        return BatchResult(applied=0, failed=failed, results=results)
+
+    created = []
+    for operation, result in zip(request.operations, results):
+        if result.status == "error":
+            continue
+        if operation.op == "create":
+            created.append((result, create(db, operation.data)))
+        elif operation.op == "update":
+            update(db, owned[operation.id], operation.data)
+        else:
+            delete(db, owned[operation.id])
+
+    db.flush()
+    for result, obj in created:
+        result.id = obj.id
+
+    return BatchResult(applied=len(results) - failed, failed=failed, results=results)
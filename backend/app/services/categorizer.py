@@ -0,0 +1,196 @@
+"""
+Rule-based auto-categorization.
+
+A user's rules are compiled once into a ``RuleMatcher`` and cached until
+the rules change. All keyword rules share one regex built from a trie of
+the keywords, so a description is scanned once no matter how many rules
+there are; regex rules are only tried while they could still beat the best
+keyword match, and only on the first ``MAX_MATCH_LENGTH`` characters (see
+``app.core.patterns``). The lowest (priority, id) rule whose conditions all
+hold wins.
+"""
+import os
+import re
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session, object_session
+from app.core.cache import TTLCache, invalidate_on_commit
+from app.core.patterns import MAX_MATCH_LENGTH, check_pattern
+from app.db.database import PARAMETER_CHUNK
+from app.models.category import Category
+from app.models.rule import CategoryRule
+from app.models.transaction import Transaction
+from app.services import rollups, sync
+
+RULE_CACHE_SIZE = int(os.getenv("RULE_CACHE_SIZE", "1024"))
+RULE_CACHE_TTL_SECONDS = float(os.getenv("RULE_CACHE_TTL_SECONDS", "300"))
+
+# Compiled matchers keyed by user id
+matcher_cache = TTLCache(maxsize=RULE_CACHE_SIZE, ttl=RULE_CACHE_TTL_SECONDS, name="category_rules")
+
+
+@event.listens_for(CategoryRule, "after_insert")
+@event.listens_for(CategoryRule, "after_update")
+@event.listens_for(CategoryRule, "after_delete")
+def _on_rule_changed(mapper, connection, target):
+    invalidate_on_commit(object_session(target), matcher_cache, target.user_id)
+
+@event.listens_for(Category, "after_delete")
+def _on_category_deleted(mapper, connection, target):
+    # Rules pointing at it stop applying
+    invalidate_on_commit(object_session(target), matcher_cache, target.user_id)
+
+
+class _Rule:
+    __slots__ = ("order", "category_id", "min_amount", "max_amount", "type")
+
+    def __init__(self, rule: CategoryRule):
+        self.order = (rule.priority if rule.priority is not None else 100, rule.id)
+        self.category_id = rule.category_id
+        self.min_amount = rule.min_amount
+        self.max_amount = rule.max_amount
+        self.type = rule.type
+
+    def accepts(self, amount: Optional[Decimal], type: Optional[str]) -> bool:
+        if self.type and type != self.type:
+            return False
+        if self.min_amount is not None and (amount is None or amount < self.min_amount):
+            return False
+        if self.max_amount is not None and (amount is None or amount > self.max_amount):
+            return False
+        return True
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """Alternation of ``words`` factored by common prefix, longest match first"""
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+class RuleMatcher:
+    def __init__(self, rules: Iterable[CategoryRule]):
+        self._by_keyword: Dict[str, List[_Rule]] = {}
+        self._patterns: List[Tuple[re.Pattern, _Rule]] = []
+        self._unconditional: List[_Rule] = []
+        for rule in rules:
+            compiled = _Rule(rule)
+            if rule.keyword:
+                self._by_keyword.setdefault(rule.keyword.lower(), []).append(compiled)
+            elif rule.pattern:
+                try:
+                    check_pattern(rule.pattern)
+                except ValueError:
+                    # Saved before patterns were vetted; never run it
+                    continue
+                self._patterns.append((re.compile(rule.pattern, re.IGNORECASE), compiled))
+            else:
+                self._unconditional.append(compiled)
+        self._patterns.sort(key=lambda item: item[1].order)
+
+        self._keywords = None
+        # The regex returns the longest keyword at each position; shorter
+        # keywords that prefix it matched there too
+        self._prefixes: Dict[str, List[str]] = {}
+        if self._by_keyword:
+            keywords = list(self._by_keyword)
+            # Zero-width, so overlapping keywords are all found
+            self._keywords = re.compile(f"(?=({_trie_pattern(keywords)}))", re.IGNORECASE)
+            for keyword in keywords:
+                self._prefixes[keyword] = [
+                    other for other in keywords if keyword.startswith(other)
+                ]
+
+    def __bool__(self):
+        return bool(self._by_keyword or self._patterns or self._unconditional)
+
+    def match(self, description: Optional[str], amount: Optional[Decimal], type: Optional[str]) -> Optional[int]:
+        """Category id of the winning rule, or None"""
+        candidates = list(self._unconditional)
+        if description and self._keywords is not None:
+            found = set()
+            for match in self._keywords.finditer(description):
+                found.update(self._prefixes.get(match.group(1).lower(), ()))
+            for keyword in found:
+                candidates.extend(self._by_keyword[keyword])
+
+        best = min((rule for rule in candidates if rule.accepts(amount, type)), key=lambda rule: rule.order, default=None)
+        if description and self._patterns:
+            text = description[:MAX_MATCH_LENGTH]
+            for pattern, rule in self._patterns:
+                if best is not None and rule.order > best.order:
+                    break
+                if rule.accepts(amount, type) and pattern.search(text):
+                    best = rule
+                    break
+        return best.category_id if best is not None else None
+
+
+def matcher_for(db: Session, user_id: int) -> RuleMatcher:
+    matcher = matcher_cache.get(user_id)
+    if matcher is None:
+        matcher = RuleMatcher(db.execute(
+            select(CategoryRule)
+            .join(Category, Category.id == CategoryRule.category_id)
+            .where(CategoryRule.user_id == user_id)
+        ).scalars())
+        matcher_cache.set(user_id, matcher)
+    return matcher
+
+
+def recategorize(db: Session, user_id: int, overwrite: bool = False, chunk_size: int = PARAMETER_CHUNK) -> Tuple[int, int]:
+    """
+    Apply the user's rules to existing transactions, ``chunk_size`` at a time.
+
+    Only uncategorized rows are considered unless ``overwrite`` is set.
+    Rows no rule matches keep their category. Returns (scanned, updated);
+    the caller commits.
+    """
+    matcher = matcher_for(db, user_id)
+    if not matcher:
+        return 0, 0
+
+    # Ids alone come straight off an index; row data is then read per chunk
+    candidates = select(Transaction.id).where(Transaction.user_id == user_id)
+    if not overwrite:
+        candidates = candidates.where(Transaction.category_id.is_(None))
+    ids = db.execute(candidates).scalars().all()
+
+    updated = 0
+    seq = sync.next_seq(db, user_id) if ids else None
+    for offset in range(0, len(ids), chunk_size):
+        rows = db.execute(select(
+            Transaction.id, Transaction.description, Transaction.amount, Transaction.type, Transaction.category_id
+        ).where(Transaction.id.in_(ids[offset:offset + chunk_size]))).all()
+        changes: Dict[int, List[int]] = {}
+        for row in rows:
+            category_id = matcher.match(row.description, row.amount, row.type)
+            if category_id is not None and category_id != row.category_id:
+                changes.setdefault(category_id, []).append(row.id)
+        # One UPDATE per category per chunk rather than one per row
+        for category_id, changed_ids in changes.items():
+            db.execute(
+                update(Transaction)
+                .where(Transaction.id.in_(changed_ids))
+                .values(category_id=category_id, change_seq=seq)
+                .execution_options(synchronize_session=False)
+            )
+            updated += len(changed_ids)
+
+    if updated:
+        # Categories moved between rollup buckets; recompute this user's
+        rollups.rebuild_rollups(db, user_id)
+    return len(ids), updated
@@ -0,0 +1,215 @@
+"""
+Duplicate transaction detection.
+
+Every transaction stores a ``fingerprint``: a hash of its owner, date,
+amount in minor units, currency (INR when unset), type and normalized
+description (lowercased, with punctuation folded into single spaces).
+Exact duplicates share a fingerprint, so checking a row is one probe of
+ix_transactions_user_fingerprint and deduplicating an import stays
+linear in its size.
+
+Near-duplicates (same amount, currency and type, dates at most
+``NEAR_DAYS`` apart, e.g. one purchase on two overlapping statements)
+come from a single pass over ix_transactions_user_amount_currency_date:
+rows arrive bucketed by amount and currency and ordered by date, so each
+row is only compared with the rows of its own bucket inside the date
+window.
+
+ORM writes are fingerprinted by a flush hook; core bulk inserts call
+``stamp`` themselves (see the importer and recurring scheduler).
+"""
+import hashlib
+import re
+from collections import deque
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import bindparam, event, func, select, update
+from sqlalchemy.orm import Session
+from app.core.money import to_minor
+from app.db.database import PARAMETER_CHUNK
+from app.services.exchange_rates import DEFAULT_TRANSACTION_CURRENCY
+from app.models.transaction import Transaction
+from app.schemas.transaction import DuplicateGroup, DuplicateReport, NearDuplicate, Transaction as TransactionSchema
+
+NEAR_DAYS = 1
+BACKFILL_CHUNK_SIZE = 1000
+
+_NON_WORD = re.compile(r"[\W_]+")
+
+_transactions = Transaction.__table__
+_SET_FINGERPRINT = (
+    update(_transactions)
+    .where(_transactions.c.id == bindparam("row_id"))
+    .values(fingerprint=bindparam("value"))
+)
+
+
+def normalize_description(description: Optional[str]) -> str:
+    return " ".join(_NON_WORD.sub(" ", (description or "").lower()).split())
+
+
+def fingerprint(
+    user_id: int,
+    day: date,
+    amount,
+    type: Optional[str],
+    description: Optional[str],
+    currency: Optional[str] = None,
+) -> str:
+    key = "|".join((
+        str(user_id),
+        day.isoformat() if day else "",
+        str(to_minor(amount)) if amount is not None else "",
+        currency or DEFAULT_TRANSACTION_CURRENCY,
+        type or "",
+        normalize_description(description),
+    ))
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=12).hexdigest()
+
+
+def stamp(rows: Iterable[dict]):
+    """Set ``fingerprint`` on transaction rows bound for a core INSERT"""
+    for row in rows:
+        row["fingerprint"] = fingerprint(
+            row["user_id"], row.get("date"), row.get("amount"), row.get("type"), row.get("description"),
+            row.get("currency"),
+        )
+
+
+@event.listens_for(Session, "before_flush")
+def _stamp_transactions(session: Session, flush_context, instances):
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, Transaction):
+            obj.fingerprint = fingerprint(
+                obj.user_id, obj.date, obj.amount, obj.type, obj.description, obj.currency
+            )
+
+
+def existing_fingerprints(db: Session, user_id: int, fingerprints: List[str]) -> Set[str]:
+    """The subset of ``fingerprints`` already on the user's transactions"""
+    existing: Set[str] = set()
+    for offset in range(0, len(fingerprints), PARAMETER_CHUNK):
+        existing.update(db.execute(
+            select(Transaction.fingerprint).where(
+                Transaction.user_id == user_id,
+                Transaction.fingerprint.in_(fingerprints[offset:offset + PARAMETER_CHUNK]),
+            )
+        ).scalars())
+    return existing
+
+
+def find_duplicate(db: Session, user_id: int, value: str) -> Optional[int]:
+    """Id of the user's oldest transaction with fingerprint ``value``, if any"""
+    return db.execute(
+        select(func.min(Transaction.id)).where(Transaction.user_id == user_id, Transaction.fingerprint == value)
+    ).scalar()
+
+
+def backfill_fingerprints(db: Session, chunk_size: int = BACKFILL_CHUNK_SIZE) -> int:
+    """Fingerprint rows written before the column existed; commits, returns the count"""
+    total = 0
+    last_id = 0
+    while True:
+        rows = db.execute(
+            select(Transaction.id, Transaction.user_id, Transaction.date, Transaction.amount,
+                   Transaction.type, Transaction.description, Transaction.currency)
+            .where(Transaction.fingerprint.is_(None), Transaction.id > last_id)
+            .order_by(Transaction.id)
+            .limit(chunk_size)
+        ).all()
+        if not rows:
+            break
+        db.execute(_SET_FINGERPRINT, [
+            {"row_id": row.id, "value": fingerprint(
+                row.user_id, row.date, row.amount, row.type, row.description, row.currency
+            )}
+            for row in rows
+        ])
+        last_id = rows[-1].id
+        total += len(rows)
+    if total:
+        db.commit()
+    return total
+
+
+def _in_range(query, date_from: Optional[date], date_to: Optional[date]):
+    if date_from:
+        query = query.where(Transaction.date >= date_from)
+    if date_to:
+        query = query.where(Transaction.date <= date_to)
+    return query
+
+
+def exact_groups(db: Session, user_id: int, date_from=None, date_to=None, limit: int = 100) -> Dict[str, List[int]]:
+    """Ids sharing a fingerprint, oldest first, for up to ``limit`` fingerprints"""
+    repeated = _in_range(
+        select(Transaction.fingerprint).where(Transaction.user_id == user_id), date_from, date_to
+    ).group_by(Transaction.fingerprint).having(func.count() > 1).limit(limit).subquery()
+    groups: Dict[str, List[int]] = {}
+    for transaction_id, value in db.execute(_in_range(
+        select(Transaction.id, Transaction.fingerprint).where(
+            Transaction.user_id == user_id, Transaction.fingerprint.in_(select(repeated.c.fingerprint))
+        ), date_from, date_to
+    ).order_by(Transaction.fingerprint, Transaction.id)):
+        groups.setdefault(value, []).append(transaction_id)
+    return groups
+
+
+def near_query(user_id: int, date_from=None, date_to=None):
+    """The user's rows bucketed by amount and currency, in date order within a bucket"""
+    return _in_range(
+        select(Transaction.id, Transaction.amount, Transaction.currency, Transaction.type, Transaction.date,
+               Transaction.fingerprint)
+        .where(Transaction.user_id == user_id), date_from, date_to
+    ).order_by(Transaction.amount, Transaction.currency, Transaction.date)
+
+
+def near_pairs(db: Session, user_id: int, date_from=None, date_to=None, limit: int = 100) -> List[Tuple[int, int, int]]:
+    """
+    ``(first id, second id, days apart)`` for rows of the same amount,
+    currency and type within ``NEAR_DAYS`` of each other that are not
+    exact duplicates
+    """
+    pairs: List[Tuple[int, int, int]] = []
+    window: deque = deque()
+    for row in db.execute(near_query(user_id, date_from, date_to)):
+        # Legacy rows without a currency sort apart from explicit INR ones, so
+        # they form their own bucket; their fingerprints still treat them alike
+        if window and (window[-1].amount, window[-1].currency) != (row.amount, row.currency):
+            window.clear()
+        while window and (row.date - window[0].date).days > NEAR_DAYS:
+            window.popleft()
+        for other in window:
+            if other.type == row.type and other.fingerprint != row.fingerprint:
+                pairs.append((other.id, row.id, (row.date - other.date).days))
+                if len(pairs) >= limit:
+                    return pairs
+        window.append(row)
+    return pairs
+
+
+def duplicate_report(db: Session, user_id: int, date_from=None, date_to=None, limit: int = 100) -> DuplicateReport:
+    """Exact groups and near pairs, each capped at ``limit``, with their transactions"""
+    exact = exact_groups(db, user_id, date_from, date_to, limit)
+    near = near_pairs(db, user_id, date_from, date_to, limit)
+    ids = {transaction_id for group in exact.values() for transaction_id in group}
+    ids.update(transaction_id for first, second, _ in near for transaction_id in (first, second))
+
+    found: Dict[int, TransactionSchema] = {}
+    id_list = sorted(ids)
+    for offset in range(0, len(id_list), PARAMETER_CHUNK):
+        for transaction in db.execute(
+            select(Transaction).where(Transaction.id.in_(id_list[offset:offset + PARAMETER_CHUNK]))
+        ).scalars():
+            found[transaction.id] = TransactionSchema.from_orm(transaction)
+
+    return DuplicateReport(
+        exact=[
+            DuplicateGroup(fingerprint=value, transactions=[found[transaction_id] for transaction_id in group])
+            for value, group in exact.items()
+        ],
+        near=[
+            NearDuplicate(days_apart=days, transactions=[found[first], found[second]])
+            for first, second, days in near
+        ],
+    )
@@ -0,0 +1,321 @@
+"""
+Exchange rates and conversion into a reporting currency.
+
+Rates come from a local CSV file (``EXCHANGE_RATES_FILE``, loaded on
+startup and by setup_database); no live rate service is involved. They
+are shared by every user, so the API only reads them. A pair's rate
+applies from its date until the pair's next rate.
+
+``RateTable`` holds every rate in memory, per pair in date order, for
+as-of lookups, and derives inverse and cross rates (via one pivot
+currency). On import its view of every convertible pair is written to
+``reporting_rates``, so report queries convert inside SQL: each rollup
+row is joined to its currency's rate as of its day (``RollupConversion``)
+and the converted totals are summed in the same statement.
+"""
+import math
+import os
+import re
+import zlib
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import date
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from sqlalchemy import BigInteger, and_, case, cast, delete, func, insert, or_, select, type_coerce
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app.core.cache import TTLCache
+from app.core.money import CURRENCY_CODE, Money
+from app.models.exchange_rate import ExchangeRate, ReportingRate
+from app.models.rollup import DailyRollup
+from app.schemas.importer import ImportResult, ImportRowError
+
+RATE_CACHE_TTL_SECONDS = float(os.getenv("RATE_CACHE_TTL_SECONDS", "300"))
+DEFAULT_REPORTING_CURRENCY = os.getenv("DEFAULT_REPORTING_CURRENCY", "INR")
+# Transactions without a currency were recorded in the app's default one
+DEFAULT_TRANSACTION_CURRENCY = "INR"
+EXCHANGE_RATES_FILE = os.getenv("EXCHANGE_RATES_FILE")
+
+BATCH_SIZE = 500
+MAX_REPORTED_ERRORS = 1000
+_CURRENCY_CODE = re.compile(CURRENCY_CODE)
+
+# The single RateTable, rebuilt after imports and on expiry so other workers catch up
+rate_cache = TTLCache(maxsize=1, ttl=RATE_CACHE_TTL_SECONDS, name="exchange_rates")
+
+Pair = Tuple[str, str]
+
+
+class RateTable:
+    """Rates per currency pair in date order, with as-of lookups"""
+
+    def __init__(self, rows: Iterable[Tuple[date, str, str, float]]):
+        grouped: Dict[Pair, List[Tuple[date, float]]] = defaultdict(list)
+        for day, base, quote, rate in rows:
+            grouped[(base, quote)].append((day, rate))
+        self.version = zlib.crc32(repr(sorted(grouped.items())).encode())
+
+        self._series: Dict[Pair, Tuple[List[date], List[float]]] = {}
+        for pair, points in grouped.items():
+            points.sort()
+            self._series[pair] = ([day for day, _ in points], [rate for _, rate in points])
+        for (base, quote), (days, rates) in list(self._series.items()):
+            # A pair quoted in both directions keeps both as given
+            if (quote, base) not in grouped:
+                self._series[(quote, base)] = (days, [1 / rate for rate in rates])
+
+        self.currencies = sorted({currency for pair in self._series for currency in pair})
+        self._paths: Dict[Pair, Optional[List[Pair]]] = {}
+
+    def _path(self, base: str, quote: str) -> Optional[List[Pair]]:
+        """Direct pair, else two legs through the first pivot currency that links them"""
+        key = (base, quote)
+        if key not in self._paths:
+            if key in self._series:
+                path = [key]
+            else:
+                path = next((
+                    [(base, pivot), (pivot, quote)]
+                    for pivot in self.currencies
+                    if (base, pivot) in self._series and (pivot, quote) in self._series
+                ), None)
+            self._paths[key] = path
+        return self._paths[key]
+
+    def _leg_rate(self, pair: Pair, day: date) -> Optional[float]:
+        days, rates = self._series[pair]
+        index = bisect_right(days, day)
+        return rates[index - 1] if index else None
+
+    def rate(self, base: str, quote: str, day: date) -> Optional[float]:
+        """Units of ``quote`` per ``base`` as of ``day``; None before the first usable rate"""
+        if base == quote:
+            return 1.0
+        path = self._path(base, quote)
+        if path is None:
+            return None
+        result = 1.0
+        for leg in path:
+            leg_rate = self._leg_rate(leg, day)
+            if leg_rate is None:
+                return None
+            result *= leg_rate
+        return result
+
+    def available_from(self, base: str, quote: str) -> Optional[date]:
+        """First day ``base`` converts into ``quote``, or None if it never does"""
+        if base == quote:
+            return date.min
+        path = self._path(base, quote)
+        if path is None:
+            return None
+        return max(self._series[leg][0][0] for leg in path)
+
+    def reporting_rows(self) -> Iterator[dict]:
+        """As-of rates for every convertible pair, at each date one of its legs changes"""
+        for base in self.currencies:
+            for quote in self.currencies:
+                path = self._path(base, quote) if base != quote else None
+                if path is None:
+                    continue
+                previous = None
+                for day in sorted({day for leg in path for day in self._series[leg][0]}):
+                    rate = self.rate(base, quote, day)
+                    if rate is not None and rate != previous:
+                        previous = rate
+                        yield {"day": day, "base": base, "quote": quote, "rate": rate}
+
+
+def _load(db: Session) -> RateTable:
+    return RateTable(db.execute(
+        select(ExchangeRate.day, ExchangeRate.base, ExchangeRate.quote, ExchangeRate.rate)
+    ))
+
+
+def rate_table(db: Session) -> RateTable:
+    table = rate_cache.get("rates")
+    if table is None:
+        table = _load(db)
+        rate_cache.set("rates", table)
+    return table
+
+
+def reporting_currency(user) -> str:
+    return getattr(user, "reporting_currency", None) or DEFAULT_REPORTING_CURRENCY
+
+
+def rollup_currency():
+    """A rollup row's currency, with rows recorded before currencies existed in the default"""
+    return func.coalesce(DailyRollup.currency, DEFAULT_TRANSACTION_CURRENCY)
+
+
+class RollupConversion:
+    """
+    SQL pieces converting rollup rows into ``target``.
+
+    ``rates`` holds each pair's reporting rate into ``target`` with the
+    range of days it applies to, so ``join`` attaches the as-of rate to a
+    query's rollup rows in a single outer join. Rows already in ``target``
+    get no rate and are summed as exact integers; only foreign rows are
+    multiplied, and the two parts are added after rounding.
+    """
+
+    def __init__(self, target: str):
+        self.target = target
+        periods = (
+            select(
+                ReportingRate.base,
+                ReportingRate.day.label("valid_from"),
+                func.lead(ReportingRate.day).over(
+                    partition_by=ReportingRate.base, order_by=ReportingRate.day
+                ).label("valid_to"),
+                ReportingRate.rate,
+            )
+            .where(ReportingRate.quote == target, ReportingRate.base != target)
+        )
+        self.rates = periods.cte("rate_periods")
+        self.same_currency = rollup_currency() == target
+
+    def join(self, query):
+        """``query`` (selecting from DailyRollup) outer-joined to each row's as-of rate"""
+        rates = self.rates
+        return query.outerjoin(rates, and_(
+            rates.c.base == rollup_currency(),
+            rates.c.valid_from <= DailyRollup.day,
+            or_(rates.c.valid_to.is_(None), rates.c.valid_to > DailyRollup.day),
+        ))
+
+    def converted_sum(self):
+        """
+        ``SUM(total)`` over the joined rows in ``target`` currency; rows
+        without a rate are left out (see ``missing_currencies``), and it is
+        NULL when nothing was convertible
+        """
+        total = type_coerce(DailyRollup.total, BigInteger)
+        same = func.sum(case((self.same_currency, total)))
+        foreign = cast(func.round(func.sum(total * self.rates.c.rate)), BigInteger)
+        return type_coerce(func.coalesce(same + foreign, same, foreign), Money)
+
+    def converted_count(self):
+        """``SUM(count)`` over the rows ``converted_sum`` includes"""
+        return func.sum(case((self.convertible(), DailyRollup.count), else_=0))
+
+    def convertible(self):
+        """Whether a joined row is in ``target`` or has a rate into it"""
+        return or_(self.same_currency, self.rates.c.rate.is_not(None))
+
+
+def missing_currencies(
+    db: Session,
+    user_id: int,
+    target: str,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+) -> List[str]:
+    """Currencies with rollup rows in range that ``converted_sum`` cannot convert"""
+    query = select(rollup_currency(), func.min(DailyRollup.day)).where(DailyRollup.user_id == user_id)
+    if date_from:
+        query = query.where(DailyRollup.day >= date_from)
+    if date_to:
+        query = query.where(DailyRollup.day <= date_to)
+    table = rate_table(db)
+    missing = []
+    for currency, first_day in db.execute(query.group_by(rollup_currency())):
+        available = table.available_from(currency, target)
+        if isinstance(first_day, str):
+            first_day = date.fromisoformat(first_day)
+        if available is None or available > first_day:
+            missing.append(currency)
+    return sorted(missing)
+
+
+def _to_row(record: Dict[str, Optional[str]]) -> dict:
+    fields = {key: (value or "").strip() for key, value in record.items()}
+    try:
+        day = date.fromisoformat(fields.get("date", ""))
+    except ValueError:
+        raise ValueError("date: expected YYYY-MM-DD")
+    base, quote = fields.get("base", "").upper(), fields.get("quote", "").upper()
+    for name, code in (("base", base), ("quote", quote)):
+        if not _CURRENCY_CODE.match(code):
+            raise ValueError(f"{name}: expected a three-letter currency code")
+    if base == quote:
+        raise ValueError("base and quote must differ")
+    try:
+        rate = float(fields.get("rate", ""))
+    except ValueError:
+        raise ValueError("rate: expected a number")
+    if not math.isfinite(rate) or rate <= 0:
+        raise ValueError("rate: must be positive")
+    return {"day": day, "base": base, "quote": quote, "rate": rate}
+
+
+def _upsert(db: Session, rows: List[dict]):
+    table = ExchangeRate.__table__
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        statement = (sqlite if dialect == "sqlite" else postgresql).insert(table)
+        statement = statement.on_conflict_do_update(
+            index_elements=["base", "quote", "day"], set_={"rate": statement.excluded.rate}
+        )
+        db.execute(statement, rows)
+        return
+    for row in rows:
+        db.execute(delete(table).where(
+            table.c.base == row["base"], table.c.quote == row["quote"], table.c.day == row["day"]
+        ))
+    db.execute(insert(table), rows)
+
+
+def rebuild_reporting_rates(db: Session):
+    """Recompute ``reporting_rates`` from ``exchange_rates``; the caller commits"""
+    db.execute(delete(ReportingRate))
+    batch = []
+    for row in _load(db).reporting_rows():
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            db.execute(insert(ReportingRate.__table__), batch)
+            batch = []
+    if batch:
+        db.execute(insert(ReportingRate.__table__), batch)
+
+
+def import_rates(db: Session, records: Iterator[Tuple[int, Dict[str, Optional[str]]]]) -> ImportResult:
+    """
+    Upsert ``date,base,quote,rate`` records, then rebuild the reporting rates.
+
+    Invalid rows are reported, not raised. The caller commits, then clears
+    ``rate_cache``.
+    """
+    rows: Dict[tuple, dict] = {}
+    imported = failed = 0
+    errors: List[ImportRowError] = []
+    for row_number, record in records:
+        try:
+            row = _to_row(record)
+        except ValueError as error:
+            failed += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append(ImportRowError(row=row_number, error=str(error)))
+            continue
+        # The last rate given for a pair and day wins
+        rows[(row["base"], row["quote"], row["day"])] = row
+        imported += 1
+    values = list(rows.values())
+    for offset in range(0, len(values), BATCH_SIZE):
+        _upsert(db, values[offset:offset + BATCH_SIZE])
+    if values:
+        rebuild_reporting_rates(db)
+    return ImportResult(imported=imported, failed=failed, errors=errors)
+
+
+def load_rates_file(db: Session, path: str) -> ImportResult:
+    """Import a rates CSV from disk and commit"""
+    # importers depends on rollups, which depends on this module
+    from app.services.importers import parse_csv
+
+    with open(path, newline="", encoding="utf-8-sig") as stream:
+        result = import_rates(db, parse_csv(stream))
+    db.commit()
+    rate_cache.clear()
+    return result
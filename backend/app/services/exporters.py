@@ -0,0 +1,122 @@
+"""
+Streaming transaction exporters.
+
+Rows are pulled from a server-side cursor in ``CHUNK_SIZE`` batches and
+encoded chunk by chunk, so memory use is bounded by one chunk regardless
+of how long the exported history is.
+"""
+import csv
+import io
+from typing import Iterable, Iterator, Sequence
+from app.core import money
+from app.core.serialization import dumps
+
+CHUNK_SIZE = 1000
+
+EXPORT_COLUMNS = ("id", "date", "amount", "type", "description", "category_id", "currency", "user_id")
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def _chunks(rows: Iterable[Sequence]) -> Iterator[list]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= CHUNK_SIZE:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def export_csv(rows: Iterable[Sequence]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for chunk in _chunks(rows):
+        writer.writerows(chunk)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def export_ndjson(rows: Iterable[Sequence]) -> Iterator[bytes]:
+    for chunk in _chunks(rows):
+        yield b"".join(dumps(dict(zip(EXPORT_COLUMNS, row))) + b"\n" for row in chunk)
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands back what was written since the last drain"""
+
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        # Parquet records absolute offsets in its footer
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def export_parquet(rows: Iterable[Sequence]) -> Iterator[bytes]:
+    """
+    One Parquet row group per chunk; requires the optional ``pyarrow`` package
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ("id", pa.int64()),
+        ("date", pa.date32()),
+        # Exact, like the stored minor units; 19 digits covers any 64-bit amount
+        ("amount", pa.decimal128(19, money.SCALE)),
+        ("type", pa.string()),
+        ("description", pa.string()),
+        ("category_id", pa.int64()),
+        ("currency", pa.string()),
+        ("user_id", pa.int64()),
+    ])
+    sink = _ChunkSink()
+    with pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema) as writer:
+        for chunk in _chunks(rows):
+            columns = list(zip(*chunk))
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+                schema=schema,
+            ))
+            yield sink.drain()
+    # Footer is written on close
+    yield sink.drain()
+
+
+def parquet_available() -> bool:
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+EXPORTERS = {
+    "csv": export_csv,
+    "ndjson": export_ndjson,
+    "parquet": export_parquet,
+}
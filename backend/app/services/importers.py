@@ -0,0 +1,260 @@
+"""
+Streaming statement parsers and the batched bulk importer.
+
+Parsers are generators over a text stream that yield ``(row_number,
+record)`` pairs one at a time, so an upload is never loaded into memory
+as a whole. Records are validated against ``TransactionCreate`` and
+written with multi-row INSERTs inside the caller's transaction.
+
+With ``dedupe`` on, rows whose fingerprint (see ``duplicates``) repeats
+an earlier row of the file or an existing transaction are skipped: one
+set lookup per row plus one indexed ``IN`` query per batch.
+"""
+import csv
+import re
+from datetime import date, datetime
+from typing import Dict, Iterator, List, Optional, TextIO, Tuple
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from app.models.category import Category
+from app.models.transaction import Transaction
+from app.schemas.transaction import TransactionCreate
+from app.schemas.importer import ImportResult, ImportRowError
+from app.services import rollups, categorizer, duplicates, sync
+
+BATCH_SIZE = 500
+MAX_REPORTED_ERRORS = 1000
+
+Record = Dict[str, Optional[str]]
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+def parse_csv(stream: TextIO) -> Iterator[Tuple[int, Record]]:
+    """
+    CSV with a header row. Recognised columns: date, amount, description,
+    type, category (name), category_id, currency.
+    """
+    reader = csv.DictReader(stream)
+    if reader.fieldnames is None:
+        return
+    reader.fieldnames = [name.strip().lower() for name in reader.fieldnames]
+    for row in reader:
+        # Header is line 1
+        yield reader.line_num, {key: (value.strip() if isinstance(value, str) else value) for key, value in row.items() if key}
+
+
+_OFX_TAG = re.compile(r"<(/?)([A-Z0-9.]+)>([^<\r\n]*)", re.IGNORECASE)
+
+
+def parse_ofx(stream: TextIO) -> Iterator[Tuple[int, Record]]:
+    """
+    OFX 1.x (SGML) or 2.x (XML) bank statements, one ``<STMTTRN>`` at a time
+    """
+    current: Optional[Dict[str, str]] = None
+    count = 0
+    currency = None
+    for line in stream:
+        for closing, tag, value in _OFX_TAG.findall(line):
+            tag = tag.upper()
+            value = value.strip()
+            if tag == "CURDEF" and not closing:
+                currency = value
+            elif tag == "STMTTRN":
+                if not closing:
+                    current = {}
+                elif current is not None:
+                    count += 1
+                    yield count, _ofx_record(current, currency)
+                    current = None
+            elif current is not None and not closing and value:
+                current[tag] = value
+
+
+def _ofx_record(fields: Dict[str, str], currency: Optional[str]) -> Record:
+    posted = fields.get("DTPOSTED", "")[:8]
+    description = fields.get("NAME") or fields.get("MEMO")
+    if fields.get("NAME") and fields.get("MEMO"):
+        description = f"{fields['NAME']} - {fields['MEMO']}"
+    return {
+        "date": f"{posted[:4]}-{posted[4:6]}-{posted[6:8]}" if len(posted) == 8 else None,
+        "amount": fields.get("TRNAMT"),
+        "description": description,
+        "currency": currency,
+    }
+
+
+_QIF_DATE_FORMATS = ("%m/%d/%Y", "%m/%d/%y", "%Y-%m-%d", "%d.%m.%Y")
+
+
+def _qif_date(value: str) -> Optional[str]:
+    # Quicken writes 2-digit years after an apostrophe, e.g. 6/ 1'25
+    value = value.replace("'", "/").replace(" ", "")
+    for fmt in _QIF_DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date().isoformat()
+        except ValueError:
+            continue
+    return value
+
+
+def parse_qif(stream: TextIO) -> Iterator[Tuple[int, Record]]:
+    """
+    QIF bank registers; ``L`` lines are treated as category names
+    """
+    current: Record = {}
+    count = 0
+    for line in stream:
+        line = line.rstrip("\r\n")
+        if not line or line.startswith("!"):
+            continue
+        code, value = line[0], line[1:].strip()
+        if code == "^":
+            if current:
+                count += 1
+                yield count, current
+            current = {}
+        elif code == "D":
+            current["date"] = _qif_date(value)
+        elif code in ("T", "U"):
+            current["amount"] = value.replace(",", "")
+        elif code == "P":
+            current["description"] = value
+        elif code == "M" and not current.get("description"):
+            current["description"] = value
+        elif code == "L":
+            current["category"] = value.strip("[]")
+    if current:
+        yield count + 1, current
+
+
+PARSERS = {
+    "csv": parse_csv,
+    "ofx": parse_ofx,
+    "qfx": parse_ofx,
+    "qif": parse_qif,
+}
+
+
+def detect_format(filename: Optional[str], explicit: Optional[str] = None) -> str:
+    fmt = (explicit or (filename or "").rsplit(".", 1)[-1]).lower()
+    if fmt not in PARSERS:
+        raise ImportFormatError(f"Unsupported import format '{fmt}'. Use one of: csv, ofx, qif")
+    return fmt
+
+
+def _error_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc'])}: {item['msg']}" for item in error.errors()
+    )
+
+
+def _to_row(record: Record, user_id: int, categories: Dict[str, int], category_ids: set) -> dict:
+    fields = {key: value for key, value in record.items() if value not in (None, "")}
+
+    # Signed bank amounts: negative is money out unless a type is given
+    if "type" not in fields and "amount" in fields:
+        try:
+            fields["type"] = "expense" if float(fields["amount"].replace(",", "")) < 0 else "income"
+        except ValueError:
+            pass
+    if "amount" in fields:
+        fields["amount"] = fields["amount"].replace(",", "").lstrip("-")
+
+    name = fields.pop("category", None)
+    if name and "category_id" not in fields:
+        if name.lower() not in categories:
+            raise ValueError(f"Unknown category '{name}'")
+        fields["category_id"] = categories[name.lower()]
+
+    transaction = TransactionCreate(**fields)
+    if transaction.type not in ("income", "expense"):
+        raise ValueError(f"type: must be 'income' or 'expense', got '{transaction.type}'")
+    if transaction.category_id is not None and transaction.category_id not in category_ids:
+        raise ValueError(f"Unknown category_id {transaction.category_id}")
+
+    return {
+        "amount": transaction.amount,
+        "description": transaction.description,
+        "date": transaction.date or date.today(),
+        "type": transaction.type,
+        "category_id": transaction.category_id,
+        "currency": transaction.currency or "INR",
+        "user_id": user_id,
+    }
+
+
+def _flush(db: Session, user_id: int, batch: List[dict], dedupe: bool) -> int:
+    """Insert the batch, less rows already on the books if ``dedupe``; returns rows inserted"""
+    rows = list(batch)
+    batch.clear()
+    if dedupe:
+        existing = duplicates.existing_fingerprints(db, user_id, [row["fingerprint"] for row in rows])
+        rows = [row for row in rows if row["fingerprint"] not in existing]
+    if rows:
+        db.execute(insert(Transaction), rows)
+        rollups.add_rows(db, rows)
+    return len(rows)
+
+
+def import_records(
+    db: Session,
+    user_id: int,
+    records: Iterator[Tuple[int, Record]],
+    batch_size: int = BATCH_SIZE,
+    dedupe: bool = False,
+) -> ImportResult:
+    """
+    Validate and insert parsed records; invalid rows are reported, not raised.
+    With ``dedupe``, exact duplicates are skipped and counted instead.
+
+    The caller owns the transaction and commits once at the end.
+    """
+    categories: Dict[str, int] = {}
+    category_ids = set()
+    for category_id, name in db.query(Category.id, Category.name).filter(Category.user_id == user_id):
+        category_ids.add(category_id)
+        if name:
+            categories.setdefault(name.lower(), category_id)
+
+    matcher = categorizer.matcher_for(db, user_id)
+    # Core inserts skip the flush hook, so stamp the delta-sync sequence here
+    seq = sync.next_seq(db, user_id)
+
+    valid = imported = failed = 0
+    errors: List[ImportRowError] = []
+    batch: List[dict] = []
+    seen = set()
+    for row_number, record in records:
+        try:
+            row = _to_row(record, user_id, categories, category_ids)
+            if row["category_id"] is None and matcher:
+                row["category_id"] = matcher.match(row["description"], row["amount"], row["type"])
+            row["change_seq"] = seq
+            duplicates.stamp((row,))
+        except ValidationError as error:
+            message = _error_message(error)
+        except ValueError as error:
+            message = str(error)
+        else:
+            valid += 1
+            if dedupe:
+                if row["fingerprint"] in seen:
+                    continue
+                seen.add(row["fingerprint"])
+            batch.append(row)
+            if len(batch) >= batch_size:
+                imported += _flush(db, user_id, batch, dedupe)
+            continue
+
+        failed += 1
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append(ImportRowError(row=row_number, error=message))
+
+    if batch:
+        imported += _flush(db, user_id, batch, dedupe)
+
+    return ImportResult(imported=imported, failed=failed, duplicates=valid - imported, errors=errors)
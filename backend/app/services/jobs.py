@@ -0,0 +1,432 @@
+"""
+Background jobs for work too slow to finish inside a request.
+
+The ``jobs`` table is the queue, so SQLite needs no outside broker: a job
+is a row that moves queued -> running -> succeeded or failed. The
+dispatcher thread started with the app claims queued rows with a
+compare-and-set UPDATE, so several app workers can share one database,
+and it keeps each user under ``JOB_MAX_RUNNING_PER_USER`` running jobs.
+Claimed jobs go to a worker pool: CPU-bound kinds (reports, exports,
+imports) to a process pool, the rest to a thread pool.
+
+Workers open their own sessions, report progress on the job's row and
+write the result to a file under ``JOB_RESULTS_DIR``. The dispatcher
+refreshes ``heartbeat_at`` on the jobs it runs; a running job whose
+heartbeat goes stale lost its worker and is requeued (or failed after
+``JOB_MAX_ATTEMPTS``).
+"""
+import json
+import multiprocessing
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple, Type
+from pydantic import BaseModel
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+from app.core.serialization import dumps
+from app.db.database import SessionLocal
+from app.db.writer import run_write_sync
+from app.models.job import Job
+from app.models.transaction import Transaction
+from app.models.user import User
+from app.schemas.job import ExportJobParams, ImportJobParams, RecategorizeJobParams, ReportJobParams
+from app.services import categorizer, exchange_rates, exporters, importers, rollups
+
+JOBS_ENABLED = os.getenv("JOBS_ENABLED", "true").lower() in ("1", "true", "yes")
+JOB_RESULTS_DIR = os.getenv("JOB_RESULTS_DIR", "./data/jobs")
+JOB_THREAD_WORKERS = int(os.getenv("JOB_THREAD_WORKERS", "2"))
+JOB_PROCESS_WORKERS = int(os.getenv("JOB_PROCESS_WORKERS", str(min(2, os.cpu_count() or 1))))
+# "process" runs CPU-bound kinds in a process pool; "thread" keeps every kind in-process
+JOB_EXECUTOR = os.getenv("JOB_EXECUTOR", "process")
+JOB_MAX_RUNNING_PER_USER = int(os.getenv("JOB_MAX_RUNNING_PER_USER", "1"))
+JOB_MAX_PENDING_PER_USER = int(os.getenv("JOB_MAX_PENDING_PER_USER", "10"))  # queued + running
+# How often the dispatcher polls for jobs queued by other workers and heartbeats its own
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "2"))
+JOB_STALE_SECONDS = float(os.getenv("JOB_STALE_SECONDS", "120"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "2"))
+JOB_RETENTION_DAYS = float(os.getenv("JOB_RETENTION_DAYS", "7"))
+
+PROGRESS_INTERVAL_SECONDS = 0.5
+PURGE_INTERVAL_SECONDS = 3600
+# Candidates read per claim, so a user at their limit cannot starve the others
+CLAIM_SCAN = 200
+FINISHED = ("succeeded", "failed")
+
+_jobs = Job.__table__
+
+
+class JobLimitReached(Exception):
+    pass
+
+
+class JobProgress:
+    """
+    ``progress(fraction, message)`` for job functions; writes are throttled.
+
+    Call it between units of work, never inside a ``run_write`` unit: it
+    commits on its own session, which would wait on the unit's write lock.
+    """
+
+    def __init__(self, job_id: int):
+        self.job_id = job_id
+        self._written_at = 0.0
+
+    def __call__(self, fraction: float, message: Optional[str] = None):
+        now = time.monotonic()
+        if now - self._written_at < PROGRESS_INTERVAL_SECONDS:
+            return
+        self._written_at = now
+        _write(_set_progress, self.job_id, min(max(fraction, 0.0), 1.0), message)
+
+
+class JobKind:
+    """A job type: ``run(db, user_id, params, progress, directory)`` returns (file name, media type)"""
+
+    def __init__(self, run: Callable, params: Type[BaseModel], cpu_bound: bool):
+        self.run = run
+        self.params = params
+        self.cpu_bound = cpu_bound
+
+
+def _write(fn: Callable, *args):
+    db = SessionLocal()
+    try:
+        return run_write_sync(db, fn, *args)
+    finally:
+        db.close()
+
+
+def _set_progress(db: Session, job_id: int, progress: float, message: Optional[str]):
+    db.execute(update(_jobs).where(_jobs.c.id == job_id).values(progress=progress, message=message))
+
+
+def _write_json(directory: str, name: str, value) -> Tuple[str, str]:
+    with open(os.path.join(directory, name), "wb") as out:
+        out.write(dumps(value))
+    return name, "application/json"
+
+
+def _run_report(db: Session, user_id: int, params: ReportJobParams, progress: JobProgress, directory: str):
+    target = params.currency or params.reporting_currency or exchange_rates.reporting_currency(db.get(User, user_id))
+    progress(0.0, "Summing rollups")
+    report = rollups.timeseries_report(
+        db, user_id, params.granularity, params.group_by, params.date_from, params.date_to,
+        params.currency, params.type, target,
+    )
+    return _write_json(directory, "report.json", report.dict())
+
+
+def _run_export(db: Session, user_id: int, params: ExportJobParams, progress: JobProgress, directory: str):
+    # The listing query lives with its endpoints; the API package depends on this one
+    from app.api.transactions import build_listing_query
+
+    if params.format == "parquet" and not exporters.parquet_available():
+        raise RuntimeError("Parquet export requires the pyarrow package")
+    query = build_listing_query(
+        user_id, params.category_id, params.date_from, params.date_to, params.type, params.q
+    ).with_only_columns(Transaction.id)
+    # Ids first, rows per chunk: no read stays open while progress is written
+    ids = db.execute(query).scalars().all()
+    columns = [getattr(Transaction, name) for name in exporters.EXPORT_COLUMNS]
+
+    def rows():
+        for offset in range(0, len(ids), exporters.CHUNK_SIZE):
+            chunk = ids[offset:offset + exporters.CHUNK_SIZE]
+            found = {row[0]: tuple(row) for row in db.execute(select(*columns).where(Transaction.id.in_(chunk)))}
+            db.rollback()
+            progress(offset / len(ids), f"{offset} of {len(ids)} transactions")
+            for transaction_id in chunk:
+                if transaction_id in found:
+                    yield found[transaction_id]
+
+    name = f"transactions.{params.format}"
+    with open(os.path.join(directory, name), "wb") as out:
+        for part in exporters.EXPORTERS[params.format](rows()):
+            out.write(part.encode("utf-8") if isinstance(part, str) else part)
+    return name, exporters.MEDIA_TYPES[params.format]
+
+
+def _run_recategorize(db: Session, user_id: int, params: RecategorizeJobParams, progress: JobProgress, directory: str):
+    progress(0.0, "Applying rules")
+    scanned, updated = run_write_sync(db, categorizer.recategorize, user_id, params.overwrite)
+    return _write_json(directory, "result.json", {"scanned": scanned, "updated": updated})
+
+
+def _run_import(db: Session, user_id: int, params: ImportJobParams, progress: JobProgress, directory: str):
+    # Only files stored by POST /api/jobs/import
+    if os.path.dirname(os.path.abspath(params.upload)) != os.path.abspath(upload_directory()):
+        raise ValueError("Import upload not found")
+    progress(0.0, "Importing")
+    with open(params.upload, encoding="utf-8-sig", errors="replace", newline="") as stream:
+        result = run_write_sync(
+            db, importers.import_records, user_id, importers.PARSERS[params.format](stream), dedupe=params.dedupe
+        )
+    os.remove(params.upload)
+    return _write_json(directory, "result.json", result.dict())
+
+
+KINDS: Dict[str, JobKind] = {
+    "report": JobKind(_run_report, ReportJobParams, cpu_bound=True),
+    "export": JobKind(_run_export, ExportJobParams, cpu_bound=True),
+    "recategorize": JobKind(_run_recategorize, RecategorizeJobParams, cpu_bound=False),
+    "import": JobKind(_run_import, ImportJobParams, cpu_bound=True),
+}
+
+
+def job_directory(job_id: int) -> str:
+    return os.path.join(JOB_RESULTS_DIR, str(job_id))
+
+
+def upload_directory() -> str:
+    return os.path.join(JOB_RESULTS_DIR, "uploads")
+
+
+def _finish(db: Session, job_id: int, values: dict):
+    db.execute(update(_jobs).where(_jobs.c.id == job_id).values(finished_at=datetime.utcnow(), **values))
+
+
+def execute(job_id: int):
+    """Run a claimed job and record its outcome; the entry point in pool workers"""
+    db = SessionLocal()
+    try:
+        job = db.get(Job, job_id)
+        if job is None:
+            return
+        kind = KINDS[job.kind]
+        user_id, params = job.user_id, kind.params(**json.loads(job.params or "{}"))
+        directory = job_directory(job_id)
+        os.makedirs(directory, exist_ok=True)
+        db.rollback()
+        name, media_type = kind.run(db, user_id, params, JobProgress(job_id), directory)
+    except Exception as error:
+        db.rollback()
+        _write(_finish, job_id, {"status": "failed", "error": f"{type(error).__name__}: {error}"})
+        return
+    finally:
+        db.close()
+    _write(_finish, job_id, {
+        "status": "succeeded",
+        "progress": 1.0,
+        "message": None,
+        "result_path": os.path.join(directory, name),
+        "result_media_type": media_type,
+    })
+
+
+def add_job(db: Session, user_id: int, kind: str, params: BaseModel) -> Job:
+    """Queue a job unless the user already has ``JOB_MAX_PENDING_PER_USER`` pending"""
+    pending = db.execute(
+        select(func.count()).select_from(Job).where(Job.user_id == user_id, Job.status.in_(("queued", "running")))
+    ).scalar()
+    if pending >= JOB_MAX_PENDING_PER_USER:
+        raise JobLimitReached()
+    job = Job(user_id=user_id, kind=kind, params=params.json(), status="queued", progress=0.0, attempts=0)
+    db.add(job)
+    db.flush()
+    return job
+
+
+def claim_jobs(db: Session, kinds: List[str], limit: int, max_running_per_user: int) -> List[int]:
+    """Mark up to ``limit`` queued jobs of ``kinds`` running, oldest first, within the per-user limit"""
+    running = dict(db.execute(
+        select(Job.user_id, func.count()).where(Job.status == "running").group_by(Job.user_id)
+    ).all())
+    candidates = db.execute(
+        select(Job.id, Job.user_id)
+        .where(Job.status == "queued", Job.kind.in_(kinds))
+        .order_by(Job.id)
+        .limit(CLAIM_SCAN)
+    ).all()
+    now = datetime.utcnow()
+    claimed = []
+    for job_id, user_id in candidates:
+        if len(claimed) >= limit:
+            break
+        if running.get(user_id, 0) >= max_running_per_user:
+            continue
+        # Another app worker may have claimed it since the read
+        won = db.execute(
+            update(_jobs)
+            .where(_jobs.c.id == job_id, _jobs.c.status == "queued")
+            .values(status="running", started_at=now, heartbeat_at=now, attempts=_jobs.c.attempts + 1)
+        ).rowcount
+        if won:
+            claimed.append(job_id)
+            running[user_id] = running.get(user_id, 0) + 1
+    return claimed
+
+
+def _heartbeat(db: Session, job_ids: List[int]):
+    db.execute(update(_jobs).where(_jobs.c.id.in_(job_ids)).values(heartbeat_at=datetime.utcnow()))
+
+
+def _requeue(db: Session, job_id: int):
+    db.execute(
+        update(_jobs)
+        .where(_jobs.c.id == job_id, _jobs.c.status == "running")
+        .values(status="queued", attempts=_jobs.c.attempts - 1)
+    )
+
+
+def recover_stale(db: Session, stale_seconds: float = JOB_STALE_SECONDS, max_attempts: int = JOB_MAX_ATTEMPTS):
+    """Requeue running jobs whose worker stopped heartbeating, or fail them once out of attempts"""
+    stale = (_jobs.c.status == "running") & (
+        func.coalesce(_jobs.c.heartbeat_at, _jobs.c.started_at) < datetime.utcnow() - timedelta(seconds=stale_seconds)
+    )
+    db.execute(update(_jobs).where(stale, _jobs.c.attempts < max_attempts).values(
+        status="queued", message="Requeued after its worker stopped"
+    ))
+    db.execute(update(_jobs).where(stale).values(
+        status="failed", error="Interrupted: its worker stopped", finished_at=datetime.utcnow()
+    ))
+
+
+def purge_finished(db: Session, retention_days: float = JOB_RETENTION_DAYS) -> List[int]:
+    """Delete finished jobs older than the retention period; returns their ids"""
+    old = (_jobs.c.status.in_(FINISHED)) & (_jobs.c.finished_at < datetime.utcnow() - timedelta(days=retention_days))
+    job_ids = db.execute(select(_jobs.c.id).where(old)).scalars().all()
+    if job_ids:
+        db.execute(_jobs.delete().where(_jobs.c.id.in_(job_ids)))
+    return job_ids
+
+
+class JobQueue:
+    """Claims queued jobs for this app worker and runs them on its pools"""
+
+    def __init__(self, thread_workers: int = JOB_THREAD_WORKERS, process_workers: int = JOB_PROCESS_WORKERS,
+                 executor: str = JOB_EXECUTOR, max_running_per_user: int = JOB_MAX_RUNNING_PER_USER,
+                 poll_seconds: float = JOB_POLL_SECONDS):
+        use_processes = executor == "process" and process_workers > 0
+        self.slots = {"thread": thread_workers, "process": process_workers if use_processes else 0}
+        self.max_running_per_user = max_running_per_user
+        self.poll_seconds = poll_seconds
+        self._pools: Dict[str, Executor] = {}
+        self._running: Dict[int, str] = {}  # job id -> pool running it
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self.started = 0
+        self.completed = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+
+    def pool_for(self, kind: str) -> str:
+        return "process" if KINDS[kind].cpu_bound and self.slots["process"] else "thread"
+
+    def _executor(self, pool: str) -> Executor:
+        if pool not in self._pools:
+            if pool == "process":
+                # Fresh interpreters: forking would copy the app's threads and pooled connections
+                self._pools[pool] = ProcessPoolExecutor(
+                    max_workers=self.slots[pool], mp_context=multiprocessing.get_context("spawn")
+                )
+            else:
+                self._pools[pool] = ThreadPoolExecutor(max_workers=self.slots[pool], thread_name_prefix="job")
+        return self._pools[pool]
+
+    def notify(self):
+        """Dispatch now rather than at the next poll, e.g. after queueing a job"""
+        self._wake.set()
+
+    def dispatch(self) -> int:
+        """Claim as many queued jobs as there are free slots; returns the number started"""
+        started = 0
+        for pool in ("process", "thread"):
+            with self._lock:
+                free = self.slots[pool] - sum(1 for used in self._running.values() if used == pool)
+            kinds = [kind for kind in KINDS if self.pool_for(kind) == pool]
+            if free <= 0 or not kinds:
+                continue
+            for job_id in _write(claim_jobs, kinds, free, self.max_running_per_user):
+                with self._lock:
+                    self._running[job_id] = pool
+                future = self._executor(pool).submit(execute, job_id)
+                future.add_done_callback(lambda future, job_id=job_id: self._done(job_id, future))
+                started += 1
+        self.started += started
+        return started
+
+    def _done(self, job_id: int, future: Future):
+        with self._lock:
+            self._running.pop(job_id, None)
+        try:
+            if future.cancelled():
+                _write(_requeue, job_id)
+            elif future.exception() is not None:
+                # The worker itself died, e.g. a crashed process
+                error = future.exception()
+                _write(_finish, job_id, {"status": "failed", "error": f"{type(error).__name__}: {error}"})
+            self.completed += 1
+        except Exception as error:
+            self.failures += 1
+            self.last_error = f"{type(error).__name__}: {error}"
+        self._wake.set()
+
+    def _maintain(self, purge: bool):
+        with self._lock:
+            running = list(self._running)
+        if running:
+            _write(_heartbeat, running)
+        _write(recover_stale)
+        if purge:
+            for job_id in _write(purge_finished):
+                shutil.rmtree(job_directory(job_id), ignore_errors=True)
+
+    def _run(self):
+        maintain_at = purge_at = 0.0
+        while not self._stopping:
+            self._wake.clear()
+            try:
+                now = time.monotonic()
+                if now >= maintain_at:
+                    self._maintain(purge=now >= purge_at)
+                    maintain_at = now + self.poll_seconds
+                    if now >= purge_at:
+                        purge_at = now + PURGE_INTERVAL_SECONDS
+                self.dispatch()
+            except Exception as error:
+                self.failures += 1
+                self.last_error = f"{type(error).__name__}: {error}"
+            if not self._stopping:
+                self._wake.wait(self.poll_seconds)
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="job-dispatcher", daemon=True)
+            self._thread.start()
+
+    def stats(self) -> dict:
+        with self._lock:
+            running = dict(self._running)
+        return {
+            "running": self._thread is not None and self._thread.is_alive(),
+            "slots": dict(self.slots),
+            "active": {pool: sum(1 for used in running.values() if used == pool) for pool in self.slots},
+            "started": self.started,
+            "completed": self.completed,
+            "failures": self.failures,
+            "last_error": self.last_error,
+        }
+
+    def shutdown(self):
+        """Stop dispatching, requeue jobs not yet started and wait for running ones"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+            self._stopping = True
+            pools, self._pools = self._pools, {}
+        self._wake.set()
+        if thread is not None and thread.is_alive():
+            thread.join()
+        for pool in pools.values():
+            pool.shutdown(wait=True, cancel_futures=True)
+
+
+job_queue = JobQueue()
@@ -0,0 +1,118 @@
+"""
+Password hashing on a bounded worker pool.
+
+bcrypt deliberately burns 100-300 ms of CPU per call. Running it on
+Starlette's shared threadpool lets a login burst starve every other
+route, so hashing gets its own small pool. The number of queued jobs is
+capped; callers past the cap get ``PasswordHasherBusy`` and the API
+answers 503 with Retry-After instead of queueing without bound.
+"""
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional, Tuple
+from passlib.context import CryptContext
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
+# "thread" (bcrypt releases the GIL) or "process"
+PASSWORD_HASH_EXECUTOR = os.getenv("PASSWORD_HASH_EXECUTOR", "thread")
+PASSWORD_HASH_RETRY_AFTER_SECONDS = 1
+
+# Hashes made with any other cost are flagged for rehashing on login
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+
+class PasswordHasherBusy(Exception):
+    pass
+
+
+# Module-level so they can be pickled into a process pool
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify_and_update(password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    return pwd_context.verify_and_update(password, hashed)
+
+
+class PasswordHasher:
+    def __init__(self, workers: int, max_pending: int, kind: str = "thread"):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.kind = kind
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                # Fresh interpreters: forking would copy the app's threads, locks and pooled connections
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+        return self._executor
+
+    def _done(self, future: Future):
+        with self._lock:
+            self._pending -= 1
+            self.completed += 1
+
+    def _submit(self, fn, *args) -> Future:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise PasswordHasherBusy()
+            self._pending += 1
+            executor = self._get_executor()
+        try:
+            future = executor.submit(fn, *args)
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+            raise
+        future.add_done_callback(self._done)
+        return future
+
+    async def hash(self, password: str) -> str:
+        return await asyncio.wrap_future(self._submit(_hash, password))
+
+    async def verify_and_update(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        """
+        Check ``password``; the second item is a replacement hash when the
+        stored one uses outdated cost parameters, else None
+        """
+        return await asyncio.wrap_future(self._submit(_verify_and_update, password, hashed))
+
+    def hash_sync(self, password: str) -> str:
+        """Blocking variant for scripts outside the event loop"""
+        return self._submit(_hash, password).result()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "executor": self.kind,
+                "workers": self.workers,
+                "pending": self._pending,
+                "max_pending": self.max_pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "bcrypt_rounds": BCRYPT_ROUNDS,
+            }
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+password_hasher = PasswordHasher(PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING, PASSWORD_HASH_EXECUTOR)
@@ -0,0 +1,353 @@
+"""
+Recurring transactions and their background scheduler.
+
+A ``RecurringRule`` is an RRULE-style template: a frequency (daily,
+weekly, monthly, yearly), an interval, and optionally an ``until`` day
+and/or a ``count``. Occurrence n is computed from the start date, so the
+schedule never drifts; monthly and yearly rules keep the start's day of
+the month, clamped to short months (the 31st posts on Feb 28/29).
+
+``RecurringScheduler`` keeps a min-heap of (next_date, rule id) and
+sleeps until the earliest entry falls due, so it wakes once per due date
+rather than once per rule, whatever the number of rules. Due rules are
+materialized in batches: each rule's ``next_date`` is advanced with a
+compare-and-set UPDATE that claims its occurrences, then the claimed
+occurrences go in with one multi-row INSERT. Every posted transaction
+carries the idempotency key ``recurring:<rule>:<date>`` under a unique
+index, so restarts, rule edits and several workers sharing a database
+never post an occurrence twice.
+"""
+import heapq
+import os
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from sqlalchemy import bindparam, insert, select, update
+from sqlalchemy.orm import Session
+from app.db.database import PARAMETER_CHUNK, SessionLocal
+from app.db.writer import run_write_sync
+from app.models.recurring import RecurringRule
+from app.models.transaction import Transaction
+from app.services import duplicates, rollups, sync
+
+RECURRING_SCHEDULER_ENABLED = os.getenv("RECURRING_SCHEDULER_ENABLED", "true").lower() in ("1", "true", "yes")
+RECURRING_BATCH_SIZE = int(os.getenv("RECURRING_BATCH_SIZE", "500"))  # rules per transaction
+# Reload the heap from the database this often, to pick up other workers' edits;
+# each load reads only the rules falling due before the next one
+RECURRING_RESYNC_SECONDS = float(os.getenv("RECURRING_RESYNC_SECONDS", "300"))
+RECURRING_RETRY_SECONDS = 30.0
+
+FREQUENCIES = ("daily", "weekly", "monthly", "yearly")
+
+_rules = RecurringRule.__table__
+# Compare-and-set claim on a rule's due occurrences; built once, as it runs per rule
+_CLAIM = (
+    update(_rules)
+    .where(_rules.c.id == bindparam("rule_id"), _rules.c.next_date == bindparam("expected"))
+    .values(occurrences=bindparam("n"), last_date=bindparam("last"), next_date=bindparam("following"))
+)
+
+
+def occurrence(start: date, frequency: str, interval: int, n: int) -> date:
+    """The ``n``-th occurrence (0-based) of a schedule starting on ``start``"""
+    steps = n * interval
+    if frequency == "daily":
+        return start + timedelta(days=steps)
+    if frequency == "weekly":
+        return start + timedelta(weeks=steps)
+    if frequency == "monthly":
+        return rollups.add_months(start, steps)
+    if frequency == "yearly":
+        return rollups.add_months(start, 12 * steps)
+    raise ValueError(f"Unknown frequency '{frequency}'")
+
+
+def _scheduled(rule: RecurringRule, n: int) -> Optional[date]:
+    """Occurrence ``n`` of ``rule``, or None past its count or until day"""
+    if rule.count is not None and n >= rule.count:
+        return None
+    day = occurrence(rule.start_date, rule.frequency, rule.interval, n)
+    if rule.until is not None and day > rule.until:
+        return None
+    return day
+
+
+def _pending(rule: RecurringRule, today: date) -> Iterator[Tuple[int, date]]:
+    """(n, day) for the rule's unposted occurrences on or before ``today``"""
+    n = rule.occurrences or 0
+    day = rule.next_date
+    while day is not None and day <= today:
+        yield n, day
+        n += 1
+        day = _scheduled(rule, n)
+
+
+def plan(rule: RecurringRule):
+    """
+    (Re)compute ``occurrences`` and ``next_date`` after a create or edit.
+
+    Occurrences of the new schedule up to the last one already handled
+    count as done, so an edit applies from the next unposted occurrence on
+    instead of backfilling under the new terms.
+    """
+    n = 0
+    if rule.last_date is not None:
+        while True:
+            day = _scheduled(rule, n)
+            if day is None or day > rule.last_date:
+                break
+            n += 1
+    rule.occurrences = n
+    rule.next_date = _scheduled(rule, n)
+
+
+def idempotency_key(rule_id: int, day: date) -> str:
+    return f"recurring:{rule_id}:{day.isoformat()}"
+
+
+def _existing_keys(db: Session, keys: List[str]) -> set:
+    existing = set()
+    for offset in range(0, len(keys), PARAMETER_CHUNK):
+        existing.update(db.execute(
+            select(Transaction.idempotency_key).where(
+                Transaction.idempotency_key.in_(keys[offset:offset + PARAMETER_CHUNK])
+            )
+        ).scalars())
+    return existing
+
+
+def materialize_due(
+    db: Session,
+    today: date,
+    rule_ids: Optional[List[int]] = None,
+    limit: int = RECURRING_BATCH_SIZE,
+) -> Tuple[int, Dict[int, Optional[date]]]:
+    """
+    Post the due occurrences of up to ``limit`` rules (of ``rule_ids`` if given).
+
+    Returns the number of transactions inserted and the current
+    ``next_date`` of every rule looked at. The caller owns the transaction
+    and commits.
+    """
+    query = select(RecurringRule)
+    if rule_ids is None:
+        query = query.where(RecurringRule.next_date <= today)
+    else:
+        # Popped heap entries may be stale; rules no longer due just report their date
+        query = query.where(RecurringRule.id.in_(rule_ids))
+    rules = db.execute(query.order_by(RecurringRule.next_date, RecurringRule.id).limit(limit)).scalars().all()
+
+    connection = db.connection()
+    rows: List[dict] = []
+    next_dates: Dict[int, Optional[date]] = {}
+    for rule in rules:
+        claimed = list(_pending(rule, today))
+        if not claimed:
+            next_dates[rule.id] = rule.next_date
+            continue
+        n, last = claimed[-1][0] + 1, claimed[-1][1]
+        following = _scheduled(rule, n)
+        # A worker that lost the race sees no row and posts nothing
+        won = connection.execute(_CLAIM, {
+            "rule_id": rule.id, "expected": rule.next_date, "n": n, "last": last, "following": following,
+        }).rowcount
+        if not won:
+            next_dates[rule.id] = connection.execute(
+                select(_rules.c.next_date).where(_rules.c.id == rule.id)
+            ).scalar()
+            continue
+        next_dates[rule.id] = following
+        for _, day in claimed:
+            rows.append({
+                "amount": rule.amount,
+                "description": rule.description,
+                "date": day,
+                "type": rule.type,
+                "category_id": rule.category_id,
+                "currency": rule.currency or "INR",
+                "user_id": rule.user_id,
+                "idempotency_key": idempotency_key(rule.id, day),
+            })
+
+    # Occurrences re-planned by an edit may already be on the books
+    existing = _existing_keys(db, [row["idempotency_key"] for row in rows])
+    rows = [row for row in rows if row["idempotency_key"] not in existing]
+    if rows:
+        # Core inserts skip the flush hooks, so stamp the sequence and fingerprints here
+        seqs = {user_id: sync.next_seq(db, user_id) for user_id in sorted({row["user_id"] for row in rows})}
+        for row in rows:
+            row["change_seq"] = seqs[row["user_id"]]
+        duplicates.stamp(rows)
+        db.execute(insert(Transaction), rows)
+        rollups.add_rows(db, rows)
+    # The ORM copies loaded above are stale after the core UPDATE
+    db.expire_all()
+    return len(rows), next_dates
+
+
+class RecurringScheduler:
+    """
+    Min-heap of rules by next due day, drained by one background thread.
+
+    Heap entries are (day ordinal, rule id). ``_due`` maps each rule to the
+    day of its live entry; rescheduling pushes a new entry and older ones
+    are dropped when popped, so updates never search the heap.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session], batch_size: int = RECURRING_BATCH_SIZE,
+                 resync_seconds: float = RECURRING_RESYNC_SECONDS):
+        self._session_factory = session_factory
+        self.batch_size = batch_size
+        self.resync_seconds = resync_seconds
+        self._heap: List[Tuple[int, int]] = []
+        self._due: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self.wakeups = 0
+        self.posted = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+
+    def load(self, db: Session, horizon: Optional[date] = None):
+        """
+        Rebuild the heap from the rules due on or before ``horizon``.
+
+        The horizon defaults to the day of the next resync: later rules are
+        picked up by a later load, and writes through the API reach the
+        heap sooner via ``schedule``. The scan is a range read on
+        ix_recurring_rules_next_date, so a resync costs the rules coming
+        due rather than every rule.
+        """
+        if horizon is None:
+            horizon = (datetime.now() + timedelta(seconds=self.resync_seconds)).date()
+        due = {
+            rule_id: next_date.toordinal()
+            for rule_id, next_date in db.execute(
+                select(RecurringRule.id, RecurringRule.next_date).where(RecurringRule.next_date <= horizon)
+            )
+        }
+        heap = [(day, rule_id) for rule_id, day in due.items()]
+        heapq.heapify(heap)
+        with self._lock:
+            self._due, self._heap = due, heap
+        self._wake.set()
+
+    def schedule(self, rule_id: int, next_date: Optional[date]):
+        """Track a created, edited or deleted rule; None stops tracking it"""
+        with self._lock:
+            if next_date is None:
+                self._due.pop(rule_id, None)
+                return
+            day = next_date.toordinal()
+            if self._due.get(rule_id) == day:
+                return
+            self._due[rule_id] = day
+            heapq.heappush(self._heap, (day, rule_id))
+            earliest = self._heap[0] == (day, rule_id)
+        if earliest:
+            self._wake.set()
+
+    def _pop_due(self, today: date) -> List[int]:
+        cutoff = today.toordinal()
+        rule_ids = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= cutoff and len(rule_ids) < self.batch_size:
+                day, rule_id = heapq.heappop(self._heap)
+                if self._due.get(rule_id) == day:
+                    del self._due[rule_id]
+                    rule_ids.append(rule_id)
+        return rule_ids
+
+    def next_due(self) -> Optional[date]:
+        with self._lock:
+            while self._heap and self._due.get(self._heap[0][1]) != self._heap[0][0]:
+                heapq.heappop(self._heap)
+            return date.fromordinal(self._heap[0][0]) if self._heap else None
+
+    def run_pending(self, today: Optional[date] = None) -> int:
+        """Materialize every rule due on or before ``today``; returns transactions posted"""
+        today = today or date.today()
+        posted = 0
+        while True:
+            rule_ids = self._pop_due(today)
+            if not rule_ids:
+                return posted
+            db = self._session_factory()
+            try:
+                inserted, next_dates = run_write_sync(db, materialize_due, today, rule_ids, len(rule_ids))
+            except Exception:
+                # Put the batch back for the next attempt
+                for rule_id in rule_ids:
+                    self.schedule(rule_id, today)
+                raise
+            finally:
+                db.close()
+            posted += inserted
+            self.posted += inserted
+            for rule_id, next_date in next_dates.items():
+                self.schedule(rule_id, next_date)
+
+    def _seconds_until_due(self) -> float:
+        next_due = self.next_due()
+        if next_due is None:
+            return self.resync_seconds
+        wait = (datetime.combine(next_due, datetime.min.time()) - datetime.now()).total_seconds()
+        return min(max(wait, 0.0), self.resync_seconds)
+
+    def _run(self):
+        resync_at = 0.0
+        while not self._stopping:
+            self._wake.clear()
+            timeout = None
+            try:
+                if time.monotonic() >= resync_at:
+                    db = self._session_factory()
+                    try:
+                        self.load(db)
+                    finally:
+                        db.close()
+                    resync_at = time.monotonic() + self.resync_seconds
+                self.wakeups += 1
+                self.run_pending()
+            except Exception as error:
+                self.failures += 1
+                self.last_error = f"{type(error).__name__}: {error}"
+                timeout = RECURRING_RETRY_SECONDS
+            if not self._stopping:
+                self._wake.wait(self._seconds_until_due() if timeout is None else timeout)
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="recurring-scheduler", daemon=True)
+            self._thread.start()
+
+    def stats(self) -> dict:
+        next_due = self.next_due()
+        with self._lock:
+            scheduled = len(self._due)
+        return {
+            "running": self._thread is not None and self._thread.is_alive(),
+            "scheduled_rules": scheduled,
+            "next_due": next_due.isoformat() if next_due else None,
+            "wakeups": self.wakeups,
+            "posted": self.posted,
+            "failures": self.failures,
+            "last_error": self.last_error,
+        }
+
+    def shutdown(self):
+        with self._lock:
+            thread, self._thread = self._thread, None
+            self._stopping = True
+        self._wake.set()
+        if thread is not None and thread.is_alive():
+            thread.join()
+
+
+recurring_scheduler = RecurringScheduler(SessionLocal)
@@ -0,0 +1,407 @@
+"""
+Incrementally maintained daily spend rollups.
+
+Every transaction write adjusts exactly one ``DailyRollup`` bucket, so
+budget progress and reports can sum a handful of daily rows instead of
+rescanning the raw ``transactions`` table.
+"""
+from collections import defaultdict
+from sqlalchemy import Date, cast, func, update, delete, insert, select, literal, union_all
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateIndex
+from typing import Dict, Iterable, List, Optional, Tuple
+from datetime import date, timedelta
+from decimal import Decimal
+from app.core.money import to_decimal
+from app.services import exchange_rates
+from app.models.rollup import BUCKET_KEY, DailyRollup, bucket_index
+from app.models.transaction import Transaction
+from app.models.budget import Budget
+from app.models.category import Category
+from app.schemas.analytics import TimeSeries, TimeSeriesPoint, TimeSeriesResponse
+
+# SQLite caps the number of terms in a compound SELECT
+_UNION_CHUNK = 200
+
+
+def _bucket_filter(user_id, category_id, day, type, currency):
+    category_clause = (
+        DailyRollup.category_id.is_(None) if category_id is None else DailyRollup.category_id == category_id
+    )
+    currency_clause = (
+        DailyRollup.currency.is_(None) if currency is None else DailyRollup.currency == currency
+    )
+    return (
+        DailyRollup.user_id == user_id,
+        category_clause,
+        DailyRollup.day == day,
+        DailyRollup.type == type,
+        currency_clause,
+    )
+
+
+def _bump(db: Session, user_id, category_id, day, type, currency, amount: Decimal, count: int):
+    key = _bucket_filter(user_id, category_id, day, type, currency)
+    dialect = db.get_bind().dialect.name
+
+    if count > 0 and dialect in ("sqlite", "postgresql"):
+        # One atomic statement, so concurrent first writes to a bucket add up
+        # instead of racing to INSERT it
+        statement = (sqlite if dialect == "sqlite" else postgresql).insert(DailyRollup).values(
+            user_id=user_id,
+            category_id=category_id,
+            day=day,
+            type=type,
+            currency=currency,
+            total=amount,
+            count=count,
+        )
+        db.execute(statement.on_conflict_do_update(
+            index_elements=list(BUCKET_KEY),
+            set_={
+                "total_minor": DailyRollup.total + statement.excluded.total_minor,
+                "count": DailyRollup.count + statement.excluded.count,
+            },
+        ))
+        return
+
+    result = db.execute(
+        update(DailyRollup)
+        .where(*key)
+        .values(total=DailyRollup.total + amount, count=DailyRollup.count + count)
+    )
+    if result.rowcount == 0 and count > 0:
+        db.execute(
+            insert(DailyRollup).values(
+                user_id=user_id,
+                category_id=category_id,
+                day=day,
+                type=type,
+                currency=currency,
+                total=amount,
+                count=count,
+            )
+        )
+    elif count < 0:
+        db.execute(delete(DailyRollup).where(*key, DailyRollup.count <= 0))
+
+
+def _apply(db: Session, transaction: Transaction, sign: int):
+    if transaction.date is None or transaction.type is None:
+        return
+    _bump(
+        db,
+        transaction.user_id,
+        transaction.category_id,
+        transaction.date,
+        transaction.type,
+        transaction.currency,
+        (transaction.amount or 0) * sign,
+        sign,
+    )
+
+
+def add_transaction(db: Session, transaction: Transaction):
+    """Add a transaction's amount to its daily bucket"""
+    _apply(db, transaction, 1)
+
+
+def remove_transaction(db: Session, transaction: Transaction):
+    """Subtract a transaction's amount from its daily bucket"""
+    _apply(db, transaction, -1)
+
+
+def add_rows(db: Session, rows: Iterable[dict]):
+    """
+    Fold a batch of bulk-inserted transaction rows into their buckets.
+
+    Rows are pre-aggregated, so each touched bucket is written once per batch.
+    """
+    buckets: Dict[tuple, List] = defaultdict(lambda: [Decimal(0), 0])
+    for row in rows:
+        if row.get("date") is None or row.get("type") is None:
+            continue
+        key = (row["user_id"], row.get("category_id"), row["date"], row["type"], row.get("currency"))
+        bucket = buckets[key]
+        bucket[0] += to_decimal(row.get("amount") or 0)
+        bucket[1] += 1
+
+    for key, (total, count) in buckets.items():
+        _bump(db, *key, total, count)
+
+
+def rebuild_rollups(db: Session, user_id: Optional[int] = None):
+    """Recompute rollups from the raw transactions table"""
+    purge = delete(DailyRollup)
+    source = select(
+        Transaction.user_id,
+        Transaction.category_id,
+        Transaction.date,
+        Transaction.type,
+        Transaction.currency,
+        func.sum(Transaction.amount),
+        func.count(Transaction.id),
+    ).where(Transaction.date.is_not(None), Transaction.type.is_not(None))
+    if user_id is not None:
+        purge = purge.where(DailyRollup.user_id == user_id)
+        source = source.where(Transaction.user_id == user_id)
+    source = source.group_by(
+        Transaction.user_id, Transaction.category_id, Transaction.date, Transaction.type, Transaction.currency
+    )
+
+    db.execute(purge)
+    db.execute(
+        insert(DailyRollup).from_select(
+            [
+                DailyRollup.user_id, DailyRollup.category_id, DailyRollup.day, DailyRollup.type,
+                DailyRollup.currency, DailyRollup.total, DailyRollup.count,
+            ],
+            source,
+        )
+    )
+
+
+def ensure_rollups(db: Session):
+    """Backfill rollups for databases that predate the rollup table or its bucket index"""
+    if db.query(DailyRollup.id).first() is None and db.query(Transaction.id).first() is not None:
+        rebuild_rollups(db)
+        db.commit()
+    # Reflection skips expression indexes, so let the database do the check
+    create_index = CreateIndex(bucket_index, if_not_exists=True)
+    try:
+        db.execute(create_index)
+        db.commit()
+    except IntegrityError:
+        # The old constraint let a bucket in twice; a rebuild merges them
+        db.rollback()
+        rebuild_rollups(db)
+        db.execute(create_index)
+        db.commit()
+
+
+def add_months(value: date, months: int) -> date:
+    """``value`` moved by whole months, clamped to the last day of short months"""
+    month_index = value.month - 1 + months
+    year = value.year + month_index // 12
+    month = month_index % 12 + 1
+    # Clamp to the last day of the target month
+    next_month = date(year + month // 12, month % 12 + 1, 1)
+    last_day = (next_month - timedelta(days=1)).day
+    return date(year, month, min(value.day, last_day))
+
+
+def _advance(start: date, period: Optional[str], steps: int) -> date:
+    if period == "weekly":
+        return start + timedelta(weeks=steps)
+    if period == "yearly":
+        return add_months(start, 12 * steps)
+    return add_months(start, steps)
+
+
+def budget_window(budget: Budget, today: Optional[date] = None) -> Tuple[date, date]:
+    """
+    Date range a budget's spend is measured over.
+
+    Budgets with an explicit end date cover ``start_date..end_date``;
+    open-ended budgets cover the period instance (weekly, monthly, yearly,
+    anchored at ``start_date``) that contains today.
+    """
+    today = today or date.today()
+    start = budget.start_date or today
+    if budget.end_date is not None:
+        return start, budget.end_date
+
+    if today <= start:
+        return start, _advance(start, budget.period, 1) - timedelta(days=1)
+
+    # Jump close to the current period, then step forward
+    if budget.period == "weekly":
+        steps = (today - start).days // 7
+    elif budget.period == "yearly":
+        steps = max(today.year - start.year - 1, 0)
+    else:
+        steps = max((today.year - start.year) * 12 + today.month - start.month - 1, 0)
+    while _advance(start, budget.period, steps + 1) <= today:
+        steps += 1
+    period_start = _advance(start, budget.period, steps)
+    return period_start, _advance(start, budget.period, steps + 1) - timedelta(days=1)
+
+
+def _budget_scan(budget: Budget, today: Optional[date]):
+    """Filters on the rollup rows a budget's spend is summed over"""
+    start, end = budget_window(budget, today)
+    filters = (
+        DailyRollup.user_id == budget.user_id,
+        DailyRollup.day >= start,
+        DailyRollup.day <= end,
+        DailyRollup.type == "expense",
+    )
+    # A budget without a category covers all spending, not just uncategorized rows
+    if budget.category_id is not None:
+        filters += (DailyRollup.category_id == budget.category_id,)
+    return filters
+
+
+def _run_union(db: Session, selects: List):
+    """Execute ``selects`` as ``UNION ALL`` statements of up to ``_UNION_CHUNK`` terms"""
+    for offset in range(0, len(selects), _UNION_CHUNK):
+        chunk = selects[offset:offset + _UNION_CHUNK]
+        yield from db.execute(chunk[0] if len(chunk) == 1 else union_all(*chunk))
+
+
+def budget_spend(
+    db: Session,
+    budgets: Iterable[Budget],
+    today: Optional[date] = None,
+    target: str = exchange_rates.DEFAULT_REPORTING_CURRENCY,
+) -> Dict[int, Decimal]:
+    """
+    Expense totals per budget id in ``target`` currency, one rollup range
+    scan per budget.
+
+    All scans are sent as a single ``UNION ALL`` statement per chunk.
+    Spend without a rate into ``target`` is left out; see
+    ``budget_missing_rates``.
+    """
+    # One rates CTE, shared by every term of the union
+    conversion = exchange_rates.RollupConversion(target)
+    selects = [
+        conversion.join(select(
+            literal(budget.id).label("budget_id"),
+            func.coalesce(conversion.converted_sum(), 0).label("spent"),
+        )).where(*_budget_scan(budget, today))
+        for budget in budgets
+    ]
+    return {budget_id: amount or Decimal(0) for budget_id, amount in _run_union(db, selects)}
+
+
+def budget_missing_rates(
+    db: Session,
+    budgets: Iterable[Budget],
+    today: Optional[date] = None,
+    target: str = exchange_rates.DEFAULT_REPORTING_CURRENCY,
+) -> Dict[int, List[str]]:
+    """Currencies per budget id whose spend ``budget_spend`` left out for want of a rate"""
+    currency = exchange_rates.rollup_currency()
+    conversion = exchange_rates.RollupConversion(target)
+    selects = [
+        conversion.join(select(literal(budget.id).label("budget_id"), currency.label("currency")))
+        .where(*_budget_scan(budget, today), ~conversion.convertible())
+        .group_by(currency)
+        for budget in budgets
+    ]
+    missing: Dict[int, List[str]] = defaultdict(list)
+    for budget_id, code in _run_union(db, selects):
+        missing[budget_id].append(code)
+    return {budget_id: sorted(codes) for budget_id, codes in missing.items()}
+
+
+GRANULARITIES = ("day", "week", "month")
+GROUP_BYS = ("category", "type")
+
+
+def _period_start(dialect: str, granularity: str):
+    """SQL expression for the first day of the bucket containing ``day``"""
+    day = DailyRollup.day
+    if granularity == "day":
+        return day
+    if dialect == "postgresql":
+        return cast(func.date_trunc(granularity, day), Date)
+    if granularity == "month":
+        return func.strftime("%Y-%m-01", day)
+    # SQLite's %w is 0 on Sunday; weeks start on Monday, as with date_trunc
+    return func.date(day, func.printf("-%d days", (func.strftime("%w", day) + 6) % 7))
+
+
+def timeseries(
+    db: Session,
+    user_id: int,
+    granularity: str = "month",
+    group_by: str = "category",
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    currency: Optional[str] = None,
+    type: Optional[str] = None,
+    target: str = exchange_rates.DEFAULT_REPORTING_CURRENCY,
+) -> List[tuple]:
+    """
+    ``(period_start, key, label, currency, total, count)`` rows, oldest first.
+
+    Daily rollups are summed into week or month buckets in SQL, so a chart
+    costs one row per bucket and series rather than one per transaction.
+    Totals are converted into ``target``, which is each row's currency.
+    """
+    period = _period_start(db.get_bind().dialect.name, granularity).label("period")
+    conversion = exchange_rates.RollupConversion(target)
+    total = conversion.converted_sum()
+    if group_by == "category":
+        key_columns = (DailyRollup.category_id, Category.name)
+    else:
+        key_columns = (DailyRollup.type, DailyRollup.type.label("label"))
+
+    query = select(
+        period,
+        *key_columns,
+        total,
+        conversion.converted_count(),
+    ).where(DailyRollup.user_id == user_id)
+    if group_by == "category":
+        query = query.outerjoin(Category, Category.id == DailyRollup.category_id)
+    query = conversion.join(query)
+    if date_from:
+        query = query.where(DailyRollup.day >= date_from)
+    if date_to:
+        query = query.where(DailyRollup.day <= date_to)
+    if currency:
+        query = query.where(DailyRollup.currency == currency)
+    if type:
+        query = query.where(DailyRollup.type == type)
+    # Buckets with nothing convertible are left out, not charted as zero
+    query = query.group_by(period, *key_columns).having(total.is_not(None)).order_by(period)
+
+    rows = []
+    for period_start, key, label, total, count in db.execute(query):
+        if isinstance(period_start, str):
+            # SQLite date functions return text
+            period_start = date.fromisoformat(period_start)
+        rows.append((period_start, key, label, target, total or Decimal(0), count or 0))
+    return rows
+
+
+def timeseries_report(
+    db: Session,
+    user_id: int,
+    granularity: str = "month",
+    group_by: str = "category",
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    currency: Optional[str] = None,
+    type: Optional[str] = None,
+    target: str = exchange_rates.DEFAULT_REPORTING_CURRENCY,
+) -> TimeSeriesResponse:
+    """``timeseries`` rows as one series per key, the shape the API serves"""
+    series: Dict[Tuple, TimeSeries] = {}
+    for period_start, key, label, row_currency, total, count in timeseries(
+        db, user_id, granularity, group_by, date_from, date_to, currency, type, target
+    ):
+        entry = series.get((key, row_currency))
+        if entry is None:
+            entry = series[(key, row_currency)] = TimeSeries(
+                key=key, label=label or "Uncategorized", currency=row_currency, points=[]
+            )
+        entry.points.append(TimeSeriesPoint(period_start=period_start, total=total, count=count))
+
+    return TimeSeriesResponse(
+        granularity=granularity,
+        group_by=group_by,
+        series=list(series.values()),
+        date_from=date_from,
+        date_to=date_to,
+        currency=currency,
+        type=type,
+        reporting_currency=target,
+        # A currency filter leaves nothing to convert
+        missing_rates=[] if currency else exchange_rates.missing_currencies(db, user_id, target, date_from, date_to),
+    )
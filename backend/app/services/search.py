@@ -0,0 +1,113 @@
+"""
+Full-text search over transaction descriptions.
+
+SQLite gets an external-content FTS5 table kept in sync by triggers, so
+every write path (handlers, bulk import, raw SQL) is covered. PostgreSQL
+gets a GIN expression index on the description's ``tsvector`` and needs
+no sync at all. Queries are split into words and every word is matched as
+a prefix, so "ube ea" finds "Uber Eats".
+"""
+import re
+from typing import List, Optional, Tuple
+from sqlalchemy import column, false, func, literal_column, select, table, text
+from sqlalchemy.engine import Engine
+from app.db.database import engine
+from app.models.transaction import Transaction
+
+FTS_TABLE = "transactions_fts"
+PG_INDEX = "ix_transactions_description_fts"
+
+_fts = table(FTS_TABLE, column("rowid"), column("rank"), column(FTS_TABLE))
+
+# Must match the indexed expression exactly for PostgreSQL to use it
+_pg_vector = func.to_tsvector(
+    literal_column("'simple'::regconfig"), func.coalesce(Transaction.description, literal_column("''"))
+)
+
+_SQLITE_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        description, content='transactions', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS transactions_fts_insert AFTER INSERT ON transactions BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, description) VALUES (new.id, new.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS transactions_fts_delete AFTER DELETE ON transactions BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, description) VALUES ('delete', old.id, old.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS transactions_fts_update AFTER UPDATE OF description ON transactions BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, description) VALUES ('delete', old.id, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, description) VALUES (new.id, new.description);
+    END""",
+]
+
+# Set once the index exists; until then search falls back to LIKE
+fts_enabled = False
+
+
+def ensure_search_index(bind: Engine = engine) -> bool:
+    """
+    Create the search index (and backfill it) if the database lacks it.
+
+    Returns False when the backend has no supported full-text index, e.g.
+    SQLite built without FTS5.
+    """
+    global fts_enabled
+    dialect = bind.dialect.name
+    with bind.begin() as connection:
+        if dialect == "sqlite":
+            triggers = connection.execute(text(
+                "SELECT count(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'transactions_fts_%'"
+            )).scalar()
+            try:
+                for statement in _SQLITE_DDL:
+                    connection.exec_driver_sql(statement)
+            except Exception as error:
+                if "fts5" not in str(error):
+                    raise
+                return False
+            # Dropping ``transactions`` drops the triggers too; resync from scratch
+            if triggers < 3:
+                connection.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+        elif dialect == "postgresql":
+            connection.exec_driver_sql(
+                f"CREATE INDEX IF NOT EXISTS {PG_INDEX} ON transactions "
+                "USING gin (to_tsvector('simple'::regconfig, coalesce(description, '')))"
+            )
+        else:
+            return False
+    fts_enabled = True
+    return True
+
+
+def _terms(q: str) -> List[str]:
+    return re.findall(r"\w+", q.lower())
+
+
+def apply_search(query, q: str, relevance: bool = False, dialect: Optional[str] = None) -> Tuple[object, Optional[object]]:
+    """
+    Restrict a transaction select to rows matching ``q``.
+
+    Returns the filtered query and, when ``relevance`` is set, a "best match
+    first" ordering expression to put ahead of the usual date ordering.
+    """
+    terms = _terms(q)
+    if not terms:
+        return query.where(false()), None
+    dialect = dialect or engine.dialect.name
+
+    if fts_enabled and dialect == "sqlite":
+        match = _fts.c[FTS_TABLE].match(" ".join(f'"{term}"*' for term in terms))
+        if relevance:
+            # FTS5's rank is bm25, where lower is better
+            return query.join(_fts, _fts.c.rowid == Transaction.id).where(match), _fts.c.rank
+        # Materialized once, so date-ordered pages still walk the listing index
+        return query.where(Transaction.id.in_(select(_fts.c.rowid).where(match))), None
+    if fts_enabled and dialect == "postgresql":
+        tsquery = func.to_tsquery(literal_column("'simple'::regconfig"), " & ".join(f"{term}:*" for term in terms))
+        query = query.where(_pg_vector.op("@@")(tsquery))
+        return query, func.ts_rank(_pg_vector, tsquery).desc() if relevance else None
+
+    for term in terms:
+        query = query.where(Transaction.description.ilike(f"%{term}%"))
+    return query, None
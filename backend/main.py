@@ -1,6 +1,14 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.db.database import create_db_and_tables
+from app.db.database import create_db_and_tables, SessionLocal, engine, async_engine
+from app.services.rollups import ensure_rollups
+from app.services.search import ensure_search_index
+from app.services import exchange_rates
+from app.services.passwords import password_hasher
+from app.services import recurring
+from app.services.duplicates import backfill_fingerprints
+from app.services.jobs import job_queue, JOBS_ENABLED
+from app.db.writer import write_queue
 
 # Import routers
 from app.api.auth import router as auth_router
@@ -8,6 +16,14 @@ from app.api.transactions import router as transactions_router
 from app.api.categories import router as categories_router
 from app.api.budgets import router as budgets_router
 from app.api.health import router as health_router
+from app.api.analytics import router as analytics_router
+from app.api.rules import router as rules_router
+from app.api.sync import router as sync_router
+from app.api.exchange_rates import router as exchange_rates_router
+from app.api.recurring import router as recurring_router
+from app.api.jobs import router as jobs_router
+from app.api.pagination import NEXT_CURSOR_HEADER
+from app.api.metrics import router as metrics_router, MetricsMiddleware, instrument_engine
 
 app = FastAPI(title="Personal Finance Tracker")
 
@@ -18,18 +34,56 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag"],
 )
+# Outermost, so it times everything below it
+app.add_middleware(MetricsMiddleware)
+
+instrument_engine(engine, "sync")
+instrument_engine(async_engine.sync_engine, "async")
+if write_queue is not None:
+    instrument_engine(write_queue.bind, "writer")
 
 # Include routers
 app.include_router(auth_router, prefix="/api/auth", tags=["auth"])
 app.include_router(transactions_router, prefix="/api/transactions", tags=["transactions"])
 app.include_router(categories_router, prefix="/api/categories", tags=["categories"])
 app.include_router(budgets_router, prefix="/api/budgets", tags=["budgets"])
+app.include_router(analytics_router, prefix="/api/analytics", tags=["analytics"])
+app.include_router(rules_router, prefix="/api/rules", tags=["rules"])
+app.include_router(sync_router, prefix="/api", tags=["sync"])
+app.include_router(exchange_rates_router, prefix="/api/exchange-rates", tags=["exchange-rates"])
+app.include_router(recurring_router, prefix="/api/recurring", tags=["recurring"])
+app.include_router(jobs_router, prefix="/api/jobs", tags=["jobs"])
 app.include_router(health_router, prefix="/api", tags=["health"])
+app.include_router(metrics_router, tags=["metrics"])
 
 @app.on_event("startup")
 def on_startup():
     create_db_and_tables()
+    ensure_search_index()
+    db = SessionLocal()
+    try:
+        ensure_rollups(db)
+        backfill_fingerprints(db)
+        if exchange_rates.EXCHANGE_RATES_FILE:
+            exchange_rates.load_rates_file(db, exchange_rates.EXCHANGE_RATES_FILE)
+        recurring.recurring_scheduler.load(db)
+    finally:
+        db.close()
+    if recurring.RECURRING_SCHEDULER_ENABLED:
+        recurring.recurring_scheduler.start()
+    if JOBS_ENABLED:
+        job_queue.start()
+
+@app.on_event("shutdown")
+def on_shutdown():
+    recurring.recurring_scheduler.shutdown()
+    # Before the writer: finishing jobs still record their outcome
+    job_queue.shutdown()
+    password_hasher.shutdown()
+    if write_queue is not None:
+        write_queue.shutdown()
 
 @app.get("/")
 async def root():
@@ -0,0 +1,293 @@
+"""
+Load-test the API in-process and report latency percentiles as JSON.
+
+Seeds a throwaway database with synthetic users x categories x
+transactions (scripts/setup_database.py:seed_synthetic), starts the real
+FastAPI app and drives it through httpx's ASGI transport, once
+sequentially and once from a concurrent async load generator. Each
+workload reports throughput and p50/p95/p99 latency.
+
+Usage:
+    python scripts/benchmark_api.py --transactions 20000 --output results.json
+    python scripts/benchmark_api.py --baseline results.json   # exit 1 on regressions
+
+Runs are deterministic for a given --seed, so results from the same
+machine can be compared against a stored baseline. BCRYPT_ROUNDS and the
+SQLITE_* settings are read from the environment as usual.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Throwaway database so the benchmark never touches real data; setdefault
+# lets tests point it at their own database
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/benchmark.db")
+
+import httpx
+from app.core import serialization
+from app.db.database import Base, engine, SessionLocal, sqlite_performance_mode
+from scripts.setup_database import seed_synthetic
+
+PASSWORD = "password123"
+PERCENTILES = (50, 95, 99)
+
+
+class Workload:
+    """A named request mix; ``build(user, rng)`` returns (method, url, httpx kwargs)"""
+
+    def __init__(self, name: str, build: Callable, authenticated: bool = True):
+        self.name = name
+        self.build = build
+        self.authenticated = authenticated
+
+
+def _date_range(rng: random.Random, start: date, days: int):
+    date_from = start + timedelta(days=rng.randrange(max(days - 30, 1)))
+    return date_from.isoformat(), (date_from + timedelta(days=30)).isoformat()
+
+
+def workloads(start: date, days: int) -> List[Workload]:
+    def listing(user, rng):
+        return "GET", "/api/transactions/", {"params": {"limit": 50}}
+
+    def filtering(user, rng):
+        date_from, date_to = _date_range(rng, start, days)
+        params = {"limit": 50, "date_from": date_from, "date_to": date_to}
+        if rng.random() < 0.5 and user["category_ids"]:
+            params["category_id"] = rng.choice(user["category_ids"])
+        else:
+            params["q"] = rng.choice(("grocery", "coffee", "rent", "taxi"))
+        return "GET", "/api/transactions/", {"params": params}
+
+    def creating(user, rng):
+        return "POST", "/api/transactions/", {"json": {
+            "amount": round(rng.uniform(1, 500), 2),
+            "description": "Benchmark purchase",
+            "date": (start + timedelta(days=rng.randrange(days))).isoformat(),
+            "type": "expense",
+            "category_id": rng.choice(user["category_ids"]) if user["category_ids"] else None,
+        }}
+
+    def auth(user, rng):
+        return "POST", "/api/auth/token", {"data": {"username": user["email"], "password": PASSWORD}}
+
+    def dashboard(user, rng):
+        date_from, date_to = _date_range(rng, start, days)
+        return rng.choice((
+            ("GET", "/api/analytics/dashboard", {"params": {"date_from": date_from, "date_to": date_to}}),
+            ("GET", "/api/analytics/timeseries", {"params": {"granularity": "month", "group_by": "category"}}),
+            ("GET", "/api/budgets/", {}),
+            ("GET", "/api/categories/", {}),
+        ))
+
+    return [
+        Workload("list", listing),
+        Workload("filter", filtering),
+        Workload("create", creating),
+        Workload("auth", auth, authenticated=False),
+        Workload("dashboard", dashboard),
+    ]
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(pct / 100 * len(sorted_values))
+    return sorted_values[min(max(rank, 1), len(sorted_values)) - 1]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict:
+    latencies = sorted(latencies)
+    result = {
+        "requests": len(latencies),
+        "errors": errors,
+        "seconds": round(elapsed, 4),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0,
+    }
+    for pct in PERCENTILES:
+        result[f"p{pct}_ms"] = round(percentile(latencies, pct) * 1000, 3)
+    return result
+
+
+async def run_workload(client: httpx.AsyncClient, workload: Workload, users: List[Dict],
+                       requests: int, concurrency: int, seed: int) -> Dict:
+    """Issue ``requests`` requests from ``concurrency`` workers; returns the summary"""
+    rng = random.Random(f"{seed}:{workload.name}:{concurrency}")
+    plan = []
+    for _ in range(requests):
+        user = rng.choice(users)
+        plan.append((user, workload.build(user, rng)))
+    latencies: List[float] = []
+    errors = [0]
+    position = iter(plan)
+
+    async def worker():
+        for user, (method, url, kwargs) in position:
+            headers = user["headers"] if workload.authenticated else None
+            started = time.perf_counter()
+            response = await client.request(method, url, headers=headers, **kwargs)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors[0] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors[0], time.perf_counter() - started)
+
+
+async def _login(client: httpx.AsyncClient, emails: List[str]) -> List[Dict]:
+    users = []
+    for email in emails:
+        response = await client.post("/api/auth/token", data={"username": email, "password": PASSWORD})
+        response.raise_for_status()
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        categories = (await client.get("/api/categories/", headers=headers)).json()
+        users.append({"email": email, "headers": headers, "category_ids": [c["id"] for c in categories]})
+    return users
+
+
+async def run_benchmark(emails: List[str], requests: int, concurrency: int, seed: int,
+                        start: date, days: int, only: Optional[List[str]] = None) -> Dict:
+    """Drive the app through every workload, sequentially then concurrently"""
+    from main import app
+
+    await app.router.startup()
+    try:
+        async with httpx.AsyncClient(app=app, base_url="http://benchmark") as client:
+            users = await _login(client, emails)
+            results = {}
+            for workload in workloads(start, days):
+                if only and workload.name not in only:
+                    continue
+                # Auth is bcrypt-bound by design; a smaller sample keeps runs short
+                count = max(requests // 10, concurrency) if workload.name == "auth" else requests
+                results[workload.name] = {
+                    "sequential": await run_workload(client, workload, users, count, 1, seed),
+                    "concurrent": await run_workload(client, workload, users, count, concurrency, seed),
+                }
+                print(_format(workload.name, results[workload.name]))
+            return results
+    finally:
+        await app.router.shutdown()
+
+
+def _format(name: str, phases: Dict) -> str:
+    lines = []
+    for phase, stats in phases.items():
+        lines.append(
+            f"  {name:10s} {phase:10s} {stats['throughput_rps']:9.1f} req/s"
+            f"  p50 {stats['p50_ms']:8.2f}  p95 {stats['p95_ms']:8.2f}  p99 {stats['p99_ms']:8.2f} ms"
+            + (f"  ({stats['errors']} errors)" if stats["errors"] else "")
+        )
+    return "\n".join(lines)
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """
+    Regressions against ``baseline``: p95 latency up or throughput down by
+    more than ``tolerance`` (a fraction), per workload and phase
+    """
+    regressions = []
+    for name, phases in results["workloads"].items():
+        for phase, stats in phases.items():
+            before = baseline.get("workloads", {}).get(name, {}).get(phase)
+            if not before:
+                continue
+            if before["p95_ms"] and stats["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+                regressions.append(f"{name}/{phase}: p95 {before['p95_ms']} -> {stats['p95_ms']} ms")
+            if stats["throughput_rps"] < before["throughput_rps"] * (1 - tolerance):
+                regressions.append(
+                    f"{name}/{phase}: throughput {before['throughput_rps']} -> {stats['throughput_rps']} req/s"
+                )
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=4)
+    parser.add_argument("--categories", type=int, default=12, help="categories per user")
+    parser.add_argument("--transactions", type=int, default=5000, help="transactions per user")
+    parser.add_argument("--days", type=int, default=365, help="days the transactions span")
+    parser.add_argument("--requests", type=int, default=500, help="requests per workload and phase")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workload", action="append", help="run only these workloads (repeatable)")
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--baseline", help="compare against this results JSON")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed regression, as a fraction")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    start = date(2024, 1, 1)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        seeded = time.perf_counter()
+        emails = seed_synthetic(
+            db, args.users, args.categories, args.transactions, PASSWORD, start, args.days, args.seed
+        )
+        seed_seconds = time.perf_counter() - seeded
+    finally:
+        db.close()
+    print(
+        f"{args.users} users x {args.categories} categories x {args.transactions} transactions"
+        f" seeded in {seed_seconds:.1f}s; {args.requests} requests per workload, concurrency {args.concurrency}"
+    )
+
+    results = {
+        "created_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "dataset": {
+            "users": args.users,
+            "categories": args.categories,
+            "transactions": args.transactions,
+            "days": args.days,
+            "seed": args.seed,
+            "seed_seconds": round(seed_seconds, 2),
+        },
+        "load": {"requests": args.requests, "concurrency": args.concurrency},
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "database": engine.dialect.name,
+            "sqlite_performance_mode": sqlite_performance_mode(),
+            "encoder": "orjson" if serialization.orjson is not None else "json",
+            "bcrypt_rounds": os.getenv("BCRYPT_ROUNDS"),
+        },
+        "workloads": asyncio.run(run_benchmark(
+            emails, args.requests, args.concurrency, args.seed, start, args.days, args.workload
+        )),
+    }
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2) + "\n")
+        print(f"Results written to {args.output}")
+
+    if args.baseline:
+        regressions = compare(results, json.loads(Path(args.baseline).read_text()), args.tolerance)
+        for regression in regressions:
+            print(f"  REGRESSION {regression}")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.tolerance:.0%} of {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
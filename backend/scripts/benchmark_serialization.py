@@ -0,0 +1,74 @@
+"""
+Compare the transaction listing serializers on a page of rows.
+
+"orm" is the response_model path: ORM entities -> from_orm -> jsonable_encoder
+-> JSONResponse. "rows" is the fast path used by GET /api/transactions/:
+column tuples -> dumps_rows. Usage: python scripts/benchmark_serialization.py [rows] [repeat]
+"""
+import os
+import sys
+import tempfile
+import timeit
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Throwaway database so the benchmark never touches real data
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/benchmark.db"
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import insert, select
+from app.db.database import Base, engine, SessionLocal
+from app.models.transaction import Transaction
+from app.schemas.transaction import Transaction as TransactionSchema
+from app.core import serialization
+from app.api.transactions import LIST_COLUMNS
+
+def seed(db, count):
+    start = date(2024, 1, 1)
+    db.execute(insert(Transaction), [
+        {
+            "amount": round(i * 1.37 % 500, 2),
+            "description": f"Transaction {i}",
+            "date": start + timedelta(days=i % 365),
+            "type": "expense" if i % 4 else "income",
+            "category_id": i % 12 or None,
+            "currency": "INR",
+            "user_id": 1,
+        }
+        for i in range(count)
+    ])
+    db.commit()
+
+def orm_path(db, query):
+    transactions = db.execute(query).scalars().all()
+    models = [TransactionSchema.from_orm(transaction) for transaction in transactions]
+    return JSONResponse(jsonable_encoder(models)).body
+
+def rows_path(db, query):
+    rows = db.execute(query.with_only_columns(*[getattr(Transaction, name) for name in LIST_COLUMNS])).all()
+    return serialization.dumps_rows(LIST_COLUMNS, rows)
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        seed(db, count)
+        query = select(Transaction).order_by(Transaction.date.desc(), Transaction.id.desc())
+        encoder = "orjson" if serialization.orjson is not None else "json"
+        print(f"{count} rows, best of {repeat} runs, encoder={encoder}")
+        timings = {}
+        for name, path in (("orm", orm_path), ("rows", rows_path)):
+            # Fresh identity map each run, as a request would have
+            timings[name] = min(timeit.repeat(lambda: (path(db, query), db.expunge_all()), number=1, repeat=repeat))
+            print(f"  {name:5s} {timings[name] * 1000:8.2f} ms")
+        print(f"  speedup {timings['orm'] / timings['rows']:.1f}x")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -1,33 +1,168 @@
 import os
+import random
 import sys
+from datetime import date, timedelta
 from pathlib import Path
 
 # Add the parent directory to the Python path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+# The setup script has always defaulted to the Docker data directory
+os.environ.setdefault("DATABASE_URL", "sqlite:///./data/finance_tracker.db")
 
-from app.db.database import Base
+from sqlalchemy import insert
+from app.db.database import Base, engine, SessionLocal, ensure_columns, ensure_indexes, migrate_replaced_columns
 from app.models.user import User
 from app.models.category import Category
 from app.models.transaction import Transaction
 from app.models.budget import Budget
-from passlib.context import CryptContext
-
-# Set up database connection
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./data/finance_tracker.db")
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-# Set up password context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.models.rollup import DailyRollup
+from app.models.rule import CategoryRule
+from app.models.sync import SyncTombstone
+from app.models.exchange_rate import ExchangeRate, ReportingRate
+from app.models.recurring import RecurringRule
+from app.models.job import Job
+from app.services.rollups import ensure_rollups, rebuild_rollups
+from app.services.search import ensure_search_index
+from app.services.sync import next_seq
+from app.services.duplicates import backfill_fingerprints, stamp
+from app.services import exchange_rates
+from app.services.passwords import password_hasher
 
 def create_database():
     """Create all tables in the database"""
     # Create database tables
     Base.metadata.create_all(bind=engine)
     print("✅ Database tables created")
+    # Float amounts from older versions become integer minor units
+    for column in migrate_replaced_columns(engine):
+        print(f"✅ Migrated {column} to exact minor units")
+    # create_all skips columns and indexes on tables that already exist
+    ensure_columns(engine)
+    ensure_indexes(engine)
+    print("✅ Database indexes created")
+    if ensure_search_index(engine):
+        print("✅ Full-text search index created")
+    db = SessionLocal()
+    try:
+        # Builds the rollup bucket index, merging any duplicate buckets first
+        ensure_rollups(db)
+        backfilled = backfill_fingerprints(db)
+    finally:
+        db.close()
+    if backfilled:
+        print(f"✅ Fingerprinted {backfilled} existing transactions")
+
+def load_exchange_rates(path):
+    """Load the shared exchange-rate CSV; rates are not importable over the API"""
+    db = SessionLocal()
+    try:
+        result = exchange_rates.load_rates_file(db, path)
+    finally:
+        db.close()
+    print(f"✅ Loaded {result.imported} exchange rates ({result.failed} rows rejected)")
+    for error in result.errors[:10]:
+        print(f"   row {error.row}: {error.error}")
+
+DEFAULT_CATEGORIES = [
+    ("Housing", "#4a6cf7"),
+    ("Transportation", "#f59e0b"),
+    ("Food", "#10b981"),
+    ("Utilities", "#6366f1"),
+    ("Entertainment", "#ec4899"),
+    ("Health", "#ef4444"),
+    ("Shopping", "#8b5cf6"),
+    ("Personal Care", "#14b8a6"),
+    ("Education", "#f97316"),
+    ("Salary", "#22c55e"),
+    ("Investments", "#64748b"),
+    ("Gifts", "#a855f7"),
+]
+
+# (amount, description, date, type, category)
+SAMPLE_TRANSACTIONS = [
+    (1200.00, "Monthly rent", date(2025, 6, 1), "expense", "Housing"),
+    (3500.00, "Salary", date(2025, 6, 5), "income", "Salary"),
+    (85.75, "Grocery shopping", date(2025, 6, 7), "expense", "Food"),
+    (45.00, "Gas", date(2025, 6, 6), "expense", "Transportation"),
+    (120.50, "Electric bill", date(2025, 6, 3), "expense", "Utilities"),
+    (200.00, "Investment deposit", date(2025, 6, 4), "expense", "Investments"),
+    (35.99, "Streaming services", date(2025, 6, 2), "expense", "Entertainment"),
+]
+
+# (category, amount); all cover June 2025
+SAMPLE_BUDGETS = [
+    ("Housing", 1300.00),
+    ("Food", 400.00),
+    ("Transportation", 200.00),
+    ("Entertainment", 150.00),
+]
+
+# Descriptions for synthetic data, so search and rules have realistic text to work on
+SYNTHETIC_MERCHANTS = [
+    "Grocery shopping", "Coffee shop", "Fuel station", "Electric bill", "Streaming services",
+    "Pharmacy", "Online order", "Restaurant", "Taxi ride", "Gym membership",
+    "Book store", "Salary", "Monthly rent", "Mobile recharge", "Investment deposit",
+]
+
+def seed_user(db, email, hashed_password, category_count=len(DEFAULT_CATEGORIES)):
+    """Create a user with ``category_count`` categories; returns (user, {name: category})"""
+    user = User(email=email, hashed_password=hashed_password)
+    db.add(user)
+    db.flush()
+    categories = {}
+    for index in range(category_count):
+        name, color = DEFAULT_CATEGORIES[index % len(DEFAULT_CATEGORIES)]
+        if index >= len(DEFAULT_CATEGORIES):
+            name = f"{name} {index // len(DEFAULT_CATEGORIES) + 1}"
+        categories[name] = Category(name=name, color=color, user_id=user.id)
+        db.add(categories[name])
+    db.flush()
+    return user, categories
+
+def seed_synthetic(db, users=1, categories=12, transactions=1000, password="password123",
+                   start=date(2024, 1, 1), days=365, seed=0):
+    """
+    Bulk-load ``users`` users, each with ``categories`` categories and
+    ``transactions`` transactions spread over ``days`` days from ``start``.
+
+    Deterministic for a given ``seed``, so benchmark runs are comparable.
+    Users are named user{n}@example.com and share one password hash.
+    Returns the created users' emails.
+    """
+    rng = random.Random(seed)
+    hashed_password = password_hasher.hash_sync(password)
+    emails = []
+    for number in range(users):
+        email = f"user{number}@example.com"
+        user, user_categories = seed_user(db, email, hashed_password, categories)
+        category_ids = [category.id for category in user_categories.values()]
+        # Core inserts skip the flush hooks, so stamp the sequence and fingerprints here
+        seq = next_seq(db, user.id)
+        rows = []
+        for _ in range(transactions):
+            income = rng.random() < 0.1
+            rows.append({
+                "amount": round(rng.uniform(1000, 5000) if income else rng.lognormvariate(3.5, 1.0), 2),
+                "description": rng.choice(SYNTHETIC_MERCHANTS),
+                "date": start + timedelta(days=rng.randrange(days)),
+                "type": "income" if income else "expense",
+                "category_id": rng.choice(category_ids) if category_ids and rng.random() < 0.9 else None,
+                "currency": "INR",
+                "user_id": user.id,
+                "change_seq": seq,
+            })
+            if len(rows) == 5000:
+                stamp(rows)
+                db.execute(insert(Transaction), rows)
+                rows = []
+        if rows:
+            stamp(rows)
+            db.execute(insert(Transaction), rows)
+        rebuild_rollups(db, user.id)
+        db.commit()
+        emails.append(email)
+    return emails
 
 def seed_initial_data():
     """Seed the database with initial data"""
@@ -35,143 +170,42 @@ def seed_initial_data():
     try:
         # Create demo user
         if not db.query(User).filter(User.email == "demo@example.com").first():
-            demo_user = User(
-                email="demo@example.com",
-                hashed_password=pwd_context.hash("password123"),
+            demo_user, cat_dict = seed_user(
+                db, "demo@example.com", password_hasher.hash_sync("password123")
             )
-            db.add(demo_user)
             db.commit()
-            db.refresh(demo_user)
             print("✅ Demo user created")
-
-            # Create default categories
-            default_categories = [
-                {"name": "Housing", "color": "#4a6cf7", "user_id": demo_user.id},
-                {"name": "Transportation", "color": "#f59e0b", "user_id": demo_user.id},
-                {"name": "Food", "color": "#10b981", "user_id": demo_user.id},
-                {"name": "Utilities", "color": "#6366f1", "user_id": demo_user.id},
-                {"name": "Entertainment", "color": "#ec4899", "user_id": demo_user.id},
-                {"name": "Health", "color": "#ef4444", "user_id": demo_user.id},
-                {"name": "Shopping", "color": "#8b5cf6", "user_id": demo_user.id},
-                {"name": "Personal Care", "color": "#14b8a6", "user_id": demo_user.id},
-                {"name": "Education", "color": "#f97316", "user_id": demo_user.id},
-                {"name": "Salary", "color": "#22c55e", "user_id": demo_user.id},
-                {"name": "Investments", "color": "#64748b", "user_id": demo_user.id},
-                {"name": "Gifts", "color": "#a855f7", "user_id": demo_user.id},
-            ]
-
-            for cat_data in default_categories:
-                category = Category(**cat_data)
-                db.add(category)
-            
-            db.commit()
             print("✅ Default categories created")
 
             # Add sample transactions
-            categories = db.query(Category).filter(Category.user_id == demo_user.id).all()
-            cat_dict = {str(cat.name): cat for cat in categories}
-
-            sample_transactions = [
-                {
-                    "amount": 1200.00,
-                    "description": "Monthly rent",
-                    "date": "2025-06-01",
-                    "type": "expense",
-                    "category_id": cat_dict["Housing"].id,
-                    "user_id": demo_user.id,
-                },
-                {
-                    "amount": 3500.00,
-                    "description": "Salary",
-                    "date": "2025-06-05",
-                    "type": "income",
-                    "category_id": cat_dict["Salary"].id,
-                    "user_id": demo_user.id,
-                },
-                {
-                    "amount": 85.75,
-                    "description": "Grocery shopping",
-                    "date": "2025-06-07",
-                    "type": "expense",
-                    "category_id": cat_dict["Food"].id,
-                    "user_id": demo_user.id,
-                },
-                {
-                    "amount": 45.00,
-                    "description": "Gas",
-                    "date": "2025-06-06",
-                    "type": "expense",
-                    "category_id": cat_dict["Transportation"].id,
-                    "user_id": demo_user.id,
-                },
-                {
-                    "amount": 120.50,
-                    "description": "Electric bill",
-                    "date": "2025-06-03",
-                    "type": "expense",
-                    "category_id": cat_dict["Utilities"].id,
-                    "user_id": demo_user.id,
-                },
-                {
-                    "amount": 200.00,
-                    "description": "Investment deposit",
-                    "date": "2025-06-04",
-                    "type": "expense",
-                    "category_id": cat_dict["Investments"].id,
-                    "user_id": demo_user.id,
-                },
-                {
-                    "amount": 35.99,
-                    "description": "Streaming services",
-                    "date": "2025-06-02",
-                    "type": "expense",
-                    "category_id": cat_dict["Entertainment"].id,
-                    "user_id": demo_user.id,
-                },
-            ]
-
-            for tx_data in sample_transactions:
-                transaction = Transaction(**tx_data)
-                db.add(transaction)
+            for amount, description, day, type, category in SAMPLE_TRANSACTIONS:
+                db.add(Transaction(
+                    amount=amount,
+                    description=description,
+                    date=day,
+                    type=type,
+                    category_id=cat_dict[category].id,
+                    user_id=demo_user.id,
+                ))
             
             db.commit()
             print("✅ Sample transactions created")
 
+            rebuild_rollups(db, demo_user.id)
+            db.commit()
+            print("✅ Spend rollups built")
+
             # Add sample budgets
-            sample_budgets = [
-                {
-                    "category_id": cat_dict["Housing"].id,
-                    "amount": 1300.00,
-                    "start_date": "2025-06-01",
-                    "end_date": "2025-06-30",
-                    "user_id": demo_user.id,
-                },
-                {
-                    "category_id": cat_dict["Food"].id,
-                    "amount": 400.00,
-                    "start_date": "2025-06-01",
-                    "end_date": "2025-06-30",
-                    "user_id": demo_user.id,
-                },
-                {
-                    "category_id": cat_dict["Transportation"].id,
-                    "amount": 200.00,
-                    "start_date": "2025-06-01",
-                    "end_date": "2025-06-30",
-                    "user_id": demo_user.id,
-                },
-                {
-                    "category_id": cat_dict["Entertainment"].id,
-                    "amount": 150.00,
-                    "start_date": "2025-06-01",
-                    "end_date": "2025-06-30",
-                    "user_id": demo_user.id,
-                },
-            ]
-
-            for budget_data in sample_budgets:
-                budget = Budget(**budget_data)
-                db.add(budget)
+            for category, amount in SAMPLE_BUDGETS:
+                db.add(Budget(
+                    category_id=cat_dict[category].id,
+                    amount=amount,
+                    name=category,
+                    period="monthly",
+                    start_date=date(2025, 6, 1),
+                    end_date=date(2025, 6, 30),
+                    user_id=demo_user.id,
+                ))
             
             db.commit()
             print("✅ Sample budgets created")
@@ -193,8 +227,12 @@ def main():
     
     # Run migrations
     create_database()
+    if exchange_rates.EXCHANGE_RATES_FILE:
+        load_exchange_rates(exchange_rates.EXCHANGE_RATES_FILE)
     seed_initial_data()
     
+    password_hasher.shutdown()
+    
     print("✅ Migration completed successfully")
 
 
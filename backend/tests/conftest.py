@@ -0,0 +1,67 @@
+"""
+Shared fixtures for API tests
+"""
+import os
+import tempfile
+
+# Point the app at a throwaway database before anything imports it
+_db_dir = tempfile.mkdtemp(prefix="finance-tracker-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_dir}/test.db"
+os.environ["JOB_RESULTS_DIR"] = f"{_db_dir}/jobs"
+# Minimum bcrypt cost keeps the suite fast
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+# Tests drive the recurring scheduler by hand
+os.environ.setdefault("RECURRING_SCHEDULER_ENABLED", "false")
+
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+from app.api.auth import user_cache
+from app.services.categorizer import matcher_cache
+from app.api.conditional import response_cache
+from app.services.exchange_rates import rate_cache
+from app.db.database import Base, engine
+
+
+@pytest.fixture
+def client():
+    """
+    Test client backed by a freshly created schema
+    """
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    user_cache.clear()
+    matcher_cache.clear()
+    response_cache.clear()
+    rate_cache.clear()
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def auth_headers(client):
+    """
+    Register a user and return bearer auth headers for them
+    """
+    client.post("/api/auth/register", json={"email": "tester@example.com", "password": "secret123"})
+    response = client.post(
+        "/api/auth/token", data={"username": "tester@example.com", "password": "secret123"}
+    )
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def _explain(query) -> str:
+    compiled = query.compile(dialect=engine.dialect)
+    params = [compiled.params[name] for name in compiled.positiontup]
+    with engine.connect() as connection:
+        rows = connection.exec_driver_sql("EXPLAIN QUERY PLAN " + str(compiled), tuple(params)).all()
+    return " | ".join(row[-1] for row in rows)
+
+
+@pytest.fixture
+def query_plan():
+    """
+    Return a function giving a query's EXPLAIN QUERY PLAN steps, joined by " | "
+    """
+    return _explain
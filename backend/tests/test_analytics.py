@@ -0,0 +1,108 @@
+"""
+Test module for analytics API
+"""
+
+def _seed(client, headers):
+    food = client.post("/api/categories/", json={"name": "Food"}, headers=headers).json()
+    rent = client.post("/api/categories/", json={"name": "Rent"}, headers=headers).json()
+    rows = [
+        {"amount": 5000, "type": "income", "date": "2025-06-01"},
+        {"amount": 100, "type": "expense", "category_id": food["id"], "date": "2025-06-02"},
+        {"amount": 50, "type": "expense", "category_id": food["id"], "date": "2025-06-03"},
+        {"amount": 1200, "type": "expense", "category_id": rent["id"], "date": "2025-06-01"},
+        {"amount": 30, "type": "expense", "category_id": food["id"], "date": "2025-07-01", "currency": "USD"},
+    ]
+    for row in rows:
+        client.post("/api/transactions/", json=row, headers=headers)
+    return food, rent
+
+
+def test_dashboard_summary(client, auth_headers):
+    """
+    Test dashboard totals and top categories are aggregated per user
+    """
+    food, rent = _seed(client, auth_headers)
+
+    response = client.get("/api/analytics/dashboard", params={"currency": "INR"}, headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total_income"] == 5000
+    assert data["total_expenses"] == 1350
+    assert data["net_balance"] == 3650
+    assert data["transaction_count"] == 4
+    assert [c["id"] for c in data["top_categories"]] == [rent["id"], food["id"]]
+    assert data["top_categories"][1]["amount"] == 150
+
+
+def test_dashboard_summary_date_range(client, auth_headers):
+    """
+    Test dashboard respects the date range filter
+    """
+    _seed(client, auth_headers)
+
+    response = client.get(
+        "/api/analytics/dashboard",
+        params={"date_from": "2025-06-02", "date_to": "2025-06-30", "top": 1},
+        headers=auth_headers,
+    )
+    data = response.json()
+    assert data["total_income"] == 0
+    assert data["total_expenses"] == 150
+    assert len(data["top_categories"]) == 1
+
+
+def test_timeseries_by_category_and_month(client, auth_headers):
+    """
+    Test monthly series per category come from the rollups, leaving out
+    currencies without an exchange rate
+    """
+    food, rent = _seed(client, auth_headers)
+
+    response = client.get(
+        "/api/analytics/timeseries",
+        params={"granularity": "month", "group_by": "category", "type": "expense"},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["reporting_currency"] == "INR"
+    assert data["missing_rates"] == ["USD"]
+    series = {(s["key"], s["currency"]): s for s in data["series"]}
+    assert series[(food["id"], "INR")]["label"] == "Food"
+    assert series[(food["id"], "INR")]["points"] == [{"period_start": "2025-06-01", "total": 150, "count": 2}]
+    assert series[(rent["id"], "INR")]["points"][0]["total"] == 1200
+
+    response = client.get(
+        "/api/analytics/timeseries",
+        params={"granularity": "month", "group_by": "category", "currency": "USD"},
+        headers=auth_headers,
+    )
+    series = {(s["key"], s["currency"]): s for s in response.json()["series"]}
+    assert series == {(food["id"], "USD"): {
+        "key": food["id"], "label": "Food", "currency": "USD",
+        "points": [{"period_start": "2025-07-01", "total": 30, "count": 1}],
+    }}
+
+
+def test_timeseries_weeks_start_on_monday(client, auth_headers):
+    """
+    Test weekly buckets by type, including an uncategorized row
+    """
+    _seed(client, auth_headers)
+    # Sunday 2025-06-08 still belongs to the week of Monday 2025-06-02
+    client.post("/api/transactions/", json={"amount": 7, "type": "expense", "date": "2025-06-08"}, headers=auth_headers)
+
+    response = client.get(
+        "/api/analytics/timeseries",
+        params={"granularity": "week", "group_by": "type", "currency": "INR"},
+        headers=auth_headers,
+    )
+    series = {s["key"]: s["points"] for s in response.json()["series"]}
+    assert series["expense"] == [
+        {"period_start": "2025-05-26", "total": 1200, "count": 1},
+        {"period_start": "2025-06-02", "total": 157, "count": 3},
+    ]
+    assert series["income"] == [{"period_start": "2025-05-26", "total": 5000, "count": 1}]
+
+    response = client.get("/api/analytics/timeseries", params={"granularity": "year"}, headers=auth_headers)
+    assert response.status_code == 422
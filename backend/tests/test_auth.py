@@ -0,0 +1,113 @@
+"""
+Test module for authentication and the authenticated-user cache
+"""
+from jose import jwt
+from passlib.hash import bcrypt
+
+from app.api.auth import user_cache, SECRET_KEY, ALGORITHM
+from app.services.passwords import PasswordHasher, password_hasher, pwd_context
+from app.db.database import SessionLocal
+from app.models.user import User
+
+
+def test_token_subject_is_user_id_and_lookups_are_cached(client, auth_headers):
+    """
+    Test repeated requests are served from the cache after the first lookup
+    """
+    token = auth_headers["Authorization"].split()[1]
+    subject = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])["sub"]
+    assert subject.isdigit()
+
+    client.get("/api/categories/", headers=auth_headers)
+    misses = user_cache.misses
+    hits = user_cache.hits
+    for _ in range(3):
+        assert client.get("/api/categories/", headers=auth_headers).status_code == 200
+    assert user_cache.misses == misses
+    assert user_cache.hits == hits + 3
+
+    stats = client.get("/api/health/cache").json()["caches"][0]
+    assert stats["name"] == "auth_users" and stats["size"] == 1
+
+
+def test_deactivating_user_invalidates_cache(client, auth_headers):
+    """
+    Test a deactivated user is rejected immediately, not after the TTL
+    """
+    assert client.get("/api/categories/", headers=auth_headers).status_code == 200
+
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.email == "tester@example.com").one()
+        user.is_active = False
+        db.commit()
+    finally:
+        db.close()
+
+    assert len(user_cache) == 0
+    assert client.get("/api/categories/", headers=auth_headers).status_code == 400
+
+
+def test_cache_filled_before_commit_is_invalidated(client, auth_headers):
+    """
+    Test a lookup between flush and commit cannot pin the old user for the TTL
+    """
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.email == "tester@example.com").one()
+        user.is_active = False
+        db.flush()
+        # Another request reloads the committed, still-active user meanwhile
+        assert client.get("/api/categories/", headers=auth_headers).status_code == 200
+        assert len(user_cache) == 1
+        db.commit()
+    finally:
+        db.close()
+
+    assert len(user_cache) == 0
+    assert client.get("/api/categories/", headers=auth_headers).status_code == 400
+
+
+def test_login_rehashes_outdated_password_hash(client):
+    """
+    Test a hash made with a different bcrypt cost is replaced on login
+    """
+    db = SessionLocal()
+    try:
+        db.add(User(email="legacy@example.com", hashed_password=bcrypt.using(rounds=5).hash("secret123")))
+        db.commit()
+    finally:
+        db.close()
+
+    response = client.post("/api/auth/token", data={"username": "legacy@example.com", "password": "secret123"})
+    assert response.status_code == 200
+
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.email == "legacy@example.com").one()
+        assert user.hashed_password.startswith("$2b$04$")
+    finally:
+        db.close()
+
+
+def test_saturated_hasher_returns_503(client, monkeypatch):
+    """
+    Test sign-ins beyond the hashing queue limit are shed with Retry-After
+    """
+    monkeypatch.setattr(password_hasher, "max_pending", 0)
+    response = client.post("/api/auth/register", json={"email": "busy@example.com", "password": "secret123"})
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+
+
+def test_process_hasher_spawns_fresh_workers():
+    """
+    Test the process pool never forks the running app
+    """
+    hasher = PasswordHasher(workers=1, max_pending=4, kind="process")
+    try:
+        hashed = hasher.hash_sync("secret123")
+        assert hasher._executor._mp_context.get_start_method() == "spawn"
+    finally:
+        hasher.shutdown()
+    assert pwd_context.verify("secret123", hashed)
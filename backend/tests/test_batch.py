@@ -0,0 +1,87 @@
+"""
+Test module for batch write endpoints
+"""
+
+from app.schemas.batch import MAX_BATCH_OPERATIONS
+
+
+def _create(client, headers, amount):
+    return client.post(
+        "/api/transactions/", json={"amount": amount, "type": "expense", "date": "2025-06-01"}, headers=headers
+    ).json()
+
+
+def test_transaction_batch_applies_mixed_operations(client, auth_headers):
+    """
+    Test create/update/delete in one batch with per-item results
+    """
+    keep = _create(client, auth_headers, 10)
+    drop = _create(client, auth_headers, 20)
+
+    response = client.post(
+        "/api/transactions/batch",
+        json={
+            "operations": [
+                {"op": "create", "data": {"amount": 30, "type": "income", "date": "2025-06-02"}},
+                {"op": "update", "id": keep["id"], "data": {"amount": 15, "type": "expense", "date": "2025-06-01"}},
+                {"op": "delete", "id": drop["id"]},
+                {"op": "delete", "id": drop["id"]},
+                {"op": "delete", "id": 999999},
+            ]
+        },
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    result = response.json()
+    assert (result["applied"], result["failed"]) == (3, 2)
+    assert [item["status"] for item in result["results"]] == ["ok", "ok", "ok", "error", "error"]
+    created_id = result["results"][0]["id"]
+
+    rows = client.get("/api/transactions/", headers=auth_headers).json()
+    assert {(row["id"], row["amount"]) for row in rows} == {(created_id, 30), (keep["id"], 15)}
+
+    summary = client.get("/api/analytics/dashboard", headers=auth_headers).json()
+    assert (summary["total_income"], summary["total_expenses"]) == (30, 15)
+
+
+def test_atomic_batch_rolls_back_on_failure(client, auth_headers):
+    """
+    Test atomic batches apply nothing when any item fails
+    """
+    response = client.post(
+        "/api/categories/batch",
+        json={
+            "atomic": True,
+            "operations": [
+                {"op": "create", "data": {"name": "Travel"}},
+                {"op": "update", "id": 12345, "data": {"name": "Nope"}},
+            ],
+        },
+        headers=auth_headers,
+    )
+    result = response.json()
+    assert [item["status"] for item in result["results"]] == ["rolled_back", "error"]
+    assert client.get("/api/categories/", headers=auth_headers).json() == []
+
+    response = client.post(
+        "/api/budgets/batch", json={"operations": [{"op": "delete"}]}, headers=auth_headers
+    )
+    assert response.status_code == 422
+
+
+def test_batch_size_is_capped(client, auth_headers):
+    """
+    Test target lookups span several IN chunks and oversized batches are refused
+    """
+    rows = [_create(client, auth_headers, amount) for amount in (10, 20)]
+    operations = [{"op": "delete", "id": 100000 + index} for index in range(MAX_BATCH_OPERATIONS - 2)]
+    operations += [{"op": "delete", "id": row["id"]} for row in rows]
+
+    result = client.post("/api/transactions/batch", json={"operations": operations}, headers=auth_headers).json()
+    assert (result["applied"], result["failed"]) == (2, MAX_BATCH_OPERATIONS - 2)
+    assert client.get("/api/transactions/", headers=auth_headers).json() == []
+
+    response = client.post(
+        "/api/transactions/batch", json={"operations": operations + [{"op": "delete", "id": 1}]}, headers=auth_headers
+    )
+    assert response.status_code == 422
@@ -0,0 +1,57 @@
+"""
+Tests for the synthetic seeding and result comparison used by the API benchmark
+"""
+from datetime import date
+
+from sqlalchemy import func, select
+
+from app.db.database import Base, engine, SessionLocal
+from app.models.category import Category
+from app.models.rollup import DailyRollup
+from app.models.transaction import Transaction
+from scripts.benchmark_api import compare, percentile, summarize
+from scripts.setup_database import seed_synthetic
+
+
+def test_seed_synthetic_is_deterministic():
+    def seed():
+        Base.metadata.drop_all(bind=engine)
+        Base.metadata.create_all(bind=engine)
+        db = SessionLocal()
+        try:
+            emails = seed_synthetic(db, users=2, categories=15, transactions=300, start=date(2024, 1, 1), days=90)
+            rows = db.execute(
+                select(Transaction.user_id, Transaction.amount, Transaction.date, Transaction.category_id)
+                .order_by(Transaction.id)
+            ).all()
+            categories = db.execute(select(func.count(Category.id))).scalar()
+            rollups = db.execute(select(func.count(DailyRollup.id))).scalar()
+            return emails, rows, categories, rollups
+        finally:
+            db.close()
+
+    emails, rows, categories, rollups = seed()
+    assert emails == ["user0@example.com", "user1@example.com"]
+    assert len(rows) == 600
+    assert categories == 30
+    assert rollups > 0
+    assert all(date(2024, 1, 1) <= row.date < date(2024, 3, 31) for row in rows)
+    assert seed()[1] == rows
+
+
+def test_percentiles_and_baseline_comparison():
+    ordered = [i / 1000 for i in range(1, 101)]
+    assert percentile(ordered, 50) == 0.05
+    assert percentile(ordered, 99) == 0.099
+    assert percentile([], 95) == 0.0
+
+    stats = summarize(ordered, errors=1, elapsed=2.0)
+    assert stats["requests"] == 100 and stats["errors"] == 1
+    assert stats["throughput_rps"] == 50.0
+    assert stats["p95_ms"] == 95.0
+
+    baseline = {"workloads": {"list": {"sequential": dict(stats)}}}
+    slower = dict(stats, p95_ms=200.0, throughput_rps=20.0)
+    regressions = compare({"workloads": {"list": {"sequential": slower}}}, baseline, tolerance=0.2)
+    assert len(regressions) == 2
+    assert compare({"workloads": {"list": {"sequential": stats}}}, baseline, tolerance=0.2) == []
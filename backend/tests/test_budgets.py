@@ -0,0 +1,119 @@
+"""
+Test module for budget progress
+"""
+from datetime import date
+
+from sqlalchemy import insert, select
+
+from app.db.database import SessionLocal, engine
+from app.models.budget import Budget
+from app.models.rollup import DailyRollup, bucket_index
+from app.services.rollups import add_rows, budget_window, ensure_rollups
+
+
+def test_budget_progress_tracks_transaction_writes(client, auth_headers):
+    """
+    Test spent/remaining follow creates, updates and deletes
+    """
+    food = client.post("/api/categories/", json={"name": "Food"}, headers=auth_headers).json()
+    budget = client.post(
+        "/api/budgets/",
+        json={
+            "amount": 400,
+            "name": "Groceries",
+            "period": "monthly",
+            "start_date": "2025-06-01",
+            "end_date": "2025-06-30",
+            "category_id": food["id"],
+        },
+        headers=auth_headers,
+    ).json()
+
+    def post(amount, day):
+        return client.post(
+            "/api/transactions/",
+            json={"amount": amount, "type": "expense", "category_id": food["id"], "date": day},
+            headers=auth_headers,
+        ).json()
+
+    first = post(100, "2025-06-02")
+    post(50, "2025-06-02")
+    post(999, "2025-07-01")  # outside the window
+
+    progress = client.get(f"/api/budgets/{budget['id']}", headers=auth_headers).json()
+    assert progress["spent"] == 150
+    assert progress["remaining"] == 250
+    assert progress["percentage"] == 37.5
+
+    client.put(
+        f"/api/transactions/{first['id']}",
+        json={"amount": 300, "type": "expense", "category_id": food["id"], "date": "2025-06-10"},
+        headers=auth_headers,
+    )
+    listed = client.get("/api/budgets/", headers=auth_headers).json()
+    assert listed[0]["spent"] == 350
+
+    client.delete(f"/api/transactions/{first['id']}", headers=auth_headers)
+    listed = client.get("/api/budgets/", headers=auth_headers).json()
+    assert listed[0]["spent"] == 50
+
+
+def test_overall_budget_counts_every_category(client, auth_headers):
+    """
+    Test a budget without a category sums categorized and uncategorized spend
+    """
+    food = client.post("/api/categories/", json={"name": "Food"}, headers=auth_headers).json()
+    budget = client.post(
+        "/api/budgets/",
+        json={"amount": 1000, "name": "Everything", "period": "monthly",
+              "start_date": "2025-06-01", "end_date": "2025-06-30"},
+        headers=auth_headers,
+    ).json()
+    assert budget["category_id"] is None
+    for amount, category_id, type in ((100, food["id"], "expense"), (40, None, "expense"), (900, None, "income")):
+        client.post(
+            "/api/transactions/",
+            json={"amount": amount, "type": type, "category_id": category_id, "date": "2025-06-05"},
+            headers=auth_headers,
+        )
+
+    progress = client.get(f"/api/budgets/{budget['id']}", headers=auth_headers).json()
+    assert (progress["spent"], progress["remaining"]) == (140, 860)
+
+
+def test_open_ended_budget_window():
+    """
+    Test open-ended budgets measure the current period instance
+    """
+    monthly = Budget(start_date=date(2025, 1, 31), period="monthly")
+    assert budget_window(monthly, date(2025, 3, 5)) == (date(2025, 2, 28), date(2025, 3, 30))
+
+    weekly = Budget(start_date=date(2025, 6, 2), period="weekly")
+    assert budget_window(weekly, date(2025, 6, 18)) == (date(2025, 6, 16), date(2025, 6, 22))
+
+
+def test_uncategorized_buckets_stay_single(client, auth_headers):
+    """
+    Test writes to an uncategorized bucket land on one row, and buckets
+    duplicated before the bucket index existed are merged on startup
+    """
+    for amount in (40, 2):
+        client.post(
+            "/api/transactions/", json={"amount": amount, "type": "expense", "date": "2025-06-01"}, headers=auth_headers
+        )
+    db = SessionLocal()
+    bucket = db.execute(select(DailyRollup)).scalar_one()
+    assert (bucket.category_id, bucket.total, bucket.count) == (None, 42, 2)
+    key = {"user_id": bucket.user_id, "type": bucket.type, "currency": bucket.currency}
+
+    add_rows(db, [{**key, "date": bucket.day, "amount": 8}])
+    db.commit()
+    assert db.execute(select(DailyRollup.total, DailyRollup.count)).all() == [(50, 3)]
+
+    # A database from before the index, holding the bucket twice
+    bucket_index.drop(bind=engine)
+    db.execute(insert(DailyRollup).values(**key, day=bucket.day, total=8, count=1))
+    db.commit()
+    ensure_rollups(db)
+    assert db.execute(select(DailyRollup.total, DailyRollup.count)).all() == [(42, 2)]
+    db.close()
@@ -0,0 +1,53 @@
+"""
+Test module for ETags and the rendered list cache
+"""
+from app.api.conditional import response_cache
+
+
+def test_unchanged_list_returns_304(client, auth_headers):
+    """
+    Test If-None-Match hits until a write moves the user's version
+    """
+    client.post("/api/categories/", json={"name": "Food"}, headers=auth_headers)
+
+    first = client.get("/api/categories/", headers=auth_headers)
+    etag = first.headers["etag"]
+    assert first.status_code == 200 and len(first.json()) == 1
+
+    again = client.get("/api/categories/", headers={**auth_headers, "If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.headers["etag"] == etag
+
+    # Different query params are a different representation
+    paged = client.get("/api/categories/", params={"limit": 1}, headers={**auth_headers, "If-None-Match": etag})
+    assert paged.status_code == 200
+
+    client.post("/api/transactions/", json={"amount": 5, "type": "expense"}, headers=auth_headers)
+    stale = client.get("/api/categories/", headers={**auth_headers, "If-None-Match": etag})
+    assert stale.status_code == 200
+    assert stale.headers["etag"] != etag
+
+
+def test_rendered_bodies_are_reused(client, auth_headers):
+    """
+    Test repeat requests are served from the LRU with the same headers
+    """
+    for amount in (1, 2, 3):
+        client.post("/api/transactions/", json={"amount": amount, "type": "expense"}, headers=auth_headers)
+    food = client.post("/api/categories/", json={"name": "Food"}, headers=auth_headers).json()
+    client.post(
+        "/api/budgets/",
+        json={"amount": 100, "name": "Monthly", "period": "monthly", "category_id": food["id"]},
+        headers=auth_headers,
+    )
+
+    before = response_cache.stats()["hits"]
+    first = client.get("/api/transactions/", params={"limit": 2}, headers=auth_headers)
+    second = client.get("/api/transactions/", params={"limit": 2}, headers=auth_headers)
+    assert second.content == first.content
+    assert second.headers["x-next-cursor"] == first.headers["x-next-cursor"]
+
+    budgets = client.get("/api/budgets/", headers=auth_headers).json()
+    assert budgets[0]["spent"] == 0 and budgets[0]["window_start"]
+    assert client.get("/api/budgets/", headers=auth_headers).json() == budgets
+    assert response_cache.stats()["hits"] - before == 2
@@ -0,0 +1,100 @@
+"""
+Test module for duplicate transaction detection
+"""
+from datetime import date
+
+from app.services.duplicates import fingerprint
+
+STATEMENT = """Date,Description,Amount
+2025-06-01,Coffee Shop,-150
+2025-06-01,COFFEE-SHOP!,-150
+2025-06-02,Coffee shop,-150
+2025-06-03,Groceries,-900
+"""
+
+OVERLAPPING = """Date,Description,Amount
+2025-06-03,groceries,-900
+2025-06-04,Pharmacy,-300
+"""
+
+
+def _import(client, headers, body, dedupe):
+    return client.post(
+        "/api/transactions/import",
+        params={"dedupe": dedupe},
+        files={"file": ("statement.csv", body, "text/csv")},
+        headers=headers,
+    ).json()
+
+
+def test_fingerprint_normalizes_descriptions():
+    day = date(2025, 6, 1)
+    assert fingerprint(1, day, 150, "expense", "Coffee Shop") == fingerprint(1, day, "150.00", "expense", " coffee_shop.")
+    assert fingerprint(1, day, 150, "expense", "Coffee Shop") != fingerprint(2, day, 150, "expense", "Coffee Shop")
+    assert fingerprint(1, day, 150, "expense", "Coffee Shop") != fingerprint(1, day, 150.01, "expense", "Coffee Shop")
+    assert fingerprint(1, day, 150, "expense", "Coffee Shop") == fingerprint(1, day, 150, "expense", "Coffee Shop", "INR")
+    assert fingerprint(1, day, 150, "expense", "Coffee Shop") != fingerprint(1, day, 150, "expense", "Coffee Shop", "USD")
+
+
+def test_import_dedupe_skips_file_and_existing_duplicates(client, auth_headers):
+    """
+    Test repeats inside the file and against stored rows are skipped and counted
+    """
+    result = _import(client, auth_headers, STATEMENT, True)
+    assert (result["imported"], result["duplicates"]) == (3, 1)
+
+    result = _import(client, auth_headers, OVERLAPPING, True)
+    assert (result["imported"], result["duplicates"]) == (1, 1)
+
+    # Same day, amount and description in another currency is kept
+    result = _import(client, auth_headers, "Date,Description,Amount,Currency\n2025-06-03,Groceries,-900,USD\n", True)
+    assert (result["imported"], result["duplicates"]) == (1, 0)
+
+    # Without dedupe everything goes in, as before
+    result = _import(client, auth_headers, OVERLAPPING, False)
+    assert (result["imported"], result["duplicates"]) == (2, 0)
+
+    summary = client.get("/api/analytics/dashboard", headers=auth_headers).json()
+    assert summary["total_expenses"] == 150 * 2 + 900 * 2 + 300 * 2
+
+
+def test_create_dedupe_conflicts(client, auth_headers):
+    coffee = {"amount": 150, "description": "Coffee", "type": "expense", "date": "2025-06-01"}
+    first = client.post("/api/transactions/", json=coffee, headers=auth_headers).json()
+
+    response = client.post("/api/transactions/", params={"dedupe": True}, json=coffee, headers=auth_headers)
+    assert response.status_code == 409
+    assert response.json()["detail"]["duplicate_of"] == first["id"]
+
+    # The same figure in another currency is a different transaction
+    response = client.post(
+        "/api/transactions/", params={"dedupe": True}, json={**coffee, "currency": "USD"}, headers=auth_headers
+    )
+    assert response.status_code == 200
+
+    # An edit moves the row off its old fingerprint
+    client.put(f"/api/transactions/{first['id']}", json={**coffee, "amount": 160}, headers=auth_headers)
+    response = client.post("/api/transactions/", params={"dedupe": True}, json=coffee, headers=auth_headers)
+    assert response.status_code == 200
+
+
+def test_duplicates_report(client, auth_headers):
+    """
+    Test exact groups, near pairs a day apart, and the date filter
+    """
+    _import(client, auth_headers, STATEMENT, False)
+    _import(client, auth_headers, "Date,Description,Amount\n2025-06-10,Cinema,-150\n", False)
+    # Same amount and day in another currency matches neither way
+    _import(client, auth_headers, "Date,Description,Amount,Currency\n2025-06-01,Coffee Shop,-150,USD\n", False)
+
+    report = client.get("/api/transactions/duplicates", headers=auth_headers).json()
+    assert len(report["exact"]) == 1
+    assert [t["date"] for t in report["exact"][0]["transactions"]] == ["2025-06-01", "2025-06-01"]
+    assert sorted((pair["days_apart"], pair["transactions"][1]["date"]) for pair in report["near"]) == [
+        (1, "2025-06-02"), (1, "2025-06-02"),
+    ]
+
+    report = client.get(
+        "/api/transactions/duplicates", params={"date_from": "2025-06-02"}, headers=auth_headers
+    ).json()
+    assert report == {"exact": [], "near": []}
@@ -0,0 +1,173 @@
+"""
+Test module for exchange rates and reporting-currency conversion
+"""
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy import select
+
+from app.db.database import SessionLocal
+from app.models.rollup import DailyRollup
+from app.services.exchange_rates import RateTable, RollupConversion, load_rates_file
+
+RATES_CSV = (
+    "date,base,quote,rate\n"
+    "2025-06-01,USD,INR,83\n"
+    "2025-07-01,USD,INR,84\n"
+    "2025-06-01,EUR,INR,90\n"
+    "2025-06-01,usd,usd,1\n"
+    "2025-13-01,GBP,INR,105\n"
+    "2025-06-01,GBP,INR,-1\n"
+)
+
+
+def _import(tmp_path, content=RATES_CSV):
+    path = tmp_path / "rates.csv"
+    path.write_text(content)
+    db = SessionLocal()
+    try:
+        return load_rates_file(db, str(path))
+    finally:
+        db.close()
+
+
+def test_rate_table_as_of_inverse_and_cross():
+    table = RateTable([
+        (date(2025, 6, 1), "USD", "INR", 80.0),
+        (date(2025, 7, 1), "USD", "INR", 84.0),
+        (date(2025, 6, 15), "EUR", "INR", 90.0),
+    ])
+    assert table.rate("USD", "INR", date(2025, 5, 31)) is None
+    assert table.rate("USD", "INR", date(2025, 6, 30)) == 80.0
+    assert table.rate("USD", "INR", date(2026, 1, 1)) == 84.0
+    assert table.rate("INR", "USD", date(2025, 6, 2)) == 1 / 80
+    # Cross rate through INR, usable once both legs have a rate
+    assert table.rate("EUR", "USD", date(2025, 6, 10)) is None
+    assert table.rate("EUR", "USD", date(2025, 6, 15)) == 90 / 80
+    assert table.available_from("EUR", "USD") == date(2025, 6, 15)
+    assert table.rate("GBP", "INR", date(2025, 6, 15)) is None
+
+    rows = [row for row in table.reporting_rows() if (row["base"], row["quote"]) == ("EUR", "USD")]
+    assert [(row["day"], row["rate"]) for row in rows] == [
+        (date(2025, 6, 15), 90 / 80), (date(2025, 7, 1), 90 / 84),
+    ]
+
+
+def test_import_and_lookup(client, auth_headers, tmp_path):
+    result = _import(tmp_path)
+    assert result.imported == 3
+    assert [error.row for error in result.errors] == [5, 6, 7]
+
+    # Re-importing a pair and day replaces its rate
+    _import(tmp_path, "date,base,quote,rate\n2025-07-01,USD,INR,85\n")
+    response = client.get(
+        "/api/exchange-rates/rate", params={"base": "USD", "quote": "INR", "on": "2025-08-01"}, headers=auth_headers
+    )
+    assert response.json()["rate"] == 85
+    response = client.get(
+        "/api/exchange-rates/rate", params={"base": "INR", "quote": "EUR", "on": "2025-05-01"}, headers=auth_headers
+    )
+    assert response.status_code == 404
+
+    # Rates are shared by every user; no user can overwrite them
+    response = client.post(
+        "/api/exchange-rates/import", files={"file": ("rates.csv", RATES_CSV, "text/csv")}, headers=auth_headers
+    )
+    assert response.status_code in (404, 405)
+
+
+def test_dashboard_converts_into_reporting_currency(client, auth_headers, tmp_path):
+    """
+    Test mixed-currency rows are converted as of their day, in SQL
+    """
+    food = client.post("/api/categories/", json={"name": "Food"}, headers=auth_headers).json()
+    travel = client.post("/api/categories/", json={"name": "Travel"}, headers=auth_headers).json()
+    rows = [
+        {"amount": 1000, "type": "expense", "date": "2025-06-10", "category_id": food["id"]},
+        {"amount": 10, "type": "expense", "date": "2025-06-15", "currency": "USD", "category_id": travel["id"]},
+        {"amount": 10, "type": "expense", "date": "2025-07-02", "currency": "USD", "category_id": travel["id"]},
+        {"amount": 10, "type": "expense", "date": "2025-07-02", "currency": "EUR", "category_id": travel["id"]},
+        {"amount": 5, "type": "expense", "date": "2025-07-02", "currency": "JPY", "category_id": travel["id"]},
+    ]
+    for row in rows:
+        client.post("/api/transactions/", json=row, headers=auth_headers)
+
+    data = client.get("/api/analytics/dashboard", headers=auth_headers).json()
+    assert data["reporting_currency"] == "INR"
+    assert data["missing_rates"] == ["EUR", "JPY", "USD"]
+    assert data["total_expenses"] == 1000
+
+    _import(tmp_path)
+    data = client.get("/api/analytics/dashboard", headers=auth_headers).json()
+    assert data["missing_rates"] == ["JPY"]
+    assert data["total_expenses"] == 1000 + 830 + 840 + 900
+    assert data["transaction_count"] == 4
+    assert [c["id"] for c in data["top_categories"]] == [travel["id"], food["id"]]
+    assert data["top_categories"][0]["amount"] == 2570
+
+    # Cross rate EUR -> USD through INR; INR -> USD by inverse
+    data = client.get(
+        "/api/analytics/dashboard", params={"reporting_currency": "USD"}, headers=auth_headers
+    ).json()
+    assert data["total_expenses"] == round(1000 / 83 + 10 + 10 + 900 / 84, 2)
+
+    data = client.get("/api/analytics/dashboard", params={"currency": "USD"}, headers=auth_headers).json()
+    assert data["total_expenses"] == 20
+    assert data["missing_rates"] == []
+
+
+def test_reporting_currency_setting_applies_to_budgets(client, auth_headers, tmp_path):
+    _import(tmp_path)
+    category = client.post("/api/categories/", json={"name": "Travel"}, headers=auth_headers).json()
+    client.post("/api/transactions/", json={
+        "amount": 8300, "type": "expense", "date": "2025-06-20", "category_id": category["id"],
+    }, headers=auth_headers)
+    budget = client.post("/api/budgets/", json={
+        "amount": 200, "name": "Trip", "period": "monthly",
+        "start_date": "2025-06-01", "end_date": "2025-06-30", "category_id": category["id"],
+    }, headers=auth_headers).json()
+    assert client.get("/api/budgets/", headers=auth_headers).json()[0]["currency"] == "INR"
+
+    response = client.patch("/api/auth/me", json={"reporting_currency": "USD"}, headers=auth_headers)
+    assert response.json()["reporting_currency"] == "USD"
+    assert client.patch("/api/auth/me", json={"reporting_currency": "usd"}, headers=auth_headers).status_code == 422
+
+    progress = client.get("/api/budgets/", headers=auth_headers).json()[0]
+    assert progress["currency"] == "USD"
+    assert progress["spent"] == 100
+    assert progress["remaining"] == 100
+    assert progress["missing_rates"] == []
+
+    # Spend with no rate into USD is flagged, not silently dropped
+    client.post("/api/transactions/", json={
+        "amount": 500, "type": "expense", "date": "2025-06-21", "currency": "JPY", "category_id": category["id"],
+    }, headers=auth_headers)
+    progress = client.get("/api/budgets/", headers=auth_headers).json()[0]
+    assert (progress["spent"], progress["missing_rates"]) == (100, ["JPY"])
+    assert client.get(f"/api/budgets/{budget['id']}", headers=auth_headers).json()["spent"] == 100
+    assert client.get("/api/analytics/dashboard", headers=auth_headers).json()["reporting_currency"] == "USD"
+
+
+def test_same_currency_totals_stay_exact(client, auth_headers, tmp_path):
+    """
+    Test rows already in the target currency are summed as integers, past
+    where a float product would round, while foreign rows are converted
+    """
+    _import(tmp_path)
+    amounts = ["45035996273704.97", "45035996273704.98"]  # (2**52 + 1) and (2**52 + 2) minor units
+    for amount in amounts:
+        client.post("/api/transactions/", json={"amount": amount, "type": "expense", "date": "2025-06-10"},
+                    headers=auth_headers)
+    client.post("/api/transactions/", json={"amount": 10, "type": "expense", "date": "2025-06-10", "currency": "USD"},
+                headers=auth_headers)
+
+    conversion = RollupConversion("INR")
+    db = SessionLocal()
+    try:
+        total, count = db.execute(
+            conversion.join(select(conversion.converted_sum(), conversion.converted_count()).select_from(DailyRollup))
+        ).one()
+    finally:
+        db.close()
+    assert total == sum(map(Decimal, amounts)) + 830
+    assert count == 3
@@ -0,0 +1,38 @@
+"""
+Test module for streaming transaction export
+"""
+import csv
+import io
+import json
+
+from app.services import exporters
+
+
+def test_export_csv_and_ndjson(client, auth_headers, monkeypatch):
+    """
+    Test both text formats stream every filtered row in listing order
+    """
+    monkeypatch.setattr(exporters, "CHUNK_SIZE", 2)
+    for day in range(1, 6):
+        client.post(
+            "/api/transactions/",
+            json={"amount": day * 10, "type": "expense", "date": f"2025-06-0{day}", "description": f"row {day}"},
+            headers=auth_headers,
+        )
+    client.post("/api/transactions/", json={"amount": 1, "type": "income", "date": "2025-06-03"}, headers=auth_headers)
+
+    response = client.get("/api/transactions/export", params={"type": "expense"}, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["description"] for row in rows] == ["row 5", "row 4", "row 3", "row 2", "row 1"]
+
+    response = client.get(
+        "/api/transactions/export",
+        params={"format": "ndjson", "date_from": "2025-06-03"},
+        headers=auth_headers,
+    )
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert len(lines) == 4
+    assert lines[0]["date"] == "2025-06-05"
+    assert [line["type"] for line in lines].count("income") == 1
@@ -0,0 +1,78 @@
+"""
+Test module for bulk transaction import
+"""
+
+CSV_STATEMENT = """Date,Description,Amount,Category
+2025-06-01,Salary,50000,
+2025-06-02,Groceries,-1250.50,Food
+2025-06-03,Cinema,-400,Movies
+not-a-date,Broken row,-10,Food
+2025-06-04,"Coffee, large",-150,food
+"""
+
+QIF_STATEMENT = """!Type:Bank
+D06/05/2025
+T-300.00
+PMetro card
+LFood
+^
+D06/06'25
+T1,000.00
+PRefund
+^
+"""
+
+
+def test_csv_import_reports_row_errors(client, auth_headers):
+    """
+    Test valid rows are inserted and invalid ones reported by line
+    """
+    food = client.post("/api/categories/", json={"name": "Food"}, headers=auth_headers).json()
+
+    response = client.post(
+        "/api/transactions/import",
+        files={"file": ("statement.csv", CSV_STATEMENT, "text/csv")},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    result = response.json()
+    assert result["imported"] == 3
+    assert result["failed"] == 2
+    assert [error["row"] for error in result["errors"]] == [4, 5]
+    assert "Movies" in result["errors"][0]["error"]
+
+    rows = client.get("/api/transactions/", headers=auth_headers).json()
+    assert {(r["description"], r["type"], r["amount"], r["category_id"]) for r in rows} == {
+        ("Salary", "income", 50000, None),
+        ("Groceries", "expense", 1250.5, food["id"]),
+        ("Coffee, large", "expense", 150, food["id"]),
+    }
+
+    summary = client.get("/api/analytics/dashboard", headers=auth_headers).json()
+    assert summary["total_expenses"] == 1400.5
+
+
+def test_qif_import_and_unknown_format(client, auth_headers):
+    """
+    Test QIF parsing and rejection of unsupported formats
+    """
+    client.post("/api/categories/", json={"name": "Food"}, headers=auth_headers)
+
+    response = client.post(
+        "/api/transactions/import",
+        files={"file": ("bank.qif", QIF_STATEMENT, "application/octet-stream")},
+        headers=auth_headers,
+    )
+    assert response.json() == {"imported": 2, "failed": 0, "duplicates": 0, "errors": []}
+    rows = client.get("/api/transactions/", headers=auth_headers).json()
+    assert [(r["date"], r["amount"], r["type"]) for r in rows] == [
+        ("2025-06-06", 1000, "income"),
+        ("2025-06-05", 300, "expense"),
+    ]
+
+    response = client.post(
+        "/api/transactions/import",
+        files={"file": ("bank.xlsx", b"", "application/octet-stream")},
+        headers=auth_headers,
+    )
+    assert response.status_code == 400
@@ -0,0 +1,133 @@
+"""
+Test module for the background job queue
+"""
+import io
+import json
+import time
+from datetime import datetime, timedelta
+
+from app.db.database import SessionLocal
+from app.models.job import Job
+from app.models.user import User
+from app.schemas.job import RecategorizeJobParams
+from app.services import jobs
+
+
+def _wait(client, headers, job, timeout=60):
+    deadline = time.monotonic() + timeout
+    while job["status"] not in jobs.FINISHED and time.monotonic() < deadline:
+        time.sleep(0.05)
+        job = client.get(f"/api/jobs/{job['id']}", headers=headers).json()
+    return job
+
+
+def _submit(client, headers, kind, **params):
+    response = client.post("/api/jobs/", json={"kind": kind, "params": params}, headers=headers)
+    assert response.status_code == 202
+    assert response.json()["status"] == "queued"
+    return response.json()
+
+
+def test_report_export_and_import_jobs(client, auth_headers):
+    """
+    Test CPU-bound kinds run in the pool and match their synchronous endpoints
+    """
+    category = client.post("/api/categories/", json={"name": "Food"}, headers=auth_headers).json()
+    for day in range(1, 4):
+        client.post("/api/transactions/", json={
+            "amount": 10 * day, "type": "expense", "date": f"2025-0{day}-15", "category_id": category["id"],
+        }, headers=auth_headers)
+
+    # Date ranges keep the import's row out of the comparisons
+    params = {"granularity": "month", "group_by": "type", "date_to": "2025-03-31"}
+    report = _submit(client, auth_headers, "report", **params)
+    export = _submit(client, auth_headers, "export", format="csv", date_to="2025-03-31")
+    upload = client.post(
+        "/api/jobs/import",
+        files={"file": ("statement.csv", io.BytesIO(b"date,amount,description\n2025-04-01,-25,Cafe\n"), "text/csv")},
+        headers=auth_headers,
+    ).json()
+
+    if jobs.JOB_EXECUTOR == "process":
+        assert jobs.job_queue.pool_for("report") == "process"
+    report = _wait(client, auth_headers, report)
+    assert report["status"] == "succeeded", report["error"]
+    assert report["progress"] == 1
+    result = client.get(report["result_url"], headers=auth_headers)
+    assert result.headers["content-type"].startswith("application/json")
+    assert result.json() == client.get("/api/analytics/timeseries", params=params, headers=auth_headers).json()
+
+    export = _wait(client, auth_headers, export)
+    assert export["status"] == "succeeded", export["error"]
+    result = client.get(export["result_url"], headers=auth_headers)
+    assert "transactions.csv" in result.headers["content-disposition"]
+    assert result.text.splitlines()[1:] == client.get(
+        "/api/transactions/export", params={"format": "csv", "date_to": "2025-03-31"}, headers=auth_headers
+    ).text.splitlines()[1:]
+
+    upload = _wait(client, auth_headers, upload)
+    assert upload["status"] == "succeeded", upload["error"]
+    assert client.get(upload["result_url"], headers=auth_headers).json()["imported"] == 1
+    assert len(client.get("/api/transactions/", headers=auth_headers).json()) == 4
+
+    listed = client.get("/api/jobs/", headers=auth_headers).json()
+    assert [job["kind"] for job in listed] == ["import", "export", "report"]
+
+
+def test_recategorize_job(client, auth_headers):
+    category = client.post("/api/categories/", json={"name": "Travel"}, headers=auth_headers).json()
+    client.post("/api/transactions/", json={"amount": 5, "type": "expense", "description": "Uber"}, headers=auth_headers)
+    client.post("/api/rules/", json={"category_id": category["id"], "keyword": "uber"}, headers=auth_headers)
+
+    job = _wait(client, auth_headers, _submit(client, auth_headers, "recategorize"))
+    assert job["status"] == "succeeded", job["error"]
+    assert client.get(job["result_url"], headers=auth_headers).json() == {"scanned": 1, "updated": 1}
+    assert client.get("/api/transactions/", headers=auth_headers).json()[0]["category_id"] == category["id"]
+
+
+def test_job_validation_and_ownership(client, auth_headers, monkeypatch):
+    assert client.post("/api/jobs/", json={"kind": "import", "params": {}}, headers=auth_headers).status_code == 400
+    assert client.post("/api/jobs/", json={"kind": "report", "params": {"granularity": "hour"}},
+                       headers=auth_headers).status_code == 422
+    assert client.get("/api/jobs/999", headers=auth_headers).status_code == 404
+
+    db = SessionLocal()
+    job = Job(user_id=1, kind="report", status="failed", error="boom", created_at=datetime.utcnow())
+    db.add(job)
+    db.commit()
+    job_id = job.id
+    db.close()
+    assert client.get(f"/api/jobs/{job_id}/result", headers=auth_headers).status_code == 409
+
+    monkeypatch.setattr(jobs, "JOB_MAX_PENDING_PER_USER", 0)
+    response = client.post("/api/jobs/", json={"kind": "recategorize"}, headers=auth_headers)
+    assert response.status_code == 429
+
+
+def test_claims_respect_per_user_limit_and_stale_jobs_are_recovered(client):
+    # Claim by hand, without the app's dispatcher competing
+    jobs.job_queue.shutdown()
+    db = SessionLocal()
+    users = [User(email=f"user{n}@example.com", hashed_password="x") for n in range(2)]
+    db.add_all(users)
+    db.flush()
+    for user in (users[0], users[0], users[1]):
+        jobs.add_job(db, user.id, "recategorize", RecategorizeJobParams())
+    db.commit()
+
+    claimed = jobs.claim_jobs(db, ["recategorize"], limit=5, max_running_per_user=1)
+    db.commit()
+    assert [db.get(Job, job_id).user_id for job_id in claimed] == [users[0].id, users[1].id]
+    assert jobs.claim_jobs(db, ["recategorize"], limit=5, max_running_per_user=1) == []
+
+    # The first worker died: no heartbeat for longer than the stale window
+    db.query(Job).filter(Job.id == claimed[0]).update({"heartbeat_at": datetime.utcnow() - timedelta(hours=1)})
+    db.query(Job).filter(Job.id == claimed[1]).update(
+        {"heartbeat_at": datetime.utcnow() - timedelta(hours=1), "attempts": jobs.JOB_MAX_ATTEMPTS}
+    )
+    jobs.recover_stale(db)
+    db.commit()
+    db.expire_all()
+    assert db.get(Job, claimed[0]).status == "queued"
+    assert db.get(Job, claimed[1]).status == "failed"
+    db.close()
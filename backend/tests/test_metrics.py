@@ -0,0 +1,51 @@
+"""
+Tests for the Prometheus endpoint and the readiness probe
+"""
+import re
+
+
+def _sample(body: str, name: str, **labels) -> float:
+    """Value of the first sample of ``name`` carrying all of ``labels``"""
+    for line in body.splitlines():
+        if not line.startswith(name + "{") and not line.startswith(name + " "):
+            continue
+        if all(f'{key}="{value}"' in line for key, value in labels.items()):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+
+def test_metrics_use_route_templates(client, auth_headers):
+    client.post("/api/categories/", json={"name": "Food", "type": "expense"}, headers=auth_headers)
+    client.get("/api/categories/", headers=auth_headers)
+    category_id = client.get("/api/categories/", headers=auth_headers).json()[0]["id"]
+    client.get(f"/api/categories/{category_id}", headers=auth_headers)
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+
+    assert "# TYPE http_request_duration_seconds histogram" in body
+    assert _sample(body, "http_requests_total", method="GET", route="/api/categories/", status="200") >= 2
+    assert _sample(
+        body, "http_request_duration_seconds_count", method="GET", route="/api/categories/{category_id}"
+    ) >= 1
+    # Raw ids never become label values
+    assert f'/api/categories/{category_id}"' not in body
+    assert re.search(r'^http_request_duration_seconds_bucket\{.*le="\+Inf"\} \d+', body, re.MULTILINE)
+
+
+def test_metrics_charge_queries_to_requests(client, auth_headers):
+    before = _sample(client.get("/metrics").text, "http_request_db_queries_total", method="POST", route="/api/categories/")
+    client.post("/api/categories/", json={"name": "Rent", "type": "expense"}, headers=auth_headers)
+    body = client.get("/metrics").text
+
+    assert _sample(body, "http_request_db_queries_total", method="POST", route="/api/categories/") > before
+    assert _sample(body, "db_queries_total") > 0
+    assert "http_requests_in_progress" in body
+
+
+def test_readiness_pings_database(client):
+    response = client.get("/api/health/ready")
+    assert response.status_code == 200
+    assert response.json() == {"status": "ready", "database": "ok"}
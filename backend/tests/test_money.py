@@ -0,0 +1,92 @@
+"""
+Test module for exact minor-unit money storage
+"""
+import io
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import create_engine, inspect, text
+
+from app.core.money import from_minor, to_minor
+from app.db.database import migrate_replaced_columns
+
+
+def test_minor_unit_conversion():
+    assert to_minor(0.1) == 10
+    assert to_minor("85.75") == 8575
+    assert to_minor(Decimal("-3.005")) == -300
+    assert from_minor(8575) == Decimal("85.75")
+    assert from_minor(Decimal(30)) == Decimal("0.30")
+
+
+def test_totals_are_exact(client, auth_headers):
+    """
+    Test ten 0.1 expenses total exactly 1, and budgets report exact spend
+    """
+    category = client.post("/api/categories/", json={"name": "Snacks"}, headers=auth_headers).json()
+    for amount in [0.1] * 9 + ["0.10"]:
+        response = client.post(
+            "/api/transactions/",
+            json={"amount": amount, "type": "expense", "date": "2025-06-02", "category_id": category["id"]},
+            headers=auth_headers,
+        )
+        assert response.status_code == 200
+        assert response.json()["amount"] == 0.1
+
+    summary = client.get("/api/analytics/dashboard", headers=auth_headers).json()
+    assert summary["total_expenses"] == 1
+    assert summary["net_balance"] == -1
+
+    budget = client.post("/api/budgets/", json={
+        "amount": 0.3, "name": "Snacks", "period": "monthly",
+        "start_date": "2025-06-01", "end_date": "2025-06-30", "category_id": category["id"],
+    }, headers=auth_headers).json()
+    progress = client.get(f"/api/budgets/{budget['id']}", headers=auth_headers).json()
+    assert progress["spent"] == 1
+    assert progress["remaining"] == -0.7
+
+
+def test_amount_validation(client, auth_headers):
+    """
+    Test amounts finer than a minor unit are rejected rather than rounded
+    """
+    for amount in (1.234, "12.345", "abc", True):
+        response = client.post(
+            "/api/transactions/", json={"amount": amount, "type": "expense"}, headers=auth_headers
+        )
+        assert response.status_code == 422, amount
+    response = client.post(
+        "/api/transactions/", json={"amount": " 12.50 ", "type": "expense"}, headers=auth_headers
+    )
+    assert response.json()["amount"] == 12.5
+
+
+def test_migrate_float_columns(tmp_path):
+    """
+    Test legacy float amount columns are converted in place, once
+    """
+    bind = create_engine(f"sqlite:///{tmp_path}/legacy.db")
+    with bind.begin() as connection:
+        connection.exec_driver_sql(
+            "CREATE TABLE transactions (id INTEGER PRIMARY KEY, amount FLOAT, description VARCHAR, "
+            "date DATE, type VARCHAR, user_id INTEGER, category_id INTEGER, currency VARCHAR)"
+        )
+        connection.exec_driver_sql(
+            "INSERT INTO transactions (amount, type) VALUES (85.75, 'expense'), (0.1, 'expense'), (NULL, 'income')"
+        )
+
+    assert migrate_replaced_columns(bind) == ["transactions.amount_minor"]
+    assert migrate_replaced_columns(bind) == []
+    columns = {column["name"] for column in inspect(bind).get_columns("transactions")}
+    assert "amount" not in columns
+    with bind.connect() as connection:
+        values = connection.execute(text("SELECT amount_minor FROM transactions ORDER BY id")).scalars().all()
+    assert values == [8575, 10, None]
+
+
+def test_parquet_amounts_are_decimal(client, auth_headers):
+    pq = pytest.importorskip("pyarrow.parquet")
+    client.post("/api/transactions/", json={"amount": "19.99", "type": "expense"}, headers=auth_headers)
+    response = client.get("/api/transactions/export", params={"format": "parquet"}, headers=auth_headers)
+    table = pq.read_table(io.BytesIO(response.content))
+    assert table.column("amount").to_pylist() == [Decimal("19.99")]
@@ -0,0 +1,58 @@
+"""
+Test module for keyset pagination
+"""
+from app.api.pagination import NEXT_CURSOR_HEADER
+
+
+def test_transaction_cursor_walks_full_history(client, auth_headers):
+    """
+    Test cursor pages cover every row once, newest first
+    """
+    for day in range(1, 11):
+        for amount in (10, 20):
+            client.post(
+                "/api/transactions/",
+                json={"amount": amount, "type": "expense", "date": f"2025-06-{day:02d}"},
+                headers=auth_headers,
+            )
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 3}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/api/transactions/", params=params, headers=auth_headers)
+        assert response.status_code == 200
+        seen.extend(response.json())
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if not cursor:
+            break
+
+    assert len(seen) == 20
+    assert len({row["id"] for row in seen}) == 20
+    keys = [(row["date"], row["id"]) for row in seen]
+    assert keys == sorted(keys, reverse=True)
+
+    legacy = client.get("/api/transactions/", params={"skip": 3, "limit": 3}, headers=auth_headers).json()
+    assert legacy == seen[3:6]
+
+
+def test_category_cursor_and_invalid_cursor(client, auth_headers):
+    """
+    Test id cursors for categories and rejection of malformed cursors
+    """
+    for name in ("Food", "Rent", "Travel"):
+        client.post("/api/categories/", json={"name": name}, headers=auth_headers)
+
+    first = client.get("/api/categories/", params={"limit": 2}, headers=auth_headers)
+    second = client.get(
+        "/api/categories/",
+        params={"limit": 2, "cursor": first.headers[NEXT_CURSOR_HEADER]},
+        headers=auth_headers,
+    )
+    assert [c["name"] for c in first.json() + second.json()] == ["Food", "Rent", "Travel"]
+    assert NEXT_CURSOR_HEADER not in second.headers
+
+    response = client.get("/api/categories/", params={"cursor": "not-a-cursor"}, headers=auth_headers)
+    assert response.status_code == 400
@@ -0,0 +1,44 @@
+"""
+Test module asserting the transaction listing queries are index-backed
+"""
+from datetime import date
+
+from sqlalchemy import select
+
+from app.api.transactions import build_listing_query
+from app.models.transaction import Transaction
+from app.services.duplicates import near_query
+
+
+def test_listing_uses_user_date_index(client, query_plan):
+    """
+    Test the plain listing walks ix_transactions_user_date_id without a sort
+    """
+    plan = query_plan(build_listing_query(1).limit(100))
+    assert "ix_transactions_user_date_id" in plan
+    assert "TEMP B-TREE" not in plan
+
+    plan = query_plan(build_listing_query(1, date_from=date(2025, 1, 1), date_to=date(2025, 6, 30)))
+    assert "ix_transactions_user_date_id" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_category_listing_uses_category_index(client, query_plan):
+    """
+    Test category-filtered listing walks ix_transactions_user_category_date
+    """
+    plan = query_plan(build_listing_query(1, category_id=3).limit(100))
+    assert "ix_transactions_user_category_date" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_duplicate_lookups_use_their_indexes(client, query_plan):
+    """
+    Test fingerprint probes and the near-duplicate scan are index-backed
+    """
+    plan = query_plan(select(Transaction.id).where(Transaction.user_id == 1, Transaction.fingerprint == "x"))
+    assert "ix_transactions_user_fingerprint" in plan
+
+    plan = query_plan(near_query(1))
+    assert "ix_transactions_user_amount_currency_date" in plan
+    assert "TEMP B-TREE" not in plan
@@ -0,0 +1,151 @@
+"""
+Test module for recurring transactions and their scheduler
+"""
+import time
+from datetime import date
+
+from sqlalchemy import update
+
+from app.db.database import SessionLocal
+from app.models.recurring import RecurringRule
+from app.services.recurring import RecurringScheduler, occurrence, recurring_scheduler
+
+RENT = {
+    "amount": 1500, "description": "Rent", "type": "expense",
+    "frequency": "monthly", "start_date": "2025-01-31",
+}
+
+
+def _transactions(client, headers):
+    return client.get("/api/transactions/", params={"limit": 100}, headers=headers).json()
+
+
+def test_occurrences_keep_the_start_day():
+    assert [occurrence(date(2024, 1, 31), "monthly", 1, n) for n in range(4)] == [
+        date(2024, 1, 31), date(2024, 2, 29), date(2024, 3, 31), date(2024, 4, 30),
+    ]
+    assert occurrence(date(2024, 2, 29), "yearly", 1, 1) == date(2025, 2, 28)
+    assert occurrence(date(2024, 2, 29), "yearly", 1, 4) == date(2028, 2, 29)
+    assert occurrence(date(2025, 1, 1), "weekly", 2, 3) == date(2025, 2, 12)
+    assert occurrence(date(2025, 11, 15), "monthly", 3, 1) == date(2026, 2, 15)
+
+
+def test_scheduler_heap_drops_stale_entries():
+    scheduler = RecurringScheduler(SessionLocal, batch_size=2)
+    scheduler.schedule(1, date(2025, 1, 5))
+    scheduler.schedule(1, date(2025, 1, 1))
+    scheduler.schedule(2, date(2025, 1, 3))
+    scheduler.schedule(3, date(2025, 1, 2))
+    scheduler.schedule(3, None)
+    scheduler.schedule(4, date(2025, 2, 1))
+    assert scheduler.next_due() == date(2025, 1, 1)
+    assert scheduler._pop_due(date(2025, 1, 31)) == [1, 2]
+    assert scheduler._pop_due(date(2025, 1, 31)) == []
+    assert scheduler.next_due() == date(2025, 2, 1)
+
+
+def test_scheduler_loads_rules_up_to_the_horizon(client, auth_headers):
+    rule = client.post("/api/recurring/", json=RENT, headers=auth_headers).json()
+    later = client.post("/api/recurring/", json={**RENT, "start_date": "2099-01-01"}, headers=auth_headers).json()
+
+    scheduler = RecurringScheduler(SessionLocal)
+    db = SessionLocal()
+    scheduler.load(db)
+    db.close()
+    assert scheduler._due == {rule["id"]: date(2025, 1, 31).toordinal()}
+
+    db = SessionLocal()
+    scheduler.load(db, horizon=date(2099, 1, 1))
+    db.close()
+    assert set(scheduler._due) == {rule["id"], later["id"]}
+
+
+def test_due_occurrences_are_posted_once(client, auth_headers):
+    """
+    Test backfill to today, month-end clamping, rollups and re-runs
+    """
+    rule = client.post("/api/recurring/", json=RENT, headers=auth_headers).json()
+    assert rule["next_date"] == "2025-01-31"
+    assert rule["occurrences"] == 0
+
+    assert recurring_scheduler.run_pending(date(2025, 4, 15)) == 3
+    assert recurring_scheduler.run_pending(date(2025, 4, 15)) == 0
+    posted = _transactions(client, auth_headers)
+    assert [t["date"] for t in posted] == ["2025-03-31", "2025-02-28", "2025-01-31"]
+    assert {t["amount"] for t in posted} == {1500}
+
+    rule = client.get(f"/api/recurring/{rule['id']}", headers=auth_headers).json()
+    assert (rule["occurrences"], rule["last_date"], rule["next_date"]) == (3, "2025-03-31", "2025-04-30")
+
+    summary = client.get("/api/analytics/dashboard", headers=auth_headers).json()
+    assert summary["total_expenses"] == 4500
+    assert summary["transaction_count"] == 3
+
+
+def test_restarts_edits_and_racing_workers_never_double_post(client, auth_headers):
+    rule = client.post("/api/recurring/", json=RENT, headers=auth_headers).json()
+
+    # Two workers, each with its own heap loaded from the same database
+    workers = [RecurringScheduler(SessionLocal), RecurringScheduler(SessionLocal)]
+    for worker in workers:
+        db = SessionLocal()
+        worker.load(db)
+        db.close()
+    assert sum(worker.run_pending(date(2025, 2, 28)) for worker in workers) == 2
+    assert workers[1].next_due() == date(2025, 3, 31)
+
+    # State rolled back as if a run crashed after posting
+    db = SessionLocal()
+    db.execute(update(RecurringRule).values(occurrences=0, last_date=None, next_date=date(2025, 1, 31)))
+    db.commit()
+    db.close()
+    recurring_scheduler.schedule(rule["id"], date(2025, 1, 31))
+    assert recurring_scheduler.run_pending(date(2025, 3, 31)) == 1
+    assert len(_transactions(client, auth_headers)) == 3
+
+    # An edit applies from the next unposted occurrence
+    updated = client.put(
+        f"/api/recurring/{rule['id']}", json={**RENT, "amount": 1600}, headers=auth_headers
+    ).json()
+    assert (updated["occurrences"], updated["next_date"]) == (3, "2025-04-30")
+    assert recurring_scheduler.run_pending(date(2025, 4, 30)) == 1
+    assert [t["amount"] for t in _transactions(client, auth_headers)] == [1600, 1500, 1500, 1500]
+
+
+def test_count_and_until_end_the_rule(client, auth_headers):
+    by_count = client.post("/api/recurring/", json={
+        **RENT, "frequency": "daily", "start_date": "2025-03-01", "count": 2,
+    }, headers=auth_headers).json()
+    by_until = client.post("/api/recurring/", json={
+        **RENT, "frequency": "weekly", "interval": 2, "start_date": "2025-03-01", "until": "2025-03-20",
+    }, headers=auth_headers).json()
+    assert recurring_scheduler.run_pending(date(2025, 12, 31)) == 4
+
+    for rule, last in ((by_count, "2025-03-02"), (by_until, "2025-03-15")):
+        rule = client.get(f"/api/recurring/{rule['id']}", headers=auth_headers).json()
+        assert rule["last_date"] == last
+        assert rule["next_date"] is None
+
+    response = client.post("/api/recurring/", json={**RENT, "until": "2024-12-31"}, headers=auth_headers)
+    assert response.status_code == 422
+    response = client.post("/api/recurring/", json={**RENT, "frequency": "hourly"}, headers=auth_headers)
+    assert response.status_code == 422
+    response = client.post("/api/recurring/", json={**RENT, "category_id": 999}, headers=auth_headers)
+    assert response.status_code == 400
+
+    client.delete(f"/api/recurring/{by_count['id']}", headers=auth_headers)
+    assert client.get(f"/api/recurring/{by_count['id']}", headers=auth_headers).status_code == 404
+    assert len(_transactions(client, auth_headers)) == 4
+
+
+def test_background_thread_posts_new_rules(client, auth_headers):
+    recurring_scheduler.start()
+    try:
+        client.post("/api/recurring/", json={**RENT, "start_date": date.today().isoformat()}, headers=auth_headers)
+        deadline = time.monotonic() + 5
+        while not _transactions(client, auth_headers) and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert len(_transactions(client, auth_headers)) == 1
+        assert client.get("/api/health/recurring").json()["running"] is True
+    finally:
+        recurring_scheduler.shutdown()
@@ -0,0 +1,129 @@
+"""
+Test module for auto-categorization rules
+"""
+from types import SimpleNamespace
+
+from app.db.database import SessionLocal
+from app.models.rule import CategoryRule
+from app.services.categorizer import RuleMatcher, matcher_cache, matcher_for
+
+
+def _rule(id, category_id, keyword=None, pattern=None, priority=100, **conditions):
+    fields = {"min_amount": None, "max_amount": None, "type": None, **conditions}
+    return SimpleNamespace(
+        id=id, category_id=category_id, keyword=keyword, pattern=pattern, priority=priority, **fields
+    )
+
+
+def test_matcher_picks_best_rule_that_applies():
+    """
+    Test priority, overlapping keywords, regexes and amount ranges
+    """
+    matcher = RuleMatcher([
+        _rule(1, 10, keyword="ubereats", priority=50),
+        _rule(2, 20, keyword="uber", priority=10, max_amount=100),
+        _rule(3, 30, pattern=r"^atm\s+\d+", priority=5),
+        _rule(4, 40, min_amount=10000, type="income", priority=200),
+    ])
+    assert matcher.match("UberEats order", 50, "expense") == 20
+    # "uber" is over its amount cap, so the longer keyword wins
+    assert matcher.match("UberEats order", 500, "expense") == 10
+    assert matcher.match("ATM 1234 withdrawal uber", 20, "expense") == 30
+    assert matcher.match("Salary", 50000, "income") == 40
+    assert matcher.match("Groceries", 50, "expense") is None
+    assert matcher.match(None, 50, "expense") is None
+
+
+def test_matcher_skips_backtracking_patterns():
+    """
+    Test a catastrophic pattern saved before vetting never runs
+    """
+    matcher = RuleMatcher([_rule(1, 10, pattern=r"^(a+)+$"), _rule(2, 20, pattern=r"b$", priority=200)])
+    assert matcher.match("a" * 40 + "b", 10, "expense") == 20
+
+
+def test_rules_apply_on_create_and_recategorize(client, auth_headers):
+    """
+    Test new transactions are categorized and old ones on demand
+    """
+    travel = client.post("/api/categories/", json={"name": "Travel"}, headers=auth_headers).json()
+    old = client.post(
+        "/api/transactions/",
+        json={"amount": 25, "type": "expense", "date": "2025-06-01", "description": "Lyft to office"},
+        headers=auth_headers,
+    ).json()
+    assert old["category_id"] is None
+
+    response = client.post(
+        "/api/rules/", json={"category_id": travel["id"], "pattern": "lyft|uber"}, headers=auth_headers
+    )
+    assert response.status_code == 200
+    rule = response.json()
+
+    new = client.post(
+        "/api/transactions/",
+        json={"amount": 10, "type": "expense", "date": "2025-06-02", "description": "UBER trip"},
+        headers=auth_headers,
+    ).json()
+    assert new["category_id"] == travel["id"]
+
+    result = client.post("/api/rules/recategorize", headers=auth_headers).json()
+    assert result == {"scanned": 1, "updated": 1}
+    assert client.get(f"/api/transactions/{old['id']}", headers=auth_headers).json()["category_id"] == travel["id"]
+
+    # Rollups follow the move, so analytics see the new category
+    series = client.get(
+        "/api/analytics/timeseries", params={"group_by": "category"}, headers=auth_headers
+    ).json()["series"]
+    assert [(s["key"], s["points"][0]["total"]) for s in series] == [(travel["id"], 35)]
+
+    # Rule edits take effect immediately
+    client.put(
+        f"/api/rules/{rule['id']}", json={"category_id": travel["id"], "keyword": "taxi"}, headers=auth_headers
+    )
+    later = client.post(
+        "/api/transactions/",
+        json={"amount": 10, "type": "expense", "description": "Uber again"},
+        headers=auth_headers,
+    ).json()
+    assert later["category_id"] is None
+
+
+def test_rule_validation(client, auth_headers):
+    """
+    Test bad patterns and foreign categories are rejected
+    """
+    response = client.post("/api/rules/", json={"category_id": 1, "pattern": "("}, headers=auth_headers)
+    assert response.status_code == 422
+    for pattern in (r"^(a+)+$", r"(a|aa)*$", r".*.*.*x", r"(\w)\1"):
+        response = client.post("/api/rules/", json={"category_id": 1, "pattern": pattern}, headers=auth_headers)
+        assert response.status_code == 422, pattern
+    response = client.post("/api/rules/", json={"category_id": 999, "keyword": "x"}, headers=auth_headers)
+    assert response.status_code == 400
+
+
+def test_matcher_cached_before_commit_is_invalidated(client, auth_headers):
+    """
+    Test a matcher built between a rule's flush and commit is not kept
+    """
+    travel = client.post("/api/categories/", json={"name": "Travel"}, headers=auth_headers).json()
+    user_id = travel["user_id"]
+    writer, reader = SessionLocal(), SessionLocal()
+    try:
+        writer.add(CategoryRule(user_id=user_id, category_id=travel["id"], keyword="uber", priority=100))
+        writer.flush()
+        # Another session caches the committed state, without the rule
+        assert not matcher_for(reader, user_id)
+        writer.commit()
+        assert matcher_cache.get(user_id) is None
+        assert matcher_for(reader, user_id).match("Uber trip", 10, "expense") == travel["id"]
+
+        # A rolled-back change must not outlive the transaction in the cache either
+        writer.add(CategoryRule(user_id=user_id, category_id=travel["id"], keyword="lyft", priority=100))
+        writer.flush()
+        assert matcher_for(writer, user_id).match("Lyft", 10, "expense") == travel["id"]
+        writer.rollback()
+        assert matcher_for(reader, user_id).match("Lyft", 10, "expense") is None
+    finally:
+        writer.close()
+        reader.close()
@@ -0,0 +1,68 @@
+"""
+Test module for transaction full-text search
+"""
+from app.api.pagination import NEXT_CURSOR_HEADER
+from app.api.transactions import build_listing_query
+from app.services import search
+
+
+def _add(client, headers, description, **extra):
+    row = {"amount": 10, "type": "expense", "date": "2025-06-01", "description": description, **extra}
+    return client.post("/api/transactions/", json=row, headers=headers).json()
+
+
+def _search(client, headers, **params):
+    response = client.get("/api/transactions/", params=params, headers=headers)
+    assert response.status_code == 200
+    return [row["description"] for row in response.json()]
+
+
+def test_search_matches_prefixes_and_tracks_writes(client, auth_headers):
+    """
+    Test prefix matching, filters and index sync on update and delete
+    """
+    ride = _add(client, auth_headers, "Uber ride to airport")
+    _add(client, auth_headers, "UberEats dinner", date="2025-06-05")
+    _add(client, auth_headers, "Groceries at Café Nero", type="income")
+    gone = _add(client, auth_headers, "Uber pool")
+
+    assert sorted(_search(client, auth_headers, q="uber")) == ["Uber pool", "Uber ride to airport", "UberEats dinner"]
+    assert _search(client, auth_headers, q="ube air") == ["Uber ride to airport"]
+    assert _search(client, auth_headers, q="cafe") == ["Groceries at Café Nero"]
+    assert _search(client, auth_headers, q="uber", date_from="2025-06-02") == ["UberEats dinner"]
+    assert _search(client, auth_headers, q="groc", type="expense") == []
+
+    client.put(
+        f"/api/transactions/{ride['id']}",
+        json={"amount": 10, "type": "expense", "date": "2025-06-01", "description": "Taxi home"},
+        headers=auth_headers,
+    )
+    client.delete(f"/api/transactions/{gone['id']}", headers=auth_headers)
+    assert _search(client, auth_headers, q="uber") == ["UberEats dinner"]
+    assert _search(client, auth_headers, q="taxi") == ["Taxi home"]
+
+
+def test_relevance_sort(client, auth_headers):
+    """
+    Test relevance ranking and that it opts out of cursor paging
+    """
+    _add(client, auth_headers, "Coffee with a long description about many other things", date="2025-06-09")
+    _add(client, auth_headers, "Coffee coffee", date="2025-06-01")
+
+    response = client.get("/api/transactions/", params={"q": "coffee", "sort": "relevance", "limit": 1}, headers=auth_headers)
+    assert [row["description"] for row in response.json()] == ["Coffee coffee"]
+    assert NEXT_CURSOR_HEADER not in response.headers
+
+    response = client.get(
+        "/api/transactions/", params={"q": "coffee", "sort": "relevance", "cursor": "abc"}, headers=auth_headers
+    )
+    assert response.status_code == 400
+
+
+def test_search_uses_fts_index(client, query_plan):
+    """
+    Test the search filter is answered by the FTS5 index, not a scan
+    """
+    assert search.fts_enabled
+    plan = query_plan(build_listing_query(1, q="uber").limit(100))
+    assert "VIRTUAL TABLE INDEX" in plan
@@ -0,0 +1,39 @@
+"""
+Test module for the pre-rendered JSON list path
+"""
+import datetime
+import json
+
+from fastapi.encoders import jsonable_encoder
+
+from app.core import serialization
+from app.schemas.transaction import Transaction as TransactionSchema
+
+
+def test_listing_keeps_schema_shape(client, auth_headers):
+    """
+    Test the fast listing returns exactly what response_model would
+    """
+    created = client.post(
+        "/api/transactions/",
+        json={"amount": 12.5, "description": "Café", "type": "expense", "date": "2025-06-01"},
+        headers=auth_headers,
+    ).json()
+
+    response = client.get("/api/transactions/", headers=auth_headers)
+    assert response.headers["content-type"] == "application/json"
+    row = response.json()[0]
+    assert list(row) == list(TransactionSchema.__fields__)
+    assert row == jsonable_encoder(TransactionSchema(**created))
+
+
+def test_stdlib_fallback_matches_orjson(monkeypatch):
+    """
+    Test both encoders render rows identically
+    """
+    columns = ("id", "date", "amount", "description")
+    rows = [(1, datetime.date(2025, 6, 1), 10.0, "Café"), (2, datetime.date(2025, 6, 2), 0.1, None)]
+    fast = serialization.dumps_rows(columns, rows)
+    monkeypatch.setattr(serialization, "orjson", None)
+    assert serialization.dumps_rows(columns, rows) == fast
+    assert json.loads(fast)[0] == {"id": 1, "date": "2025-06-01", "amount": 10.0, "description": "Café"}
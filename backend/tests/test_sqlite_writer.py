@@ -0,0 +1,81 @@
+"""
+Test module for the SQLite group-committing writer
+"""
+import threading
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import text
+
+from app.db.writer import WriteQueue, create_writer_engine
+from app.models.category import Category
+from app.models.user import User
+
+
+@pytest.fixture
+def write_queue(tmp_path):
+    writer_engine = create_writer_engine(f"sqlite:///{tmp_path}/writer.db")
+    for model in (User, Category):
+        model.__table__.create(bind=writer_engine)
+    queue = WriteQueue(writer_engine, max_batch=64)
+    yield queue
+    queue.shutdown()
+    writer_engine.dispose()
+
+
+def _add(session, name):
+    category = Category(name=name, user_id=1)
+    session.add(category)
+    return category
+
+
+def _fail(session, name):
+    _add(session, name)
+    raise HTTPException(status_code=404, detail="Category not found")
+
+
+def test_concurrent_writes_share_commits(write_queue):
+    """
+    Test queued writes all land and are grouped into fewer commits
+    """
+    gate = threading.Event()
+    # Hold the writer so the following jobs pile up behind it
+    write_queue.submit(lambda session: gate.wait(5))
+    futures = [write_queue.submit(_add, f"c{i}") for i in range(50)]
+    gate.set()
+
+    ids = [future.result(timeout=5).id for future in futures]
+    assert len(set(ids)) == 50
+    stats = write_queue.stats()
+    assert stats["jobs"] == 51
+    assert stats["commits"] < 51
+
+
+def test_failing_job_does_not_undo_its_group(write_queue):
+    """
+    Test a failing unit of work is rolled back to its savepoint only
+    """
+    gate = threading.Event()
+    write_queue.submit(lambda session: gate.wait(5))
+    good = write_queue.submit(_add, "kept")
+    bad = write_queue.submit(_fail, "dropped")
+    gate.set()
+
+    assert good.result(timeout=5).name == "kept"
+    with pytest.raises(HTTPException):
+        bad.result(timeout=5)
+
+    names = write_queue.submit(
+        lambda session: [row.name for row in session.query(Category)]
+    ).result(timeout=5)
+    assert names == ["kept"]
+
+
+def test_writer_connection_uses_wal(write_queue):
+    """
+    Test the writer engine applies the performance pragmas
+    """
+    mode = write_queue.submit(
+        lambda session: session.execute(text("PRAGMA journal_mode")).scalar()
+    ).result(timeout=5)
+    assert mode == "wal"
@@ -0,0 +1,63 @@
+"""
+Test module for the delta-sync change feed
+"""
+import io
+
+
+def _sync(client, headers, token=None):
+    response = client.get("/api/sync", params={"since": token} if token else {}, headers=headers)
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_sync_returns_only_changes_and_tombstones(client, auth_headers):
+    """
+    Test creates, updates, deletes and bulk imports all reach the feed
+    """
+    food = client.post("/api/categories/", json={"name": "Food"}, headers=auth_headers).json()
+    keep = client.post("/api/transactions/", json={"amount": 10, "type": "expense"}, headers=auth_headers).json()
+    drop = client.post("/api/transactions/", json={"amount": 20, "type": "expense"}, headers=auth_headers).json()
+
+    snapshot = _sync(client, auth_headers)
+    assert {row["id"] for row in snapshot["transactions"]} == {keep["id"], drop["id"]}
+    assert [row["id"] for row in snapshot["categories"]] == [food["id"]]
+
+    # Nothing changed, nothing sent
+    quiet = _sync(client, auth_headers, snapshot["token"])
+    assert quiet["transactions"] == quiet["categories"] == quiet["budgets"] == []
+    assert quiet["token"] == snapshot["token"]
+
+    client.put(
+        f"/api/transactions/{keep['id']}", json={"amount": 15, "type": "expense"}, headers=auth_headers
+    )
+    client.post(
+        "/api/transactions/import",
+        files={"file": ("bank.csv", io.BytesIO(b"date,amount,description\n2025-06-01,-5,Snack\n"), "text/csv")},
+        headers=auth_headers,
+    )
+    client.delete(f"/api/transactions/{drop['id']}", headers=auth_headers)
+
+    delta = _sync(client, auth_headers, snapshot["token"])
+    assert sorted(row["amount"] for row in delta["transactions"]) == [5, 15]
+    assert delta["categories"] == []
+    assert delta["deleted"]["transactions"] == [drop["id"]]
+
+    assert _sync(client, auth_headers, delta["token"])["deleted"]["transactions"] == []
+
+
+def test_sync_is_per_user_and_validates_token(client, auth_headers):
+    """
+    Test another user's writes and malformed tokens
+    """
+    snapshot = _sync(client, auth_headers)
+    client.post("/api/auth/register", json={"email": "other@example.com", "password": "secret123"})
+    token = client.post(
+        "/api/auth/token", data={"username": "other@example.com", "password": "secret123"}
+    ).json()["access_token"]
+    client.post(
+        "/api/categories/", json={"name": "Theirs"}, headers={"Authorization": f"Bearer {token}"}
+    )
+
+    assert _sync(client, auth_headers, snapshot["token"])["categories"] == []
+    response = client.get("/api/sync", params={"since": "not-a-token"}, headers=auth_headers)
+    assert response.status_code == 400
@@ -48,21 +48,14 @@ const Budgets: React.FC = () => {
           categories.getAll()
         ]);
 
-        // Process budget data with spending information
-        const processedBudgets = budgetsData.map((budget: Budget) => {
-          // In a real app, you would calculate the actual spent amount
-          // For demo purposes, we'll generate a random spent amount
-          const spent = Math.random() * budget.amount;
-          const remaining = budget.amount - spent;
-          const percentage = (spent / budget.amount) * 100;
-
-          return {
-            ...budget,
-            spent,
-            remaining,
-            percentage
-          };
-        });
+        // Spent, remaining and percentage are computed by the API;
+        // mock data falls back to an untouched budget
+        const processedBudgets = budgetsData.map((budget: Budget) => ({
+          ...budget,
+          spent: budget.spent ?? 0,
+          remaining: budget.remaining ?? budget.amount,
+          percentage: budget.percentage ?? 0
+        }));
 
         setBudgetList(processedBudgets);
         setCategoryList(categoriesData);
@@ -97,7 +90,7 @@ const Budgets: React.FC = () => {
 
       const result = await budgets.create(newBudget);
 
-      // Add placeholder metrics for demo
+      // A new budget starts with nothing spent until the list is refreshed
       const spent = 0;
       const remaining = result.amount;
       const percentage = 0;
@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import Card from '../components/ui/Card';
-import { transactions, categories } from '../services/api';
+import { analytics } from '../services/api';
 import { formatCurrency } from '../utils/formatters';
 import './Dashboard.css';
 
@@ -33,61 +33,16 @@ const Dashboard: React.FC = () => {
       try {
         setLoading(true);
         
-        // For demonstration purposes, just load transactions
-        const allTransactions = await transactions.getAll();
-        const allCategories = await categories.getAll();
-        
-        // Calculate summary
-        const income = allTransactions
-          .filter((t: any) => t.type === 'income')
-          .reduce((sum: number, t: any) => sum + t.amount, 0);
-        
-        const expenses = allTransactions
-          .filter((t: any) => t.type === 'expense')
-          .reduce((sum: number, t: any) => sum + t.amount, 0);
+        // Totals and top categories are aggregated server-side
+        const dashboard = await analytics.getDashboard({ top: 5 });
         
         setSummary({
-          totalIncome: income,
-          totalExpenses: expenses,
-          netBalance: income - expenses
+          totalIncome: dashboard.total_income,
+          totalExpenses: dashboard.total_expenses,
+          netBalance: dashboard.net_balance
         });
         
-        // Process category data (simplified)
-        const categoryMap = new Map<number, CategorySummary>();
-        
-        allTransactions
-          .filter((t: any) => t.type === 'expense' && t.category_id)
-          .forEach((t: any) => {
-            if (!categoryMap.has(t.category_id)) {
-              const category = allCategories.find((c: any) => c.id === t.category_id);
-              categoryMap.set(t.category_id, {
-                id: t.category_id,
-                name: category ? category.name : 'Unknown',
-                color: category ? category.color : '#888',
-                amount: 0,
-                percentage: 0
-              });
-            }
-            
-            const current = categoryMap.get(t.category_id);
-            if (current) {
-              current.amount += t.amount;
-            }
-          });
-        
-        // Calculate percentages
-        if (expenses > 0) {
-          categoryMap.forEach(category => {
-            category.percentage = (category.amount / expenses) * 100;
-          });
-        }
-        
-        // Sort by amount and take top 5
-        const categoryList = Array.from(categoryMap.values())
-          .sort((a, b) => b.amount - a.amount)
-          .slice(0, 5);
-          
-        setTopCategories(categoryList);
+        setTopCategories(dashboard.top_categories);
         setLoading(false);
       } catch (err) {
         console.error('Error fetching dashboard data:', err);
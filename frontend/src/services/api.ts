@@ -363,11 +363,76 @@ export const budgets = {
   },
 };
 
+// Analytics service
+export const analytics = {
+  getDashboard: async (params: { date_from?: string; date_to?: string; currency?: string; top?: number } = {}) => {
+    try {
+      const response = await api.get('/analytics/dashboard', { params });
+      return response.data;
+    } catch (error) {
+      console.warn('Using mock dashboard data');
+      const totalIncome = mockTransactions
+        .filter(t => t.type === 'income')
+        .reduce((sum, t) => sum + t.amount, 0);
+      const totalExpenses = mockTransactions
+        .filter(t => t.type === 'expense')
+        .reduce((sum, t) => sum + t.amount, 0);
+      const byCategory = new Map<number, number>();
+      mockTransactions
+        .filter(t => t.type === 'expense' && t.category_id)
+        .forEach(t => byCategory.set(t.category_id, (byCategory.get(t.category_id) || 0) + t.amount));
+      const topCategories = Array.from(byCategory.entries())
+        .map(([id, amount]) => {
+          const category = mockCategories.find(c => c.id === id);
+          return {
+            id,
+            name: category ? category.name : 'Unknown',
+            color: category ? category.color : '#888',
+            amount,
+            percentage: totalExpenses > 0 ? (amount / totalExpenses) * 100 : 0
+          };
+        })
+        .sort((a, b) => b.amount - a.amount)
+        .slice(0, params.top || 5);
+      return {
+        total_income: totalIncome,
+        total_expenses: totalExpenses,
+        net_balance: totalIncome - totalExpenses,
+        transaction_count: mockTransactions.length,
+        top_categories: topCategories
+      };
+    }
+  },
+
+  getTimeseries: async (params: {
+    granularity?: 'day' | 'week' | 'month';
+    group_by?: 'category' | 'type';
+    date_from?: string;
+    date_to?: string;
+    currency?: string;
+    type?: string;
+  } = {}) => {
+    const response = await api.get('/analytics/timeseries', { params });
+    return response.data;
+  },
+};
+
+// Delta sync: call without a token for a snapshot, then with the returned
+// token to receive only rows changed or deleted since
+export const sync = {
+  getChanges: async (since?: string) => {
+    const response = await api.get('/sync', { params: since ? { since } : {} });
+    return response.data;
+  },
+};
+
 const apiService = {
   auth,
   transactions,
   categories,
   budgets,
+  analytics,
+  sync,
 };
 
 export default apiService;